@@ -1,7 +1,47 @@
-"""
-Agents package for Interview Practice Agent
-"""
-from agents.interview_agent import InterviewAgent
-from agents.prompt_manager import PromptManager
-
-__all__ = ['InterviewAgent', 'PromptManager']
\ No newline at end of file
+"""
+Agents package for Interview Practice Agent
+
+Names are imported on first access (PEP 562), so importing one small
+module does not load the whole agent stack.
+"""
+import importlib
+
+_EXPORTS = {
+    'InterviewAgent': 'agents.interview_agent',
+    'AsyncInterviewAgent': 'agents.async_interview_agent',
+    'PromptManager': 'agents.prompt_manager',
+    'LLMBackend': 'agents.llm_backend',
+    'GeminiBackend': 'agents.llm_backend',
+    'StubBackend': 'agents.llm_backend',
+    'ResponseCache': 'agents.response_cache',
+    'Cassette': 'agents.cassette',
+    'RecordingBackend': 'agents.cassette',
+    'ReplayBackend': 'agents.cassette',
+    'ModelRegistry': 'agents.model_registry',
+    'RequestGuard': 'agents.resilience',
+    'ResilientBackend': 'agents.resilience',
+    'CircuitOpenError': 'agents.resilience',
+    'SessionMetrics': 'agents.metrics',
+    'TurnMetrics': 'agents.metrics',
+    'to_prometheus': 'agents.metrics',
+    'SessionStore': 'agents.session_store',
+    'SessionConflictError': 'agents.session_store',
+    'SessionRegistry': 'agents.session_registry',
+    'ScoreStore': 'agents.analytics',
+    'Transcript': 'agents.transcript',
+    'TranscriptEntry': 'agents.transcript',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name]), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,418 @@
+"""
+Columnar score analytics over saved interview sessions
+
+Feedback-stage replies are parsed into rubric scores ("Communication
+Skills (Score: 8/10)" and so on) and kept as NumPy column arrays in one
+compressed .npz file: a sessions table sorted by date, with roles and
+candidates stored as integer codes, and an answers table of per-answer
+scores by question type where background scoring recorded them. Reports
+are computed with vectorized grouping over those columns, so they stay
+fast for hundreds of thousands of sessions.
+"""
+import json
+import os
+import re
+import numpy as np
+from agents.answer_scorer import SCORE_DIMENSIONS
+from agents.role_taxonomy import RoleMatcher
+
+QUESTION_TYPES = ("technical", "behavioral", "situational")
+
+# Heading keywords of each rubric section in the feedback text
+DIMENSION_KEYWORDS = {
+    "communication": "communication",
+    "answer_quality": "answer quality",
+    "technical_knowledge": "technical",
+}
+
+SCORE_PATTERN = re.compile(r"(\d+(?:\.\d+)?)\s*/\s*10\b")
+
+
+def parse_feedback_scores(text):
+    """
+    Extract rubric scores from a feedback reply
+    
+    The first line mentioning a section and an "X/10" score sets that
+    section's score, which matches both the structured headings and
+    looser wording such as "Communication: 7/10".
+    
+    Returns:
+        dict: Dimension -> score (0-10), only for dimensions found
+    """
+    scores = {}
+    for line in text.splitlines():
+        match = SCORE_PATTERN.search(line)
+        if match is None:
+            continue
+        lowered = line.lower()
+        for dimension, keyword in DIMENSION_KEYWORDS.items():
+            if dimension not in scores and keyword in lowered:
+                scores[dimension] = min(10.0, float(match.group(1)))
+                break
+    return scores
+
+
+def session_from_log(log, session_id, role=None, candidate=None, answer_scores=None):
+    """
+    Build one session row from transcript records
+    
+    Args:
+        log: TranscriptEntry.to_dict() records in order
+        session_id: Unique id of the session
+        role: Job role, matched from the candidate's introduction if None
+        candidate: Optional id linking repeated sessions of one candidate
+        answer_scores: Optional per-answer score dicts from AnswerScorer
+    
+    Returns:
+        dict or None: The session row, None if it never reached scored feedback
+    """
+    scores = {}
+    for record in log:
+        if record["role"] == "assistant" and record["stage"] == "feedback":
+            # A later evaluation in the same session replaces an earlier one
+            scores.update(parse_feedback_scores(record["content"]))
+    if not scores:
+        return None
+    
+    if role is None:
+        matcher = RoleMatcher.default()
+        for record in log:
+            if record["role"] == "user" and record["stage"] == "introduction":
+                role = matcher.match(record["content"])
+                if role:
+                    break
+    return {
+        "session_id": str(session_id),
+        "role": role or "",
+        "candidate": "" if candidate is None else str(candidate),
+        "timestamp": log[0].get("timestamp") or 0.0,
+        "scores": scores,
+        "answers": [score for score in (answer_scores or []) if score],
+    }
+
+
+def _unwrap_score(record):
+    """A plain score dict from batch results or AnswerScorer.to_list() records"""
+    if record and ("score" in record or "answer" in record):
+        # Answers still being scored when the state was saved have no score
+        return record.get("score")
+    return record
+
+
+def iter_sessions(path):
+    """
+    Read session rows from a saved file
+    
+    Accepts a transcript saved by InterviewAgent.save_transcript (one
+    session per file, id taken from the file name), or JSONL with one
+    session per line: batch runner results ("transcript") or agent
+    state dicts from InterviewAgent.to_dict ("log"). Sessions without
+    scored feedback are skipped.
+    
+    Yields:
+        dict: Session rows as built by session_from_log
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    if not records:
+        return
+    
+    if "content" in records[0]:
+        session_id = os.path.splitext(os.path.basename(path))[0]
+        session = session_from_log(records, session_id)
+        if session is not None:
+            yield session
+        return
+    
+    for record in records:
+        log = record.get("transcript") or record.get("log")
+        if not log:
+            continue
+        answer_scores = [_unwrap_score(score) for score in record.get("scores", [])]
+        session = session_from_log(
+            log,
+            record.get("id") or record.get("session_id"),
+            role=record.get("detected_role") or record.get("role"),
+            candidate=record.get("candidate"),
+            answer_scores=answer_scores,
+        )
+        if session is not None:
+            yield session
+
+
+def _encode(values, vocabulary):
+    """Integer codes of values in a sorted vocabulary ("" becomes -1)"""
+    values = np.array(values, dtype=str)
+    codes = np.searchsorted(vocabulary, values).astype(np.int32)
+    codes[values == ""] = -1
+    return codes
+
+
+def _group_stats(codes, values, groups, percentiles):
+    """
+    Count, mean and percentiles of values per group code, ignoring NaN
+    
+    Returns:
+        dict: group code -> {"n", "mean", "pXX", ...}
+    """
+    valid = ~np.isnan(values) & (codes >= 0)
+    codes, values = codes[valid], values[valid]
+    counts = np.bincount(codes, minlength=groups)
+    sums = np.bincount(codes, weights=values, minlength=groups)
+    
+    order = np.lexsort((values, codes))
+    codes, values = codes[order], values[order]
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    stats = {}
+    for code in np.flatnonzero(counts):
+        group = values[starts[code]:starts[code] + counts[code]]
+        row = {"n": int(counts[code]), "mean": round(float(sums[code] / counts[code]), 2)}
+        for percent, value in zip(percentiles, np.percentile(group, percentiles)):
+            row[f"p{percent}"] = round(float(value), 2)
+        stats[int(code)] = row
+    return stats
+
+
+class ScoreStore:
+    """
+    Columnar table of scored sessions and answers
+    
+    Columns are NumPy arrays: session_id, role (codes into roles), date
+    (datetime64[D], rows sorted by it), candidate (codes into candidates,
+    -1 if unknown) and one float32 column per rubric dimension (NaN when
+    the feedback did not score it). The answers table has answer_session
+    (row in the sessions table), answer_type (code into QUESTION_TYPES,
+    -1 if unplanned) and answer_<dimension> columns.
+    """
+    
+    FORMAT = 1
+    
+    def __init__(self, columns):
+        self.columns = columns
+    
+    def __len__(self):
+        return len(self.columns["session_id"])
+    
+    def __getitem__(self, name):
+        return self.columns[name]
+    
+    @classmethod
+    def from_sessions(cls, sessions):
+        """Build a store from session rows (e.g. from iter_sessions)"""
+        sessions = list(sessions)
+        roles = np.array(sorted({session["role"] for session in sessions} - {""}), dtype=str)
+        candidates = np.array(sorted({session["candidate"] for session in sessions} - {""}), dtype=str)
+        timestamps = np.array([session["timestamp"] for session in sessions], dtype=np.float64)
+        dates = timestamps.astype(np.int64).astype("datetime64[s]").astype("datetime64[D]")
+        order = np.argsort(dates, kind="stable")
+        position = np.empty_like(order)
+        position[order] = np.arange(len(order))
+        
+        columns = {
+            "format": np.array(cls.FORMAT),
+            "session_id": np.array([session["session_id"] for session in sessions], dtype=str)[order],
+            "roles": roles,
+            "role": _encode([session["role"] for session in sessions], roles)[order],
+            "candidates": candidates,
+            "candidate": _encode([session["candidate"] for session in sessions], candidates)[order],
+            "date": dates[order],
+        }
+        for dimension in SCORE_DIMENSIONS:
+            columns[dimension] = np.array(
+                [session["scores"].get(dimension, np.nan) for session in sessions], dtype=np.float32
+            )[order]
+        
+        answers = [(row, answer) for row, session in enumerate(sessions) for answer in session["answers"]]
+        columns["answer_session"] = position[np.array([row for row, _ in answers], dtype=np.int64)].astype(np.int32)
+        columns["answer_type"] = np.array(
+            [QUESTION_TYPES.index(answer["type"]) if answer.get("type") in QUESTION_TYPES else -1 for _, answer in answers],
+            dtype=np.int8
+        )
+        for dimension in SCORE_DIMENSIONS:
+            columns[f"answer_{dimension}"] = np.array(
+                [np.nan if answer.get(dimension) is None else answer[dimension] for _, answer in answers],
+                dtype=np.float32
+            )
+        return cls(columns)
+    
+    @classmethod
+    def from_files(cls, paths):
+        """Build a store from saved transcripts and result files"""
+        return cls.from_sessions(session for path in paths for session in iter_sessions(path))
+    
+    @classmethod
+    def load(cls, path):
+        """Load a store written by save()"""
+        with np.load(path, allow_pickle=False) as data:
+            columns = {name: data[name] for name in data.files}
+        if int(columns["format"]) != cls.FORMAT:
+            raise ValueError(f"Unsupported analytics format: {int(columns['format'])}")
+        return cls(columns)
+    
+    def save(self, path):
+        """Write every column to one compressed .npz file"""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        temp_path = f"{path}.tmp.npz"
+        np.savez_compressed(temp_path, **self.columns)
+        os.replace(temp_path, path)
+        return path
+    
+    def merge(self, sessions):
+        """
+        New store with sessions added, column by column
+        
+        A session id that is already stored is replaced by the new row.
+        """
+        other = ScoreStore.from_sessions(sessions)
+        keep = ~np.isin(self["session_id"], other["session_id"])
+        columns = {"format": np.array(self.FORMAT)}
+        
+        for vocabulary_name, code_name in (("roles", "role"), ("candidates", "candidate")):
+            vocabulary = np.union1d(self[vocabulary_name], other[vocabulary_name])
+            columns[vocabulary_name] = vocabulary
+            parts = []
+            for store, rows in ((self, keep), (other, slice(None))):
+                # The appended -1 keeps unknown (-1) codes unknown
+                mapping = np.append(np.searchsorted(vocabulary, store[vocabulary_name]), -1).astype(np.int32)
+                parts.append(mapping[store[code_name][rows]])
+            columns[code_name] = np.concatenate(parts)
+        for name in ("session_id", "date") + SCORE_DIMENSIONS:
+            columns[name] = np.concatenate([self[name][keep], other[name]])
+        
+        # Answers follow their session to its row in the merged table
+        kept_rows = np.cumsum(keep) - 1
+        answer_keep = keep[self["answer_session"]]
+        rows = np.concatenate([kept_rows[self["answer_session"][answer_keep]], other["answer_session"] + keep.sum()])
+        for name in ("answer_type",) + tuple(f"answer_{dimension}" for dimension in SCORE_DIMENSIONS):
+            columns[name] = np.concatenate([self[name][answer_keep], other[name]])
+        
+        order = np.argsort(columns["date"], kind="stable")
+        position = np.empty_like(order)
+        position[order] = np.arange(len(order))
+        for name in ("session_id", "role", "candidate", "date") + SCORE_DIMENSIONS:
+            columns[name] = columns[name][order]
+        columns["answer_session"] = position[rows].astype(np.int32)
+        return ScoreStore(columns)
+    
+    def select(self, role=None, since=None, until=None):
+        """
+        Boolean mask of sessions matching the filters
+        
+        Args:
+            role: Only this role
+            since: First date included ("YYYY-MM-DD")
+            until: Last date included ("YYYY-MM-DD")
+        """
+        mask = np.ones(len(self), dtype=bool)
+        if role is not None:
+            codes = np.flatnonzero(self["roles"] == role)
+            mask &= self["role"] == (codes[0] if len(codes) else -2)
+        # Rows are sorted by date, so date ranges are a slice
+        if since is not None:
+            mask[:np.searchsorted(self["date"], np.datetime64(since, "D"), side="left")] = False
+        if until is not None:
+            mask[np.searchsorted(self["date"], np.datetime64(until, "D"), side="right"):] = False
+        return mask
+    
+    def overall(self):
+        """Mean of the scored rubric dimensions per session"""
+        stacked = np.vstack([self[dimension] for dimension in SCORE_DIMENSIONS])
+        counts = (~np.isnan(stacked)).sum(axis=0)
+        return np.where(counts > 0, np.nansum(stacked, axis=0) / np.maximum(counts, 1), np.nan).astype(np.float32)
+    
+    def role_report(self, percentiles=(50, 90), **filters):
+        """
+        Per-role session counts, means and percentiles of every dimension
+        
+        Returns:
+            dict: role -> dimension -> {"n", "mean", "pXX", ...}
+        """
+        mask = self.select(**filters)
+        codes = self["role"][mask]
+        report = {}
+        for dimension, values in [(name, self[name]) for name in SCORE_DIMENSIONS] + [("overall", self.overall())]:
+            for code, stats in _group_stats(codes, values[mask], len(self["roles"]), percentiles).items():
+                report.setdefault(str(self["roles"][code]), {})[dimension] = stats
+        return report
+    
+    def question_type_report(self, percentiles=(50, 90), **filters):
+        """
+        Per-answer scores by question type
+        
+        Returns:
+            dict: question type -> dimension -> {"n", "mean", "pXX", ...}
+        """
+        mask = self.select(**filters)[self["answer_session"]]
+        codes = self["answer_type"][mask].astype(np.int32)
+        report = {}
+        for dimension in SCORE_DIMENSIONS:
+            values = self[f"answer_{dimension}"][mask]
+            for code, stats in _group_stats(codes, values, len(QUESTION_TYPES), percentiles).items():
+                report.setdefault(QUESTION_TYPES[code], {})[dimension] = stats
+        return report
+    
+    def trend_report(self, unit="M", **filters):
+        """
+        Mean overall score per calendar period
+        
+        Args:
+            unit: NumPy datetime unit of a period ("D", "W", "M" or "Y")
+        
+        Returns:
+            dict: period -> {"n", "mean"}
+        """
+        mask = self.select(**filters)
+        values = self.overall()[mask]
+        periods = self["date"][mask].astype(f"datetime64[{unit}]")
+        valid = ~np.isnan(values)
+        keys, codes = np.unique(periods[valid], return_inverse=True)
+        counts = np.bincount(codes, minlength=len(keys))
+        sums = np.bincount(codes, weights=values[valid], minlength=len(keys))
+        return {
+            str(key): {"n": int(count), "mean": round(float(total / count), 2)}
+            for key, count, total in zip(keys, counts, sums)
+        }
+    
+    def improvement_report(self, **filters):
+        """
+        Change in overall score over repeated sessions of one candidate
+        
+        Only candidates with at least two sessions count. Attempts are
+        numbered by date within each candidate.
+        
+        Returns:
+            dict: candidates, mean and median change from first to last
+                session, share of candidates who improved, and the mean
+                overall score per attempt number
+        """
+        mask = self.select(**filters) & (self["candidate"] >= 0)
+        values = self.overall()[mask]
+        candidates = self["candidate"][mask]
+        valid = ~np.isnan(values)
+        values, candidates = values[valid], candidates[valid]
+        
+        # Rows are already in date order; a stable sort keeps it per candidate
+        order = np.argsort(candidates, kind="stable")
+        values, candidates = values[order], candidates[order]
+        _, starts, counts = np.unique(candidates, return_index=True, return_counts=True)
+        repeated = counts >= 2
+        if not repeated.any():
+            return {"candidates": 0}
+        
+        first = values[starts[repeated]]
+        last = values[starts[repeated] + counts[repeated] - 1]
+        change = last - first
+        attempt = np.arange(len(values)) - np.repeat(starts, counts)
+        in_repeated = np.repeat(repeated, counts)
+        attempt_counts = np.bincount(attempt[in_repeated])
+        attempt_sums = np.bincount(attempt[in_repeated], weights=values[in_repeated])
+        return {
+            "candidates": int(repeated.sum()),
+            "mean_change": round(float(change.mean()), 2),
+            "median_change": round(float(np.median(change)), 2),
+            "improved_share": round(float((change > 0).mean()), 3),
+            "mean_by_attempt": {
+                int(number + 1): round(float(total / count), 2)
+                for number, (count, total) in enumerate(zip(attempt_counts, attempt_sums)) if count
+            },
+        }
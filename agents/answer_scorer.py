@@ -0,0 +1,248 @@
+"""
+Background per-answer scoring so the final feedback turn only summarizes
+"""
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from config import Config
+from agents.envelope import parse_answer_score
+from agents.prompt_manager import PromptManager
+
+SCORE_DIMENSIONS = ("communication", "answer_quality", "technical_knowledge")
+
+
+def aggregate_scores(scores):
+    """
+    Average each rubric dimension over the scored answers
+    
+    Args:
+        scores: Score dicts from AnswerScorer (None for unscored answers)
+    
+    Returns:
+        dict: Dimension -> mean score rounded to one decimal (None if no
+            answer was scored on it)
+    """
+    averages = {}
+    for dimension in SCORE_DIMENSIONS:
+        values = [score[dimension] for score in scores if score and score.get(dimension) is not None]
+        averages[dimension] = round(sum(values) / len(values), 1) if values else None
+    return averages
+
+
+class AnswerScorer:
+    """
+    Scores each answer against the feedback rubric on a shared thread pool
+    
+    Scoring runs while the interview moves on to the next question, so
+    the feedback turn only has to aggregate the stored scores. Each
+    session keeps at most Config.SCORING_PER_SESSION scoring calls in
+    flight; later answers wait in the session's own queue, so one
+    session cannot fill the shared pool.
+    """
+    
+    _executor = None
+    _executor_lock = threading.Lock()
+    
+    def __init__(self, backend, on_reply=None, max_in_flight=None):
+        """
+        Args:
+            backend: LLMBackend used for the one-off scoring calls
+            on_reply: Optional callable(ModelReply) for token accounting
+            max_in_flight: Scoring calls this session may run at once
+                (defaults to Config.SCORING_PER_SESSION)
+        """
+        self.backend = backend
+        self.on_reply = on_reply
+        self.max_in_flight = max_in_flight or Config.SCORING_PER_SESSION
+        self.futures = []
+        self.answers = []
+        self._queue = deque()
+        self._in_flight = 0
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def get_executor(cls):
+        """Get the process-wide scoring thread pool"""
+        with cls._executor_lock:
+            if cls._executor is None:
+                cls._executor = ThreadPoolExecutor(
+                    max_workers=Config.SCORING_WORKERS,
+                    thread_name_prefix="answer-scoring"
+                )
+            return cls._executor
+    
+    def __len__(self):
+        return len(self.futures)
+    
+    def submit(self, role, question, answer, question_type=None):
+        """Queue an answer for scoring in the background"""
+        number = len(self.futures) + 1
+        future = Future()
+        self.answers.append([role, question, answer, question_type])
+        self.futures.append(future)
+        with self._lock:
+            self._queue.append((future, number, role, question, answer, question_type))
+        self._start_queued()
+    
+    def _start_queued(self):
+        """Start queued answers while this session has scoring slots free"""
+        while True:
+            with self._lock:
+                if not self._queue or self._in_flight >= self.max_in_flight:
+                    return
+                job = self._queue.popleft()
+                self._in_flight += 1
+            if job[0].set_running_or_notify_cancel():
+                self._launch(job)
+            else:
+                self._finish()
+    
+    def _launch(self, job):
+        """Run one scoring job on the thread pool"""
+        self.get_executor().submit(self._run, job)
+    
+    def _run(self, job):
+        """Score one answer into its future (runs on the thread pool)"""
+        future, *args = job
+        try:
+            future.set_result(self._score(*args))
+        except Exception as e:
+            future.set_exception(e)
+        finally:
+            self._finish()
+    
+    def _finish(self):
+        """Free a scoring slot and start the next queued answer"""
+        with self._lock:
+            self._in_flight -= 1
+        self._start_queued()
+    
+    def _prompt(self, role, question, answer):
+        return PromptManager.get_answer_scoring_prompt(role, question, answer)
+    
+    def _parse(self, reply, number, question_type):
+        """Count the scoring call's tokens and parse its score"""
+        if self.on_reply:
+            self.on_reply(reply)
+        score = parse_answer_score(reply.text)
+        if score is not None:
+            score["number"] = number
+            score["type"] = question_type
+        return score
+    
+    def _score(self, number, role, question, answer, question_type):
+        """Score one answer with a blocking model call"""
+        reply = self.backend.start_chat().send(self._prompt(role, question, answer))
+        return self._parse(reply, number, question_type)
+    
+    @staticmethod
+    def _result(future):
+        """Get a finished future's score, or None if it failed"""
+        if not future.done() or future.cancelled() or future.exception():
+            return None
+        return future.result()
+    
+    def collect(self):
+        """
+        Take the scores finished so far, without waiting
+        
+        Answers still queued are cancelled, since nothing reads their
+        scores once the feedback turn has started.
+        
+        Returns:
+            list: One score dict per answer, None where scoring failed or
+                has not finished
+        """
+        with self._lock:
+            queued = list(self._queue)
+        for job in queued:
+            job[0].cancel()
+        return [self._result(future) for future in self.futures]
+    
+    def results(self, timeout=None):
+        """
+        Wait for outstanding scores
+        
+        Returns:
+            list: One score dict per answer, None where scoring failed or
+                did not finish within timeout seconds
+        """
+        wait(self.futures, timeout=timeout)
+        return [self._result(future) for future in self.futures]
+    
+    async def results_async(self, timeout=None):
+        """Await outstanding scores without blocking the event loop"""
+        pending = [asyncio.wrap_future(future) for future in self.futures if not future.done()]
+        if pending:
+            await asyncio.wait(pending, timeout=timeout)
+        return [self._result(future) for future in self.futures]
+    
+    def to_list(self):
+        """
+        Serialize for a session store
+        
+        Finished scores are stored as they are; answers still being scored
+        are stored so the worker that restores the session can rescore them.
+        """
+        return [
+            {"score": self._result(future)} if future.done() else {"answer": answer}
+            for future, answer in zip(self.futures, self.answers)
+        ]
+    
+    def restore(self, records):
+        """Load scores from to_list(), resubmitting unfinished ones"""
+        for record in records:
+            if "answer" in record:
+                self.submit(*record["answer"])
+                continue
+            future = Future()
+            future.set_result(record["score"])
+            self.futures.append(future)
+            self.answers.append(None)
+
+
+class AsyncAnswerScorer(AnswerScorer):
+    """
+    Scores answers with send_async on the running event loop
+    
+    Used by AsyncInterviewAgent, so scoring calls wait on the network
+    alongside the live turns instead of holding pool threads. Answers
+    submitted or restored while no loop is running stay queued until the
+    next submit or results_async call on the loop.
+    """
+    
+    def __init__(self, backend, on_reply=None, max_in_flight=None):
+        super().__init__(backend, on_reply, max_in_flight)
+        # The loop only keeps weak references to its tasks
+        self._tasks = set()
+    
+    def _start_queued(self):
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        super()._start_queued()
+    
+    def _launch(self, job):
+        task = asyncio.get_running_loop().create_task(self._run_async(job))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+    
+    async def _run_async(self, job):
+        """Score one answer into its future (runs on the event loop)"""
+        future, number, role, question, answer, question_type = job
+        try:
+            reply = await self.backend.start_chat().send_async(self._prompt(role, question, answer))
+            future.set_result(self._parse(reply, number, question_type))
+        except BaseException as e:
+            # Also settles the future when the loop cancels the task
+            future.set_exception(e)
+            if not isinstance(e, Exception):
+                raise
+        finally:
+            self._finish()
+    
+    async def results_async(self, timeout=None):
+        self._start_queued()
+        return await super().results_async(timeout)
@@ -0,0 +1,135 @@
+"""
+Asyncio-native interview agent for serving many concurrent sessions
+"""
+import asyncio
+import weakref
+from config import Config
+from agents.answer_scorer import AsyncAnswerScorer
+from agents.envelope import EnvelopeStream, split_envelope
+from agents.interview_agent import InterviewAgent
+
+class AsyncInterviewAgent(InterviewAgent):
+    """Interview agent with awaitable, non-blocking model calls
+    
+    Shares the stage machine (get_current_prompt, update_state) and the
+    question plan with InterviewAgent. In-flight model requests are capped per process by
+    Config.MAX_CONCURRENT_REQUESTS. Answers are scored on the event loop
+    rather than on the shared scoring threads.
+    """
+    
+    scorer_class = AsyncAnswerScorer
+    
+    # One semaphore per event loop, shared by every agent in the process
+    _semaphores = weakref.WeakKeyDictionary()
+    
+    @classmethod
+    def _get_semaphore(cls):
+        """Get the request semaphore for the running event loop"""
+        loop = asyncio.get_running_loop()
+        semaphore = cls._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(Config.MAX_CONCURRENT_REQUESTS)
+            cls._semaphores[loop] = semaphore
+        return semaphore
+    
+    async def plan_questions_async(self):
+        """Plan every primary question for the session (see plan_questions)"""
+        prompt = self.prompt_manager.get_question_plan_prompt(self.role, Config.MAX_QUESTIONS)
+        try:
+            async with self._get_semaphore():
+                reply = await self.backend.start_chat().send_async(prompt)
+            self._store_plan(reply)
+        except Exception:
+            # Fall back to making up each question turn by turn
+            self.question_plan = []
+        return self.question_plan
+    
+    async def _start_turn_async(self, user_input):
+        """Log the user message, plan if needed and build the model message"""
+        self._open_turn(user_input)
+        if self._needs_plan():
+            await self.plan_questions_async()
+        self._planned_question = self._next_planned_question()
+        if self.stage == "feedback" and self.scorer is not None:
+            self._feedback_scores = self.scorer.collect()
+        return self._build_message(user_input)
+    
+    async def send_message(self, user_input, cacheable=False):
+        """Send message to agent and await the response"""
+        full_message = await self._start_turn_async(user_input)
+        
+        # Serve deterministic turns from cache
+        cache_key, bot_response = self._lookup_cache(user_input, cacheable)
+        if bot_response is not None:
+            self._record_exchange(full_message, bot_response)
+            self._finish_turn(user_input, bot_response, cached=True)
+            return bot_response
+        
+        try:
+            # Send to the model
+            async with self._get_semaphore():
+                reply = await self.chat.send_async(full_message)
+            bot_response, state = split_envelope(reply.text)
+            bot_response += self._planned_suffix()
+            if cache_key:
+                self.cache.put(cache_key, bot_response)
+            
+            self._finish_turn(user_input, bot_response, reply, state)
+            
+            return bot_response
+            
+        except Exception as e:
+            self._discard_failed_turn(e)
+            error_msg = f"Sorry, I encountered an error: {str(e)}"
+            return error_msg
+    
+    async def send_message_stream(self, user_input, cacheable=False):
+        """
+        Send message to agent and asynchronously stream the response
+        
+        State is updated once the stream has been fully consumed.
+        
+        Args:
+            user_input: The candidate's message
+            cacheable: True if the turn may be served from the response cache
+            
+        Yields:
+            str: Chunks of the interviewer's response text
+        """
+        full_message = await self._start_turn_async(user_input)
+        
+        # Serve deterministic turns from cache
+        cache_key, bot_response = self._lookup_cache(user_input, cacheable)
+        if bot_response is not None:
+            self._record_exchange(full_message, bot_response)
+            self.metrics.mark_first_token()
+            yield bot_response
+            self._finish_turn(user_input, bot_response, cached=True)
+            return
+        
+        envelope = EnvelopeStream()
+        started = False
+        try:
+            # Hold a request slot until the whole reply has streamed in
+            async with self._get_semaphore():
+                async for text in self.chat.stream_async(full_message):
+                    if not started:
+                        self.metrics.mark_first_token()
+                        started = True
+                    visible = envelope.feed(text)
+                    if visible:
+                        yield visible
+                    
+        except Exception as e:
+            self._discard_failed_turn(e)
+            yield f"Sorry, I encountered an error: {str(e)}"
+            return
+        
+        tail = envelope.close() + self._planned_suffix()
+        if tail:
+            yield tail
+        bot_response = envelope.reply + self._planned_suffix()
+        if cache_key:
+            self.cache.put(cache_key, bot_response)
+        
+        self._finish_turn(user_input, bot_response, self.chat.last_reply, envelope.state)
@@ -0,0 +1,160 @@
+"""
+Batch offline interview runner for evaluating prompts at scale
+"""
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from config import Config
+from agents.interview_agent import InterviewAgent
+from agents.llm_backend import StubBackend
+
+CLOSING_MESSAGE = "That's all from me. Could I get your feedback now?"
+
+
+def load_sessions(path):
+    """
+    Read scripted candidate sessions from a JSONL file
+    
+    Each line is {"id": ..., "role": ..., "answers": [...]}, optionally
+    with a "candidate" id linking repeated sessions; a missing id
+    defaults to the line number.
+    """
+    sessions = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if line.strip():
+                session = json.loads(line)
+                session.setdefault("id", str(line_number))
+                sessions.append(session)
+    return sessions
+
+
+def load_completed_ids(path):
+    """Get ids of sessions already written to an output file without error"""
+    completed = set()
+    if not os.path.exists(path):
+        return completed
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A partially written last line from an interrupted run
+                continue
+            if not record.get("error"):
+                completed.add(str(record["id"]))
+    return completed
+
+
+def run_session(session, stub=False):
+    """
+    Drive one scripted candidate through every interview stage
+    
+    Args:
+        session: Dict with "id", "role" and "answers"
+        stub: Use the local StubBackend instead of Gemini
+    
+    Returns:
+        dict: Result record for the output file
+    """
+    agent = InterviewAgent(backend=StubBackend() if stub else None)
+    start = time.perf_counter()
+    feedback = None
+    
+    turns = [(Config.GREETING_MESSAGE, True), (session["role"], False)]
+    turns += [(answer, False) for answer in session.get("answers", [])]
+    
+    for user_input, cacheable in turns:
+        in_feedback = agent.stage == "feedback"
+        reply = agent.send_message(user_input, cacheable=cacheable)
+        if agent.last_error:
+            break
+        if in_feedback:
+            feedback = reply
+            break
+    
+    # Ran out of answers after the last question: ask for the evaluation
+    if feedback is None and agent.stage == "feedback" and not agent.last_error:
+        reply = agent.send_message(CLOSING_MESSAGE)
+        if not agent.last_error:
+            feedback = reply
+    
+    # Wait (bounded) for answers still being scored so records do not depend on timing
+    scores = agent.scorer.results(Config.SCORING_TIMEOUT) if agent.scorer is not None else []
+    
+    result = {
+        "id": str(session["id"]),
+        "role": session["role"],
+        "candidate": session.get("candidate"),
+        "detected_role": agent.role,
+        "stage": agent.stage,
+        "questions_asked": agent.questions_asked,
+        "feedback": feedback,
+        "error": agent.last_error,
+        "elapsed_s": round(time.perf_counter() - start, 3),
+        "scores": scores,
+        "metrics": agent.metrics.summary(),
+        "transcript": list(agent.conversation_log.iter_records()),
+    }
+    agent.conversation_log.close()
+    return result
+
+
+def _init_worker(workers):
+    """Split the shared quota evenly between worker processes"""
+    Config.RATE_LIMIT_RPM = max(1, Config.RATE_LIMIT_RPM // workers) if Config.RATE_LIMIT_RPM else 0
+    Config.RATE_LIMIT_TPM = max(1, Config.RATE_LIMIT_TPM // workers) if Config.RATE_LIMIT_TPM else 0
+
+
+def run_batch(input_path, output_path, workers=4, use_processes=False, stub=False, progress=None):
+    """
+    Run every session in input_path, appending results to output_path
+    
+    Sessions already completed in output_path are skipped, so an
+    interrupted run can simply be started again (failed sessions are
+    retried). Threads share the
+    process-wide rate limiter; with use_processes the quota is split
+    evenly between worker processes.
+    
+    Args:
+        input_path: JSONL file of scripted sessions
+        output_path: JSONL file results are appended to
+        workers: Size of the worker pool
+        use_processes: Use a process pool instead of threads
+        stub: Use the local StubBackend instead of Gemini
+        progress: Optional callable(done, total, result) after each session
+    
+    Returns:
+        dict: Counts of completed, skipped and failed sessions
+    """
+    sessions = load_sessions(input_path)
+    completed = load_completed_ids(output_path)
+    pending = [session for session in sessions if str(session["id"]) not in completed]
+    
+    if use_processes:
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(workers,))
+    else:
+        pool = ThreadPoolExecutor(max_workers=workers)
+    
+    counts = {"completed": 0, "skipped": len(sessions) - len(pending), "failed": 0}
+    start = time.perf_counter()
+    
+    with pool, open(output_path, "a", encoding="utf-8") as out:
+        futures = {pool.submit(run_session, session, stub): session for session in pending}
+        for future in as_completed(futures):
+            session = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {"id": str(session["id"]), "role": session.get("role"), "error": str(e)}
+            
+            out.write(json.dumps(result) + "\n")
+            out.flush()
+            
+            counts["failed" if result.get("error") else "completed"] += 1
+            if progress:
+                progress(counts["completed"] + counts["failed"], len(pending), result)
+    
+    counts["elapsed_s"] = round(time.perf_counter() - start, 2)
+    return counts
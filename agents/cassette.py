@@ -0,0 +1,330 @@
+"""
+Record and replay model calls through cassette files
+
+A cassette is a JSONL file with one line per model call: the model, the
+message sent, the raw reply with its token usage, and the timing of the
+call (time to first token, arrival of each streamed chunk, wall time).
+RecordingBackend wraps a real backend and appends every completed call;
+ReplayBackend answers from the cassette without touching the network,
+either instantly or with the recorded timings, so a session's behaviour
+and latency profile can be reproduced offline.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from config import Config
+from agents.llm_backend import ChatSession, LLMBackend, ModelReply
+
+
+class CassetteMissError(Exception):
+    """Raised in replay when a message was never recorded"""
+
+
+class Cassette:
+    """
+    Recorded model calls keyed by model and message
+    
+    Calls are matched on the exact message text rather than on their
+    order, so background scoring and planning calls replay correctly
+    even when they finish in a different order. A message recorded
+    several times is answered with each recording in turn, wrapping
+    around once they are used up, so one recorded session can be
+    replayed any number of times.
+    """
+    
+    FORMAT = 1
+    
+    _shared = None
+    _shared_lock = threading.Lock()
+    
+    def __init__(self, path):
+        """
+        Args:
+            path: Cassette file; loaded if it exists, appended to when recording
+        """
+        self.path = path
+        self.interactions = {}
+        self.recorded = 0
+        self.replayed = 0
+        self.misses = 0
+        self._positions = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            self.load()
+    
+    @classmethod
+    def shared(cls):
+        """Get the process-wide cassette at Config.CASSETTE_PATH"""
+        with cls._shared_lock:
+            if cls._shared is None or cls._shared.path != Config.CASSETTE_PATH:
+                cls._shared = cls(Config.CASSETTE_PATH)
+            return cls._shared
+    
+    @staticmethod
+    def make_key(model, message):
+        """Lookup key of a call"""
+        return hashlib.sha1(f"{model}\x00{message}".encode("utf-8")).hexdigest()
+    
+    def load(self):
+        """Read every interaction from the cassette file"""
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    interaction = json.loads(line)
+                except ValueError:
+                    # A partially written last line from an interrupted recording
+                    continue
+                if interaction.get("format") != self.FORMAT:
+                    raise ValueError(f"Unsupported cassette format: {interaction.get('format')}")
+                key = self.make_key(interaction["model"], interaction["message"])
+                self.interactions.setdefault(key, []).append(interaction)
+    
+    def __len__(self):
+        return sum(len(recordings) for recordings in self.interactions.values())
+    
+    def record(self, model, message, reply, chunks=None, first_token=0.0, wall_time=0.0):
+        """
+        Append one completed call to the cassette
+        
+        Args:
+            model: Model the call went to
+            message: Message sent
+            reply: The ModelReply received
+            chunks: (seconds since the call started, text) per streamed chunk
+            first_token: Seconds to the first token
+            wall_time: Seconds for the whole call
+        """
+        interaction = {
+            "format": self.FORMAT,
+            "model": model,
+            "message": message,
+            "text": reply.text,
+            "prompt_tokens": reply.prompt_tokens,
+            "completion_tokens": reply.completion_tokens,
+            "first_token": round(first_token, 4),
+            "wall_time": round(wall_time, 4),
+            "chunks": [[round(offset, 4), text] for offset, text in chunks] if chunks is not None else None,
+        }
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(interaction) + "\n")
+            key = self.make_key(model, message)
+            self.interactions.setdefault(key, []).append(interaction)
+            self.recorded += 1
+    
+    def next(self, model, message):
+        """
+        Get the recording that answers a call
+        
+        Raises:
+            CassetteMissError: If the message was never recorded for the model
+        """
+        key = self.make_key(model, message)
+        with self._lock:
+            recordings = self.interactions.get(key)
+            if not recordings:
+                self.misses += 1
+                raise CassetteMissError(f"No recorded reply for this {model} message: {message[:80]!r}")
+            position = self._positions.get(key, 0)
+            self._positions[key] = position + 1
+            self.replayed += 1
+            return recordings[position % len(recordings)]
+    
+    def rewind(self):
+        """Serve every message's first recording again"""
+        with self._lock:
+            self._positions.clear()
+    
+    def stats(self):
+        """Recorded, replayed and missed call counts"""
+        return {
+            "path": self.path,
+            "interactions": len(self),
+            "recorded": self.recorded,
+            "replayed": self.replayed,
+            "misses": self.misses,
+        }
+
+
+class RecordingChatSession(ChatSession):
+    """Chat session that records every completed call of the wrapped session"""
+    
+    def __init__(self, session, cassette, model):
+        # last_reply is read through from the wrapped session
+        self.session = session
+        self.cassette = cassette
+        self.model = model
+    
+    @property
+    def history(self):
+        """Get the conversation history"""
+        return self.session.history
+    
+    @property
+    def last_reply(self):
+        """Last complete reply from the wrapped session"""
+        return self.session.last_reply
+    
+    @property
+    def last_hedge(self):
+        """Hedging outcome of the wrapped session, if it hedges"""
+        return getattr(self.session, "last_hedge", None)
+    
+    def set_history(self, history):
+        """Replace the conversation history"""
+        self.session.set_history(history)
+    
+    def _record(self, message, reply, start, chunks=None):
+        wall_time = time.perf_counter() - start
+        first_token = chunks[0][0] if chunks else wall_time
+        self.cassette.record(self.model, message, reply, chunks, first_token, wall_time)
+    
+    def send(self, message):
+        """Send a message and return a ModelReply"""
+        start = time.perf_counter()
+        reply = self.session.send(message)
+        self._record(message, reply, start)
+        return reply
+    
+    def stream(self, message):
+        """Send a message and yield response text chunks"""
+        start = time.perf_counter()
+        chunks = []
+        for text in self.session.stream(message):
+            chunks.append((time.perf_counter() - start, text))
+            yield text
+        # Only fully consumed streams are recorded
+        self._record(message, self.session.last_reply, start, chunks)
+    
+    async def send_async(self, message):
+        """Send a message and await a ModelReply"""
+        start = time.perf_counter()
+        reply = await self.session.send_async(message)
+        self._record(message, reply, start)
+        return reply
+    
+    async def stream_async(self, message):
+        """Send a message and asynchronously yield response text chunks"""
+        start = time.perf_counter()
+        chunks = []
+        async for text in self.session.stream_async(message):
+            chunks.append((time.perf_counter() - start, text))
+            yield text
+        self._record(message, self.session.last_reply, start, chunks)
+
+
+class RecordingBackend(LLMBackend):
+    """Backend wrapper that records every call into a cassette"""
+    
+    def __init__(self, backend, cassette=None):
+        self.backend = backend
+        self.cassette = cassette if cassette is not None else Cassette.shared()
+        if hasattr(backend, "hedge_stats"):
+            # Keeps hedging stats visible in the CLI and debug panel
+            self.hedge_stats = backend.hedge_stats
+    
+    @property
+    def system_instruction(self):
+        """System instruction of the wrapped backend"""
+        return self.backend.system_instruction
+    
+    @property
+    def model_name(self):
+        """Model of the wrapped backend"""
+        return self.backend.model_name
+    
+    def start_chat(self, history=None):
+        """Start a recording chat session"""
+        return RecordingChatSession(self.backend.start_chat(history), self.cassette, self.model_name)
+
+
+class ReplayChatSession(ChatSession):
+    """Chat session answered from a cassette"""
+    
+    def __init__(self, backend, history):
+        super().__init__()
+        self.backend = backend
+        self._history = list(history)
+    
+    @property
+    def history(self):
+        """Get the conversation history"""
+        return list(self._history)
+    
+    def set_history(self, history):
+        """Replace the conversation history, e.g. after compaction"""
+        self._history = list(history)
+    
+    def _lookup(self, message):
+        """Find the recorded call and add the exchange to the history"""
+        interaction = self.backend.cassette.next(self.backend.model_name, message)
+        self._history.append({"role": "user", "text": message})
+        self._history.append({"role": "model", "text": interaction["text"]})
+        reply = ModelReply(interaction["text"], interaction["prompt_tokens"], interaction["completion_tokens"])
+        return interaction, reply
+    
+    def _delays(self, interaction):
+        """Seconds to wait before each chunk, scaled by the backend's latency_scale"""
+        scale = self.backend.latency_scale
+        chunks = interaction["chunks"]
+        if chunks is None:
+            # Recorded without streaming: the whole reply arrives at once
+            chunks = [[interaction["wall_time"], interaction["text"]]]
+        previous = 0.0
+        for offset, text in chunks:
+            yield (offset - previous) * scale, text
+            previous = offset
+    
+    def send(self, message):
+        """Send a message and return a ModelReply"""
+        interaction, reply = self._lookup(message)
+        time.sleep(interaction["wall_time"] * self.backend.latency_scale)
+        self.last_reply = reply
+        return reply
+    
+    def stream(self, message):
+        """Send a message and yield response text chunks"""
+        interaction, reply = self._lookup(message)
+        for delay, text in self._delays(interaction):
+            if delay > 0:
+                time.sleep(delay)
+            yield text
+        self.last_reply = reply
+    
+    async def send_async(self, message):
+        """Send a message and await a ModelReply"""
+        interaction, reply = self._lookup(message)
+        await asyncio.sleep(interaction["wall_time"] * self.backend.latency_scale)
+        self.last_reply = reply
+        return reply
+    
+    async def stream_async(self, message):
+        """Send a message and asynchronously yield response text chunks"""
+        interaction, reply = self._lookup(message)
+        for delay, text in self._delays(interaction):
+            await asyncio.sleep(max(0.0, delay))
+            yield text
+        self.last_reply = reply
+
+
+class ReplayBackend(LLMBackend):
+    """
+    Backend that serves recorded replies from a cassette
+    
+    latency_scale 0 replies instantly; 1 reproduces the recorded time to
+    first token and chunk spacing; other values stretch or compress them.
+    """
+    
+    def __init__(self, cassette=None, model_name=None, system_instruction=None, latency_scale=None):
+        self.cassette = cassette if cassette is not None else Cassette.shared()
+        self.model_name = model_name or Config.GEMINI_MODEL
+        self.system_instruction = system_instruction
+        self.latency_scale = Config.CASSETTE_LATENCY_SCALE if latency_scale is None else latency_scale
+    
+    def start_chat(self, history=None):
+        """Start a replaying chat session"""
+        return ReplayChatSession(self, history or [])
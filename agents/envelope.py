@@ -0,0 +1,190 @@
+"""
+Structured reply envelope: interviewer text plus a machine-readable state line
+
+The model ends every reply with a sentinel followed by compact JSON, e.g.
+
+    Great answer! How would you scale that design to ten regions?
+    <<<STATE>>> {"role": "Site Reliability Engineer", "is_question": true, "ready_for_feedback": false}
+
+The state line is stripped before the reply is shown or logged, so the
+stage machine gets its signals from the same call as the reply. The
+question plan made at interview start and the background per-answer
+scores are parsed here as well.
+"""
+import json
+
+SENTINEL = "<<<STATE>>>"
+STATE_FIELDS = ("role", "is_question", "ready_for_feedback")
+QUESTION_TYPES = ("technical", "behavioral", "situational", "role-specific")
+
+
+def format_state(role=None, is_question=False, ready_for_feedback=False):
+    """Build a state line (used by scripted backends)"""
+    state = {"role": role, "is_question": is_question, "ready_for_feedback": ready_for_feedback}
+    return f"{SENTINEL} {json.dumps(state)}"
+
+
+def _extract_object(text):
+    """Parse the outermost JSON object in text (ignoring code fences etc.)"""
+    start = text.find("{")
+    end = text.rfind("}")
+    if start < 0 or end < start:
+        return None
+    try:
+        data = json.loads(text[start:end + 1])
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def parse_state(text):
+    """
+    Parse the JSON after the sentinel
+    
+    Returns:
+        dict or None: State with the known fields, or None if malformed
+    """
+    data = _extract_object(text)
+    if data is None:
+        return None
+    role = data.get("role")
+    return {
+        "role": role.strip() if isinstance(role, str) and role.strip() else None,
+        "is_question": data.get("is_question") is True,
+        "ready_for_feedback": data.get("ready_for_feedback") is True,
+    }
+
+
+def parse_question_plan(text, count):
+    """
+    Parse a question plan reply: {"questions": [{"type": ..., "question": ...}]}
+    
+    Returns:
+        list: Up to count {"type", "question"} dicts (empty if malformed)
+    """
+    # A state line may follow, as on every other reply
+    data = _extract_object(text.split(SENTINEL, 1)[0])
+    if data is None or not isinstance(data.get("questions"), list):
+        return []
+    plan = []
+    for item in data["questions"]:
+        if not isinstance(item, dict) or not isinstance(item.get("question"), str):
+            continue
+        question = " ".join(item["question"].split())
+        question_type = str(item.get("type", "")).lower()
+        if question:
+            plan.append({
+                "type": question_type if question_type in QUESTION_TYPES else "role-specific",
+                "question": question,
+            })
+    return plan[:count]
+
+
+def _clamp_score(value):
+    """A 1-10 integer score, or None"""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    return max(1, min(10, round(value)))
+
+
+def parse_answer_score(text):
+    """
+    Parse a per-answer score reply
+
+    Returns:
+        dict or None: communication, answer_quality, technical_knowledge
+            (1-10, technical_knowledge None if not applicable), strengths
+            and improvement; None if malformed
+    """
+    data = _extract_object(text.split(SENTINEL, 1)[0])
+    if data is None:
+        return None
+    score = {
+        "communication": _clamp_score(data.get("communication")),
+        "answer_quality": _clamp_score(data.get("answer_quality")),
+        "technical_knowledge": _clamp_score(data.get("technical_knowledge")),
+        "strengths": str(data.get("strengths") or "").strip(),
+        "improvement": str(data.get("improvement") or "").strip(),
+    }
+    if score["communication"] is None and score["answer_quality"] is None:
+        return None
+    return score
+
+
+def split_envelope(text):
+    """
+    Split a complete reply into visible text and state
+    
+    Returns:
+        tuple: (reply text, state dict or None if the model left it out)
+    """
+    index = text.find(SENTINEL)
+    if index < 0:
+        return text, None
+    return text[:index].rstrip(), parse_state(text[index + len(SENTINEL):])
+
+
+class EnvelopeStream:
+    """
+    Incrementally strips the state line from a streamed reply
+    
+    feed() returns the text that is safe to show. A chunk ending in what
+    could be the start of the sentinel is held back until the next chunk
+    settles it, as is trailing whitespace before the state line.
+    """
+    
+    def __init__(self):
+        self._parts = []
+        self._pending = ""
+        self._state_text = None
+    
+    def feed(self, chunk):
+        """Add a chunk and return the newly visible text"""
+        if self._state_text is not None:
+            self._state_text += chunk
+            return ""
+        
+        self._pending += chunk
+        index = self._pending.find(SENTINEL)
+        if index >= 0:
+            visible = self._pending[:index].rstrip()
+            self._state_text = self._pending[index + len(SENTINEL):]
+            self._pending = ""
+        else:
+            held = self._partial_sentinel_length(self._pending)
+            cut = len(self._pending[:len(self._pending) - held].rstrip())
+            visible = self._pending[:cut]
+            self._pending = self._pending[cut:]
+        if visible:
+            self._parts.append(visible)
+        return visible
+    
+    def close(self):
+        """Flush held-back text once the stream has ended"""
+        visible = ""
+        if self._state_text is None:
+            visible = self._pending.rstrip()
+            self._pending = ""
+            if visible:
+                self._parts.append(visible)
+        return visible
+    
+    @property
+    def reply(self):
+        """Visible reply text seen so far"""
+        return "".join(self._parts)
+    
+    @property
+    def state(self):
+        """Parsed state, or None if no valid state line has arrived"""
+        if self._state_text is None:
+            return None
+        return parse_state(self._state_text)
+    
+    @staticmethod
+    def _partial_sentinel_length(text):
+        """Length of the longest suffix of text that starts the sentinel"""
+        for length in range(min(len(SENTINEL) - 1, len(text)), 0, -1):
+            if SENTINEL.startswith(text[-length:]):
+                return length
+        return 0
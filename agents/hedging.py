@@ -0,0 +1,358 @@
+"""
+Hedged model requests for tail-latency control
+
+If a call has not produced its first token within an adaptive threshold
+(recent p95), a duplicate request is sent from a fresh chat session
+started on the same history snapshot. Whichever answers first wins and
+becomes the session's chat; the other is stopped where it can be (see
+HedgedChatSession). Both requests go through the wrapped backend, so
+hedges draw on the shared RequestGuard quota like any other call.
+"""
+import asyncio
+import queue
+import threading
+import time
+from collections import deque
+from config import Config
+from agents.llm_backend import ChatSession, LLMBackend
+from agents.metrics import percentile
+
+
+class LatencyTracker:
+    """
+    Rolling window of first-token latencies for one backend
+    
+    "primary" samples are how long the first request of each call took to
+    its first token, even when a hedge won (the loser keeps running until
+    its first token to measure this). "actual" samples are what callers
+    saw. Comparing the two shows what hedging bought.
+    """
+    
+    def __init__(self, window=None):
+        window = window or Config.HEDGE_WINDOW
+        self.primary = deque(maxlen=window)
+        self.actual = deque(maxlen=window)
+        self.hedge_flags = deque(maxlen=window)
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self._lock = threading.Lock()
+    
+    def record_primary(self, seconds):
+        """Record the first request's time to first token"""
+        with self._lock:
+            self.primary.append(seconds)
+    
+    def record_call(self, seconds, hedged, hedge_won):
+        """Record the latency a caller saw and whether a hedge was sent"""
+        with self._lock:
+            self.actual.append(seconds)
+            self.hedge_flags.append(hedged)
+            self.requests += 1
+            self.hedged += hedged
+            self.hedge_wins += hedge_won
+    
+    def threshold(self):
+        """Seconds to wait before hedging, or None if hedging is paused"""
+        with self._lock:
+            recent_rate = sum(self.hedge_flags) / len(self.hedge_flags) if self.hedge_flags else 0.0
+            if recent_rate >= Config.HEDGE_MAX_RATE:
+                # Hedging adds load; stop before it turns into a retry storm
+                return None
+            if len(self.primary) < Config.HEDGE_MIN_SAMPLES:
+                return Config.HEDGE_INITIAL_DELAY
+            return max(Config.HEDGE_MIN_DELAY, percentile(self.primary, Config.HEDGE_PERCENTILE))
+    
+    def stats(self):
+        """Hedge rate and first-token p99 with and without hedging"""
+        threshold = self.threshold()
+        with self._lock:
+            p99 = percentile(self.actual, 99) if self.actual else None
+            p99_unhedged = percentile(self.primary, 99) if self.primary else None
+            return {
+                "requests": self.requests,
+                "hedged": self.hedged,
+                "hedge_wins": self.hedge_wins,
+                "hedge_rate": round(self.hedged / self.requests, 4) if self.requests else 0.0,
+                "threshold_s": threshold,
+                "first_token_p99_s": p99,
+                "first_token_p99_unhedged_s": p99_unhedged,
+                "p99_improvement_s": (p99_unhedged - p99) if p99 is not None and p99_unhedged is not None else None,
+            }
+
+
+class _Racer:
+    """One in-flight request in a hedged call"""
+    
+    def __init__(self, session, is_primary, start, tracker):
+        self.session = session
+        self.is_primary = is_primary
+        self.start = start
+        self.tracker = tracker
+        self.first_token_at = None
+        self.cancelled = False
+    
+    def mark_first_token(self):
+        """Note the first token; the primary's latency feeds the threshold"""
+        self.first_token_at = time.perf_counter() - self.start
+        if self.is_primary:
+            self.tracker.record_primary(self.first_token_at)
+    
+    def run(self, message, streaming, events):
+        """Run the request on a thread, posting (racer, kind, value) events"""
+        try:
+            if streaming:
+                stream = self.session.stream(message)
+                try:
+                    for text in stream:
+                        if self.first_token_at is None:
+                            self.mark_first_token()
+                        if self.cancelled:
+                            return
+                        events.put((self, "chunk", text))
+                finally:
+                    # Closing the stream ends the underlying request
+                    stream.close()
+                reply = self.session.last_reply
+            else:
+                reply = self.session.send(message)
+                self.mark_first_token()
+                events.put((self, "chunk", reply.text))
+            events.put((self, "done", reply))
+        except Exception as e:
+            events.put((self, "error", e))
+    
+    async def run_async(self, message, streaming, events):
+        """Run the request as a task, posting (racer, kind, value) events"""
+        try:
+            if streaming:
+                stream = self.session.stream_async(message)
+                try:
+                    async for text in stream:
+                        if self.first_token_at is None:
+                            self.mark_first_token()
+                        if self.cancelled:
+                            return
+                        events.put_nowait((self, "chunk", text))
+                finally:
+                    await stream.aclose()
+                reply = self.session.last_reply
+            else:
+                reply = await self.session.send_async(message)
+                self.mark_first_token()
+                events.put_nowait((self, "chunk", reply.text))
+            events.put_nowait((self, "done", reply))
+        except Exception as e:
+            events.put_nowait((self, "error", e))
+
+
+class HedgedChatSession(ChatSession):
+    """
+    Chat session that hedges slow calls with a duplicate request
+    
+    After each call, last_hedge tells whether a hedge was sent and which
+    request won. History always comes from the winning request's session.
+    
+    A losing stream is closed at its next chunk, after its first token has
+    been timed. A blocking send() cannot be interrupted, so in the sync
+    non-streaming path the losing request runs to completion on its
+    thread and still uses quota; async calls cancel the losing task.
+    """
+    
+    def __init__(self, backend, session):
+        # last_reply is read through from the current session
+        self.backend = backend
+        self.session = session
+        self.last_hedge = {"hedged": False, "hedge_won": False}
+    
+    @property
+    def history(self):
+        """Get the conversation history"""
+        return self.session.history
+    
+    @property
+    def last_reply(self):
+        """Last complete reply from the winning session"""
+        return self.session.last_reply
+    
+    def set_history(self, history):
+        """Replace the conversation history"""
+        self.session.set_history(history)
+    
+    def _hedge_session(self, snapshot):
+        """Start a duplicate session on the pre-call history snapshot"""
+        return self.backend.backend.start_chat(snapshot)
+    
+    def _on_first_token(self, racer, racers, hedged):
+        """Pick the winner and tell the other request to stop"""
+        for other in racers:
+            if other is not racer:
+                # The primary still reports its own first-token time
+                other.cancelled = True
+        self.last_hedge = {"hedged": hedged, "hedge_won": not racer.is_primary}
+        self.backend.tracker.record_call(racer.first_token_at, hedged, not racer.is_primary)
+    
+    def _race(self, message, streaming):
+        """Yield the winning request's chunks; threads carry the requests"""
+        tracker = self.backend.tracker
+        snapshot = self.session.history
+        start = time.perf_counter()
+        deadline = start + Config.REQUEST_TIMEOUT
+        hedge_at = tracker.threshold()
+        events = queue.Queue()
+        racers = []
+        winner = None
+        
+        def launch(session, is_primary):
+            racer = _Racer(session, is_primary, start, tracker)
+            racers.append(racer)
+            threading.Thread(target=racer.run, args=(message, streaming, events), daemon=True).start()
+        
+        launch(self.session, True)
+        live = 1
+        try:
+            while True:
+                now = time.perf_counter()
+                wake = deadline
+                if winner is None and hedge_at is not None:
+                    wake = min(wake, start + hedge_at)
+                try:
+                    racer, kind, value = events.get(timeout=max(0.0, wake - now))
+                except queue.Empty:
+                    if winner is None and hedge_at is not None and time.perf_counter() < deadline:
+                        hedge_at = None
+                        launch(self._hedge_session(snapshot), False)
+                        live += 1
+                        continue
+                    raise TimeoutError(f"No response from the model within {Config.REQUEST_TIMEOUT:.0f}s")
+                
+                if winner is None and kind == "chunk":
+                    winner = racer
+                    self._on_first_token(racer, racers, len(racers) > 1)
+                if racer is winner:
+                    # The timeout bounds the leading request's silence, not
+                    # the length of a long reply; losers do not extend it
+                    deadline = time.perf_counter() + Config.REQUEST_TIMEOUT
+                if racer is not winner and winner is not None:
+                    continue
+                if kind == "chunk":
+                    yield value
+                elif kind == "done":
+                    self.session = winner.session
+                    return
+                else:
+                    live -= 1
+                    if winner is not None or live == 0:
+                        raise value
+        finally:
+            # Also reached when the consumer closes the stream early; each
+            # thread closes its own stream at its next chunk
+            for racer in racers:
+                racer.cancelled = True
+    
+    def send(self, message):
+        """Send a message (hedged) and return a ModelReply"""
+        for _ in self._race(message, streaming=False):
+            pass
+        return self.session.last_reply
+    
+    def stream(self, message):
+        """Send a message (hedged) and yield response text chunks"""
+        return self._race(message, streaming=True)
+    
+    async def _race_async(self, message, streaming):
+        """Asynchronously yield the winning request's chunks"""
+        tracker = self.backend.tracker
+        snapshot = self.session.history
+        start = time.perf_counter()
+        deadline = start + Config.REQUEST_TIMEOUT
+        hedge_at = tracker.threshold()
+        events = asyncio.Queue()
+        racers = []
+        tasks = []
+        winner = None
+        
+        def launch(session, is_primary):
+            racer = _Racer(session, is_primary, start, tracker)
+            racers.append(racer)
+            tasks.append(asyncio.ensure_future(racer.run_async(message, streaming, events)))
+        
+        launch(self.session, True)
+        live = 1
+        try:
+            while True:
+                now = time.perf_counter()
+                wake = deadline
+                if winner is None and hedge_at is not None:
+                    wake = min(wake, start + hedge_at)
+                try:
+                    racer, kind, value = await asyncio.wait_for(events.get(), max(0.0, wake - now))
+                except asyncio.TimeoutError:
+                    if winner is None and hedge_at is not None and time.perf_counter() < deadline:
+                        hedge_at = None
+                        launch(self._hedge_session(snapshot), False)
+                        live += 1
+                        continue
+                    raise TimeoutError(f"No response from the model within {Config.REQUEST_TIMEOUT:.0f}s")
+                
+                if winner is None and kind == "chunk":
+                    winner = racer
+                    self._on_first_token(racer, racers, len(racers) > 1)
+                if racer is winner:
+                    # Only the leading request's chunks extend the timeout
+                    deadline = time.perf_counter() + Config.REQUEST_TIMEOUT
+                if racer is not winner and winner is not None:
+                    continue
+                if kind == "chunk":
+                    yield value
+                elif kind == "done":
+                    self.session = winner.session
+                    return
+                else:
+                    live -= 1
+                    if winner is not None or live == 0:
+                        raise value
+        finally:
+            # The losing primary keeps running until its first token is
+            # timed; anything still running after that is cancelled
+            for racer, task in zip(racers, tasks):
+                if racer is winner or racer.first_token_at is not None or not racer.is_primary:
+                    task.cancel()
+                else:
+                    racer.cancelled = True
+    
+    async def send_async(self, message):
+        """Send a message (hedged) and await a ModelReply"""
+        async for _ in self._race_async(message, streaming=False):
+            pass
+        return self.session.last_reply
+    
+    def stream_async(self, message):
+        """Send a message (hedged) and asynchronously yield response text chunks"""
+        return self._race_async(message, streaming=True)
+
+
+class HedgingBackend(LLMBackend):
+    """Backend wrapper that hedges slow calls of every chat session it starts"""
+    
+    def __init__(self, backend, tracker=None):
+        self.backend = backend
+        self.tracker = tracker or LatencyTracker()
+    
+    @property
+    def system_instruction(self):
+        """System instruction of the wrapped backend"""
+        return self.backend.system_instruction
+    
+    @property
+    def model_name(self):
+        """Model of the wrapped backend"""
+        return self.backend.model_name
+    
+    def hedge_stats(self):
+        """Hedge rate and first-token p99 with and without hedging"""
+        return self.tracker.stats()
+    
+    def start_chat(self, history=None):
+        """Start a hedged chat session"""
+        return HedgedChatSession(self, self.backend.start_chat(history))
@@ -1,105 +1,528 @@
-"""
-Main interview agent logic
-"""
-import google.generativeai as genai
-from config import Config
-from agents.prompt_manager import PromptManager
-
-class InterviewAgent:
-    """AI-powered interview practice agent"""
-    
-    def __init__(self):
-        """Initialize the interview agent"""
-        # Validate configuration
-        Config.validate()
-        
-        # Configure Gemini API
-        genai.configure(api_key=Config.GEMINI_API_KEY)
-        
-        # Initialize model and chat
-        self.model = genai.GenerativeModel(Config.GEMINI_MODEL)
-        self.chat = self.model.start_chat(history=[])
-        
-        # Initialize state
-        self.role = None
-        self.questions_asked = 0
-        self.stage = "introduction"
-        self.conversation_log = []
-        self.prompt_manager = PromptManager()
-    
-    def get_current_prompt(self):
-        """Get prompt based on current stage"""
-        if self.stage == "introduction":
-            return self.prompt_manager.get_introduction_prompt()
-        
-        elif self.stage == "interviewing":
-            return self.prompt_manager.get_interviewing_prompt(
-                self.role,
-                self.questions_asked + 1,
-                Config.MAX_QUESTIONS
-            )
-        
-        elif self.stage == "feedback":
-            return self.prompt_manager.get_feedback_prompt()
-    
-    def send_message(self, user_input):
-        """Send message to agent and get response"""
-        # Log user message
-        self.conversation_log.append({
-            "role": "user",
-            "content": user_input,
-            "stage": self.stage
-        })
-        
-        # Prepare contextualized message
-        system_context = self.get_current_prompt()
-        full_message = f"{system_context}\n\nCandidate's response: {user_input}"
-        
-        try:
-            # Send to Gemini
-            response = self.chat.send_message(full_message)
-            bot_response = response.text
-            
-            # Log bot response
-            self.conversation_log.append({
-                "role": "assistant",
-                "content": bot_response,
-                "stage": self.stage
-            })
-            
-            # Update state
-            self.update_state(user_input, bot_response)
-            
-            return bot_response
-            
-        except Exception as e:
-            error_msg = f"Sorry, I encountered an error: {str(e)}"
-            return error_msg
-    
-    def update_state(self, user_msg, bot_response):
-        """Update conversation state"""
-        # Detect role from introduction
-        if self.stage == "introduction" and not self.role:
-            user_lower = user_msg.lower()
-            if any(keyword in user_lower for keyword in Config.JOB_KEYWORDS):
-                self.role = user_msg.strip()
-                self.stage = "interviewing"
-        
-        # Track questions during interview
-        elif self.stage == "interviewing":
-            if "?" in bot_response:
-                self.questions_asked += 1
-            
-            # Transition to feedback
-            if self.questions_asked >= Config.MAX_QUESTIONS or "feedback" in bot_response.lower():
-                self.stage = "feedback"
-    
-    def get_progress(self):
-        """Get interview progress as percentage"""
-        if self.stage == "interviewing":
-            return self.questions_asked / Config.MAX_QUESTIONS
-        return 0.0
-    
-    def is_complete(self):
-        """Check if interview is complete"""
-        return self.stage == "feedback" and len(self.conversation_log) > 12
\ No newline at end of file
+"""
+Main interview agent logic
+"""
+import os
+import time
+from config import Config
+from agents.prompt_manager import PromptManager
+from agents.envelope import EnvelopeStream, parse_question_plan, split_envelope
+from agents.role_taxonomy import RoleMatcher
+from agents.answer_scorer import AnswerScorer, aggregate_scores
+from agents.metrics import SessionMetrics, JsonlExporter
+from agents.transcript import Transcript
+from agents.model_registry import ModelRegistry
+from agents.response_cache import ResponseCache
+
+class InterviewAgent:
+    """AI-powered interview practice agent"""
+    
+    scorer_class = AnswerScorer
+    
+    def __init__(self, backend=None, cache=None, profile=False):
+        """
+        Initialize the interview agent
+        
+        Args:
+            backend: LLMBackend to talk to for every stage (defaults to
+                the shared Gemini backends from ModelRegistry, one per
+                stage as configured in Config.STAGE_MODELS)
+            cache: ResponseCache for deterministic turns (defaults to the
+                shared cache when Config.RESPONSE_CACHE_ENABLED)
+            profile: Run every turn under cProfile (see metrics.profile_report)
+        """
+        self.stage_backends = None
+        if backend is None:
+            system_instruction = PromptManager.get_system_instruction(
+                Config.MAX_QUESTIONS, Config.STRUCTURED_STATE
+            )
+            self.stage_backends = {
+                stage: ModelRegistry.get_stage_backend(stage, system_instruction)
+                for stage in ("introduction", "interviewing", "feedback")
+            }
+            backend = self.stage_backends["introduction"]
+        
+        # Initialize backend and chat
+        self.backend = backend
+        self.chat = self.backend.start_chat()
+        
+        if cache is None and Config.RESPONSE_CACHE_ENABLED:
+            cache = ResponseCache.shared()
+        self.cache = cache
+        
+        # Initialize state
+        self.role = None
+        self.questions_asked = 0
+        self.stage = "introduction"
+        self.conversation_log = Transcript(spool=Config.TRANSCRIPT_SPOOL)
+        self.last_error = None
+        self.history_summary = ""
+        self.question_plan = None
+        self._planned_question = None
+        self._feedback_scores = None
+        self.prompt_manager = PromptManager()
+        self.role_matcher = RoleMatcher.default()
+        self.metrics = SessionMetrics(profile=profile or Config.PROFILE_SESSIONS)
+        if Config.METRICS_PATH:
+            self.metrics.hooks.append(JsonlExporter(Config.METRICS_PATH))
+        self.scorer = None
+        if Config.BACKGROUND_SCORING:
+            scoring_backend = self.stage_backends["interviewing"] if self.stage_backends else self.backend
+            self.scorer = self.scorer_class(scoring_backend, on_reply=self.metrics.record_background_call)
+    
+    def get_current_prompt(self):
+        """Get prompt based on current stage"""
+        if self.stage == "introduction":
+            return self.prompt_manager.get_introduction_prompt()
+        
+        elif self.stage == "interviewing":
+            return self.prompt_manager.get_interviewing_prompt(
+                self.role,
+                self.questions_asked + 1,
+                Config.MAX_QUESTIONS,
+                self._planned_question
+            )
+        
+        elif self.stage == "feedback":
+            scores = self._feedback_scores
+            return self.prompt_manager.get_feedback_prompt(scores, scores and aggregate_scores(scores))
+    
+    CANDIDATE_PREFIX = "Candidate's response: "
+    
+    def _build_message(self, user_input):
+        """Combine the current stage note with the candidate's text"""
+        stage_note = self.get_current_prompt()
+        return f"{stage_note}\n\n{self.CANDIDATE_PREFIX}{user_input}"
+    
+    def _log_message(self, role, content):
+        """Append a message to the conversation log"""
+        self.conversation_log.append(role, content, self.stage)
+    
+    def _lookup_cache(self, user_input, cacheable):
+        """
+        Look up a cacheable turn
+        
+        Returns:
+            tuple: (cache key or None, cached reply or None)
+        """
+        if not cacheable or self.cache is None:
+            return None, None
+        key = self.cache.make_key(self.get_current_prompt(), self.role, user_input)
+        return key, self.cache.get(key)
+    
+    def _record_exchange(self, full_message, bot_response):
+        """Add an exchange served from cache to the chat history"""
+        self.chat.set_history(self.chat.history + [
+            {"role": "user", "text": full_message},
+            {"role": "model", "text": bot_response}
+        ])
+    
+    def _open_turn(self, user_input):
+        """Log the user message, start timing and queue answer scoring"""
+        # Score the answer to the last question while the interview continues
+        if self.scorer is not None and self.stage != "introduction" and self.questions_asked > len(self.scorer):
+            question = self.conversation_log[-1].content
+            self.scorer.submit(self.role, question, user_input, self._question_type(len(self.scorer)))
+        
+        # Log user message
+        self._log_message("user", user_input)
+        self.last_error = None
+        self._planned_question = None
+        
+        # With planning, detect the role before the call so this turn can
+        # already ask the first planned question. Only a clearly named role
+        # is taken here; otherwise the model's state line decides it.
+        if Config.QUESTION_PLANNING and self.stage == "introduction" and not self.role:
+            role = self.role_matcher.match(user_input, confident=True)
+            if role:
+                self._set_role(role, user_input)
+        
+        self._route_chat()
+        self.metrics.begin_turn(self.stage, self.questions_asked + 1, self.backend.model_name)
+    
+    def _route_chat(self):
+        """Move the chat to the current stage's model, carrying the history over"""
+        if not self.stage_backends:
+            return
+        backend = self.stage_backends[self.stage]
+        if backend is not self.backend:
+            self.backend = backend
+            self.chat = backend.start_chat(self.chat.history)
+    
+    def _start_turn(self, user_input):
+        """Log the user message, start timing and build the model message"""
+        self._open_turn(user_input)
+        if self._needs_plan():
+            self.plan_questions()
+        self._planned_question = self._next_planned_question()
+        if self.stage == "feedback" and self.scorer is not None:
+            # Answers not scored yet are assessed by the feedback turn itself
+            self._feedback_scores = self.scorer.collect()
+        
+        # Prepare contextualized message
+        return self._build_message(user_input)
+    
+    def _needs_plan(self):
+        """True once the role is known and no plan has been made yet"""
+        return Config.QUESTION_PLANNING and self.stage == "interviewing" and self.question_plan is None
+    
+    def _store_plan(self, reply):
+        """Keep the parsed plan and count the planning call's tokens"""
+        self.metrics.record_extra_call(reply)
+        self.question_plan = parse_question_plan(reply.text, Config.MAX_QUESTIONS)
+    
+    def plan_questions(self):
+        """
+        Plan every primary question for the session in one model call
+        
+        Runs once, as soon as the role is known. Each later turn only asks
+        the model for a short follow-up and appends the next planned
+        question, so progress is counted exactly.
+        
+        Returns:
+            list: The planned {"type", "question"} dicts
+        """
+        prompt = self.prompt_manager.get_question_plan_prompt(self.role, Config.MAX_QUESTIONS)
+        try:
+            self._store_plan(self.backend.start_chat().send(prompt))
+        except Exception:
+            # Fall back to making up each question turn by turn
+            self.question_plan = []
+        return self.question_plan
+    
+    def _next_planned_question(self):
+        """The planned question this turn should ask, if any"""
+        if self.stage != "interviewing" or not self.question_plan:
+            return None
+        if self.questions_asked < len(self.question_plan):
+            return self.question_plan[self.questions_asked]
+        return None
+    
+    def _question_type(self, index):
+        """Type of the planned question at index, if it came from the plan"""
+        if self.question_plan and index < len(self.question_plan):
+            return self.question_plan[index]["type"]
+        return None
+    
+    def _planned_suffix(self):
+        """Planned question text appended to this turn's reply"""
+        if self._planned_question is None:
+            return ""
+        return f"\n\n{self._planned_question['question']}"
+    
+    def _discard_failed_turn(self, error):
+        """Drop the unanswered user message after a failed model call"""
+        if self.conversation_log and self.conversation_log[-1].role == "user":
+            self.conversation_log.pop()
+        self.last_error = str(error)
+        self.metrics.end_turn(error=self.last_error)
+    
+    def send_message(self, user_input, cacheable=False):
+        """
+        Send message to agent and get response
+        
+        Args:
+            user_input: The candidate's message
+            cacheable: True if the turn is deterministic (e.g. the fixed
+                greeting) and may be served from the response cache
+        """
+        full_message = self._start_turn(user_input)
+        
+        # Serve deterministic turns from cache
+        cache_key, bot_response = self._lookup_cache(user_input, cacheable)
+        if bot_response is not None:
+            self._record_exchange(full_message, bot_response)
+            self._finish_turn(user_input, bot_response, cached=True)
+            return bot_response
+        
+        try:
+            # Send to the model
+            reply = self.chat.send(full_message)
+            bot_response, state = split_envelope(reply.text)
+            bot_response += self._planned_suffix()
+            if cache_key:
+                self.cache.put(cache_key, bot_response)
+            
+            self._finish_turn(user_input, bot_response, reply, state)
+            
+            return bot_response
+        
+        except Exception as e:
+            self._discard_failed_turn(e)
+            error_msg = f"Sorry, I encountered an error: {str(e)}"
+            return error_msg
+    
+    def send_message_stream(self, user_input, cacheable=False):
+        """
+        Send message to agent and stream the response as it is generated
+        
+        State is updated once the stream has been fully consumed.
+        
+        Args:
+            user_input: The candidate's message
+            cacheable: True if the turn may be served from the response cache
+        
+        Yields:
+            str: Chunks of the interviewer's response text
+        """
+        full_message = self._start_turn(user_input)
+        
+        # Serve deterministic turns from cache
+        cache_key, bot_response = self._lookup_cache(user_input, cacheable)
+        if bot_response is not None:
+            self._record_exchange(full_message, bot_response)
+            self.metrics.mark_first_token()
+            yield bot_response
+            self._finish_turn(user_input, bot_response, cached=True)
+            return
+        
+        envelope = EnvelopeStream()
+        started = False
+        try:
+            # Send to the model and relay chunks as they arrive, minus the state line
+            for text in self.chat.stream(full_message):
+                if not started:
+                    self.metrics.mark_first_token()
+                    started = True
+                visible = envelope.feed(text)
+                if visible:
+                    yield visible
+        
+        except Exception as e:
+            self._discard_failed_turn(e)
+            yield f"Sorry, I encountered an error: {str(e)}"
+            return
+        
+        tail = envelope.close() + self._planned_suffix()
+        if tail:
+            yield tail
+        bot_response = envelope.reply + self._planned_suffix()
+        if cache_key:
+            self.cache.put(cache_key, bot_response)
+        
+        self._finish_turn(user_input, bot_response, self.chat.last_reply, envelope.state)
+    
+    def _finish_turn(self, user_input, bot_response, reply=None, state=None, cached=False):
+        """Log the reply, advance the stage machine and bound the history"""
+        # Log bot response
+        self._log_message("assistant", bot_response)
+        
+        # Update state
+        start = time.perf_counter()
+        self.update_state(user_input, bot_response, state)
+        self.metrics.record_state_update(time.perf_counter() - start, self.stage)
+        
+        # Keep the context sent to the model within budget
+        self.compact_history()
+        
+        # Set by HedgedChatSession when hedging is enabled
+        last_hedge = getattr(self.chat, "last_hedge", None)
+        if last_hedge and not cached:
+            self.metrics.record_hedge(last_hedge["hedged"])
+        self.metrics.end_turn(reply, cached=cached)
+    
+    @staticmethod
+    def _estimate_tokens(text):
+        """Rough token count (about 4 characters per token)"""
+        return len(text) // 4 + 1
+    
+    @staticmethod
+    def _clip(text, limit):
+        """Shorten text to at most limit characters on a word boundary"""
+        text = " ".join(text.split())
+        if len(text) <= limit:
+            return text
+        return text[:limit].rsplit(" ", 1)[0] + "..."
+    
+    def compact_history(self):
+        """
+        Fold older exchanges into a running summary once the chat history
+        exceeds Config.HISTORY_TOKEN_BUDGET
+        
+        The most recent Config.HISTORY_KEEP_EXCHANGES exchanges are kept
+        verbatim so follow-up questions still see the candidate's answer.
+        
+        Returns:
+            bool: True if the history was compacted
+        """
+        history = self.chat.history
+        if sum(self._estimate_tokens(turn["text"]) for turn in history) <= Config.HISTORY_TOKEN_BUDGET:
+            return False
+        
+        # Skip the summary exchange left by a previous compaction
+        start = 2 if self.history_summary else 0
+        keep = Config.HISTORY_KEEP_EXCHANGES * 2
+        older = history[start:len(history) - keep]
+        if not older:
+            return False
+        
+        lines = self.history_summary.split("\n") if self.history_summary else []
+        for turn in older:
+            if turn["role"] == "user":
+                answer = turn["text"].rsplit(self.CANDIDATE_PREFIX, 1)[-1]
+                lines.append(f"- Candidate: {self._clip(answer, Config.SUMMARY_ANSWER_CHARS)}")
+            else:
+                question = split_envelope(turn["text"])[0]
+                lines.append(f"- Interviewer: {self._clip(question, Config.SUMMARY_ANSWER_CHARS)}")
+        
+        # Tighten every line until the summary itself fits its budget
+        limit = Config.SUMMARY_ANSWER_CHARS
+        while self._estimate_tokens("\n".join(lines)) > Config.SUMMARY_TOKEN_BUDGET and limit > 40:
+            limit //= 2
+            lines = [self._clip(line, limit) for line in lines]
+        self.history_summary = "\n".join(lines)
+        
+        summary_exchange = [
+            {"role": "user", "text": self.prompt_manager.get_history_summary_prompt(self.history_summary)},
+            {"role": "model", "text": "Understood. I'll continue the interview from here."}
+        ]
+        self.chat.set_history(summary_exchange + history[len(history) - keep:])
+        return True
+    
+    def update_state(self, user_msg, bot_response, state=None):
+        """
+        Update conversation state
+        
+        Uses the state line the model sent with its reply when there is
+        one; otherwise falls back to the local role matcher and text
+        heuristics. Turns that the old keyword/"?" heuristics would have
+        wasted are counted in metrics.turns_saved.
+        
+        Args:
+            user_msg: The candidate's message
+            bot_response: The interviewer's visible reply
+            state: Parsed state line from agents.envelope, if any
+        """
+        # Detect role from introduction
+        if self.stage == "introduction" and not self.role:
+            # The model's role comes first; the matcher covers replies
+            # without a state line or with a null role
+            role = (state and state["role"]) or self.role_matcher.match(user_msg)
+            if role:
+                self._set_role(role, user_msg)
+                if state and state["is_question"]:
+                    # The first question came with this reply; the old
+                    # heuristics never counted it and asked one extra
+                    self.questions_asked += 1
+                    self.metrics.record_turns_saved()
+        
+        # Track questions during interview
+        elif self.stage == "interviewing":
+            if self._planned_question is not None:
+                # The planned question was appended by the agent itself
+                is_question = True
+                ready_for_feedback = False
+            elif state is not None:
+                is_question = state["is_question"]
+                ready_for_feedback = state["ready_for_feedback"]
+                if is_question and "?" not in bot_response:
+                    # Counting "?" would have missed this question
+                    self.metrics.record_turns_saved()
+            else:
+                is_question = "?" in bot_response
+                ready_for_feedback = PromptManager.WRAP_UP_PHRASE.lower() in bot_response.lower()
+            
+            if is_question:
+                self.questions_asked += 1
+            
+            # Transition to feedback
+            if self.questions_asked >= Config.MAX_QUESTIONS or ready_for_feedback:
+                self.stage = "feedback"
+    
+    def _set_role(self, role, user_msg):
+        """Record the candidate's role and start interviewing"""
+        self.role = role
+        self.stage = "interviewing"
+        if not any(keyword in user_msg.lower() for keyword in Config.JOB_KEYWORDS):
+            # The keyword check would have asked for the role again
+            self.metrics.record_turns_saved()
+    
+    def get_progress(self):
+        """Get interview progress as percentage"""
+        if self.stage == "interviewing":
+            return self.questions_asked / Config.MAX_QUESTIONS
+        return 0.0
+    
+    def is_complete(self):
+        """Check if interview is complete"""
+        return self.stage == "feedback" and len(self.conversation_log) > 12
+    
+    STATE_FORMAT = 1
+    
+    def to_dict(self):
+        """
+        Serialize the session for a SessionStore
+        
+        Covers everything needed to continue the interview in another
+        process: stage, role, progress, question plan, answer scores, the
+        transcript and the chat history. Metrics stay with the worker that
+        recorded them.
+        
+        Returns:
+            dict: JSON-serializable agent state
+        """
+        return {
+            "format": self.STATE_FORMAT,
+            "session_id": self.metrics.session_id,
+            "stage": self.stage,
+            "role": self.role,
+            "questions_asked": self.questions_asked,
+            "history_summary": self.history_summary,
+            "question_plan": self.question_plan,
+            "last_error": self.last_error,
+            "scores": self.scorer.to_list() if self.scorer is not None else [],
+            "log": list(self.conversation_log.iter_records()),
+            "history": self.chat.history,
+        }
+    
+    @classmethod
+    def from_dict(cls, data, backend=None, cache=None):
+        """
+        Rehydrate an agent from to_dict() output
+        
+        Args:
+            data: Dict written by to_dict
+            backend: LLMBackend to use (defaults as in __init__)
+            cache: ResponseCache to use (defaults as in __init__)
+        
+        Returns:
+            InterviewAgent: An agent that continues where the saved one stopped
+        """
+        if data.get("format") != cls.STATE_FORMAT:
+            raise ValueError(f"Unsupported agent state format: {data.get('format')}")
+        agent = cls(backend=backend, cache=cache)
+        agent.metrics.session_id = data["session_id"]
+        agent.stage = data["stage"]
+        agent.role = data["role"]
+        agent.questions_asked = data["questions_asked"]
+        agent.history_summary = data["history_summary"]
+        agent.question_plan = data["question_plan"]
+        agent.last_error = data["last_error"]
+        if agent.scorer is not None:
+            agent.scorer.restore(data["scores"])
+        agent.conversation_log.extend(data["log"])
+        agent.chat.set_history(data["history"])
+        return agent
+    
+    def save_transcript(self, path=None, fmt="jsonl"):
+        """
+        Save the interview transcript
+        
+        The JSONL transcript is already on disk, so saving it just moves
+        the file into place; other formats are streamed from it.
+        
+        Args:
+            path: Destination path (defaults to Config.TRANSCRIPT_DIR)
+            fmt: "jsonl", "json", "markdown" or "text"
+        
+        Returns:
+            str: Path of the saved transcript
+        """
+        if fmt == "jsonl":
+            return self.conversation_log.save(path)
+        if path is None:
+            extension = {"markdown": "md", "text": "txt"}.get(fmt, fmt)
+            path = os.path.join(
+                Config.TRANSCRIPT_DIR,
+                f"transcript_{time.strftime('%Y%m%d_%H%M%S')}.{extension}"
+            )
+        return self.conversation_log.export(path, fmt)
\ No newline at end of file
@@ -0,0 +1,343 @@
+"""
+Pluggable LLM backends for the interview agent
+"""
+import asyncio
+import json
+import threading
+import time
+from config import Config
+from agents.envelope import format_state
+from agents.prompt_manager import PromptManager
+
+class ModelReply:
+    """A complete model response with its token usage"""
+    
+    def __init__(self, text, prompt_tokens=0, completion_tokens=0):
+        self.text = text
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+
+
+class ChatSession:
+    """
+    A multi-turn conversation with a model
+    
+    History is a list of {"role": "user" | "model", "text": str} dicts.
+    After a streamed call has been fully consumed, last_reply holds the
+    complete ModelReply.
+    """
+    
+    def __init__(self):
+        self.last_reply = None
+    
+    @property
+    def history(self):
+        """Get the conversation history"""
+        raise NotImplementedError
+    
+    def set_history(self, history):
+        """Replace the conversation history, e.g. after compaction"""
+        raise NotImplementedError
+    
+    def send(self, message):
+        """Send a message and return a ModelReply"""
+        raise NotImplementedError
+    
+    def stream(self, message):
+        """Send a message and yield response text chunks"""
+        raise NotImplementedError
+    
+    async def send_async(self, message):
+        """Send a message and await a ModelReply"""
+        raise NotImplementedError
+    
+    async def stream_async(self, message):
+        """Send a message and asynchronously yield response text chunks"""
+        raise NotImplementedError
+
+
+class LLMBackend:
+    """Interface the interview agent uses to talk to a model"""
+    
+    system_instruction = None
+    model_name = None
+    
+    def start_chat(self, history=None):
+        """
+        Start a chat session
+        
+        Args:
+            history: Optional list of {"role", "text"} dicts to resume from
+        
+        Returns:
+            ChatSession: A new chat session
+        """
+        raise NotImplementedError
+
+
+class GeminiChatSession(ChatSession):
+    """Chat session backed by a google.generativeai ChatSession"""
+    
+    def __init__(self, chat):
+        super().__init__()
+        self.chat = chat
+        # Without a deadline a stalled call blocks its turn indefinitely
+        self.request_options = {"timeout": Config.REQUEST_TIMEOUT}
+    
+    @property
+    def history(self):
+        """Get the conversation history"""
+        return [
+            {"role": content.role, "text": "".join(part.text for part in content.parts)}
+            for content in self.chat.history
+        ]
+    
+    @staticmethod
+    def _to_gemini_history(history):
+        """Convert {"role", "text"} dicts into Gemini content dicts"""
+        return [{"role": turn["role"], "parts": [turn["text"]]} for turn in history]
+    
+    def set_history(self, history):
+        """Replace the conversation history, e.g. after compaction"""
+        self.chat.history = self._to_gemini_history(history)
+    
+    @staticmethod
+    def _to_reply(response):
+        """Convert a Gemini response into a ModelReply"""
+        usage = getattr(response, "usage_metadata", None)
+        return ModelReply(
+            response.text,
+            prompt_tokens=getattr(usage, "prompt_token_count", 0) or 0,
+            completion_tokens=getattr(usage, "candidates_token_count", 0) or 0
+        )
+    
+    def send(self, message):
+        """Send a message and return a ModelReply"""
+        self.last_reply = self._to_reply(self.chat.send_message(message, request_options=self.request_options))
+        return self.last_reply
+    
+    def stream(self, message):
+        """Send a message and yield response text chunks"""
+        response = self.chat.send_message(message, stream=True, request_options=self.request_options)
+        for chunk in response:
+            if chunk.text:
+                yield chunk.text
+        self.last_reply = self._to_reply(response)
+    
+    async def send_async(self, message):
+        """Send a message and await a ModelReply"""
+        self.last_reply = self._to_reply(await self.chat.send_message_async(message, request_options=self.request_options))
+        return self.last_reply
+    
+    async def stream_async(self, message):
+        """Send a message and asynchronously yield response text chunks"""
+        response = await self.chat.send_message_async(message, stream=True, request_options=self.request_options)
+        async for chunk in response:
+            if chunk.text:
+                yield chunk.text
+        self.last_reply = self._to_reply(response)
+
+
+class GeminiBackend(LLMBackend):
+    """Backend using the Google Gemini API"""
+    
+    # genai.configure replaces the process-wide client (and its HTTP
+    # connections), so only call it when the API key changes
+    _configured_key = None
+    _configure_lock = threading.Lock()
+    
+    @classmethod
+    def configure(cls, genai):
+        """Configure the Gemini API once per process"""
+        with cls._configure_lock:
+            if cls._configured_key != Config.GEMINI_API_KEY:
+                genai.configure(api_key=Config.GEMINI_API_KEY)
+                cls._configured_key = Config.GEMINI_API_KEY
+    
+    def __init__(self, model_name=None, system_instruction=None, generation_config=None):
+        """
+        Configure the Gemini client and model
+        
+        Args:
+            model_name: Gemini model to use (defaults to Config.GEMINI_MODEL)
+            system_instruction: Static instructions applied to every turn
+            generation_config: Optional dict, e.g. max_output_tokens and temperature
+        """
+        import google.generativeai as genai
+        
+        # Validate configuration
+        Config.validate()
+        
+        # Configure Gemini API
+        self.configure(genai)
+        self.system_instruction = system_instruction
+        self.model_name = model_name or Config.GEMINI_MODEL
+        self.model = genai.GenerativeModel(
+            self.model_name,
+            system_instruction=system_instruction,
+            generation_config=generation_config
+        )
+    
+    def start_chat(self, history=None):
+        """Start a Gemini chat session"""
+        gemini_history = GeminiChatSession._to_gemini_history(history or [])
+        return GeminiChatSession(self.model.start_chat(history=gemini_history))
+
+
+class StubChatSession(ChatSession):
+    """Chat session that replays a script with simulated timing"""
+    
+    def __init__(self, backend, history):
+        super().__init__()
+        self.backend = backend
+        self._history = list(history)
+        self.turn = sum(1 for turn in self._history if turn["role"] == "model")
+    
+    @property
+    def history(self):
+        """Get the conversation history"""
+        return list(self._history)
+    
+    def set_history(self, history):
+        """Replace the conversation history, e.g. after compaction"""
+        self._history = list(history)
+    
+    def _next_reply(self, message):
+        """Pick the next scripted reply and record the exchange"""
+        if PromptManager.QUESTION_PLAN_TAG in message:
+            text = self.backend.plan
+        elif PromptManager.ANSWER_SCORE_TAG in message:
+            text = self.backend.answer_score
+        else:
+            script = self.backend.script
+            text = script[min(self.turn, len(script) - 1)]
+            self.turn += 1
+        self._history.append({"role": "user", "text": message})
+        self._history.append({"role": "model", "text": text})
+        prompt_tokens = sum(len(turn["text"].split()) for turn in self._history[:-1])
+        prompt_tokens += len((self.backend.system_instruction or "").split())
+        return ModelReply(text, prompt_tokens, len(text.split()))
+    
+    def _chunks(self, text):
+        """Split reply text into word-sized chunks"""
+        words = text.split(" ")
+        return [word + " " for word in words[:-1]] + words[-1:]
+    
+    def send(self, message):
+        """Send a message and return a ModelReply"""
+        reply = self._next_reply(message)
+        time.sleep(self.backend.latency + self.backend.generation_time(reply.text))
+        self.last_reply = reply
+        return reply
+    
+    def stream(self, message):
+        """Send a message and yield response text chunks"""
+        reply = self._next_reply(message)
+        time.sleep(self.backend.latency)
+        for chunk in self._chunks(reply.text):
+            time.sleep(self.backend.generation_time(chunk))
+            yield chunk
+        self.last_reply = reply
+    
+    async def send_async(self, message):
+        """Send a message and await a ModelReply"""
+        reply = self._next_reply(message)
+        await asyncio.sleep(self.backend.latency + self.backend.generation_time(reply.text))
+        self.last_reply = reply
+        return reply
+    
+    async def stream_async(self, message):
+        """Send a message and asynchronously yield response text chunks"""
+        reply = self._next_reply(message)
+        await asyncio.sleep(self.backend.latency)
+        for chunk in self._chunks(reply.text):
+            await asyncio.sleep(self.backend.generation_time(chunk))
+            yield chunk
+        self.last_reply = reply
+
+
+class StubBackend(LLMBackend):
+    """
+    Deterministic local backend for offline runs and load tests
+    
+    Replies are taken from a script in order, repeating the last entry
+    once the script is exhausted; question planning requests get `plan`
+    and answer scoring requests get `answer_score`. Each reply waits `latency` seconds
+    before the first token and then emits `tokens_per_second` words per
+    second (0 means instant).
+    """
+    
+    model_name = "stub"
+    
+    def __init__(self, latency=0.0, tokens_per_second=0, script=None, system_instruction=None, plan=None):
+        self.system_instruction = system_instruction
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.script = script or self.default_script()
+        self.plan = plan or self.default_plan()
+        self.answer_score = json.dumps({
+            "communication": 8, "answer_quality": 7, "technical_knowledge": 7,
+            "strengths": "Clear structure with a concrete example.",
+            "improvement": "Quantify the impact of your work."
+        })
+    
+    @staticmethod
+    def default_script():
+        """
+        Build a greeting, question and feedback script for a full session
+        
+        With Config.STRUCTURED_STATE each reply carries a state line, and
+        the question asked with the role reply counts, so one fewer
+        question is needed. With Config.QUESTION_PLANNING the replies are
+        short follow-ups; the agent appends the planned questions.
+        """
+        structured = Config.STRUCTURED_STATE
+        
+        def with_state(text, **state):
+            return f"{text}\n{format_state(**state)}" if structured else text
+        
+        script = [with_state("Hi! I'm excited to help you practice. What position are you preparing for?")]
+        if Config.QUESTION_PLANNING:
+            for _ in range(Config.MAX_QUESTIONS):
+                script.append(with_state("Thanks for sharing, that's a clear and well-structured answer."))
+        else:
+            question_count = Config.MAX_QUESTIONS if structured else Config.MAX_QUESTIONS + 1
+            for number in range(1, question_count + 1):
+                script.append(with_state(
+                    f"Thanks for sharing. Question {number}: can you tell me about a time "
+                    f"you solved a difficult problem in this role, and what you learned?",
+                    is_question=True
+                ))
+        script.append(with_state(
+            "Here is your evaluation.\n\n"
+            "1. **Communication Skills (Score: 8/10)** - Clear and confident.\n"
+            "2. **Answer Quality (Score: 7/10)** - Good examples, add more metrics.\n"
+            "3. **Technical Knowledge** - Solid fundamentals.\n"
+            "4. **Areas for Improvement** - Use the STAR method consistently.\n"
+            "5. **Strengths** - Professional tone throughout.\n\n"
+            "Keep practicing, you're doing great!"
+        ))
+        return script
+    
+    @staticmethod
+    def default_plan():
+        """Build a question plan reply for Config.MAX_QUESTIONS questions"""
+        types = ("technical", "behavioral", "situational")
+        return json.dumps({"questions": [
+            {
+                "type": types[number % len(types)],
+                "question": f"Question {number + 1}: can you tell me about a time you solved "
+                            f"a difficult problem in this role, and what you learned?"
+            }
+            for number in range(Config.MAX_QUESTIONS)
+        ]})
+    
+    def generation_time(self, text):
+        """Simulated time to generate the given text"""
+        if not self.tokens_per_second:
+            return 0.0
+        return len(text.split()) / self.tokens_per_second
+    
+    def start_chat(self, history=None):
+        """Start a scripted chat session"""
+        return StubChatSession(self, history or [])
@@ -0,0 +1,323 @@
+"""
+Per-turn performance instrumentation for interview sessions
+"""
+import io
+import json
+import math
+import threading
+import time
+import uuid
+
+class TurnMetrics:
+    """Timings and token usage for a single turn"""
+    
+    __slots__ = (
+        "session_id", "turn", "stage", "question_number", "started_at",
+        "wall_time", "time_to_first_token", "state_update_time",
+        "prompt_tokens", "completion_tokens", "cached", "hedged", "error", "model"
+    )
+    
+    def __init__(self, session_id, turn, stage, question_number, model=None):
+        self.session_id = session_id
+        self.turn = turn
+        self.stage = stage
+        self.question_number = question_number
+        self.model = model
+        self.started_at = time.time()
+        self.wall_time = None
+        self.time_to_first_token = None
+        self.state_update_time = None
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cached = False
+        self.hedged = False
+        self.error = None
+    
+    def to_dict(self):
+        """Convert to a JSON-serializable dict"""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class SessionMetrics:
+    """
+    Collects TurnMetrics and time spent per stage for one agent
+    
+    Hooks are callables invoked with each completed TurnMetrics, e.g. to
+    forward spans to a tracing system. With profile=True every turn runs
+    under cProfile; see profile_report().
+    """
+    
+    def __init__(self, session_id=None, profile=False):
+        self.session_id = session_id or uuid.uuid4().hex
+        self.turns = []
+        self.stage_times = {}
+        self.hooks = []
+        self.turns_saved = 0
+        self.background_prompt_tokens = 0
+        self.background_completion_tokens = 0
+        self._background_lock = threading.Lock()
+        self.profiler = None
+        if profile:
+            self.enable_profiling()
+        self._stage = None
+        self._stage_entered = time.perf_counter()
+        self._current = None
+        self._turn_start = 0.0
+    
+    def enable_profiling(self):
+        """Switch on cProfile for the rest of this session"""
+        if self.profiler is None:
+            import cProfile
+            self.profiler = cProfile.Profile()
+    
+    def begin_turn(self, stage, question_number, model=None):
+        """Start timing a turn"""
+        if self._stage is None:
+            self._stage = stage
+        self._current = TurnMetrics(self.session_id, len(self.turns) + 1, stage, question_number, model)
+        self._turn_start = time.perf_counter()
+        if self.profiler:
+            self.profiler.enable()
+    
+    def mark_first_token(self):
+        """Record time-to-first-token for the current turn (first call wins)"""
+        turn = self._current
+        if turn is not None and turn.time_to_first_token is None:
+            turn.time_to_first_token = time.perf_counter() - self._turn_start
+    
+    def record_hedge(self, hedged):
+        """Record whether the current turn's model call was hedged"""
+        if self._current is not None:
+            self._current.hedged = hedged
+    
+    def record_extra_call(self, reply):
+        """Add token usage of an extra model call (e.g. planning) to the current turn"""
+        if self._current is not None and reply is not None:
+            self._current.prompt_tokens += reply.prompt_tokens
+            self._current.completion_tokens += reply.completion_tokens
+    
+    def record_background_call(self, reply):
+        """Count token usage of a background call (e.g. answer scoring); thread-safe"""
+        with self._background_lock:
+            self.background_prompt_tokens += reply.prompt_tokens
+            self.background_completion_tokens += reply.completion_tokens
+    
+    def record_state_update(self, seconds, stage):
+        """Record how long update_state took and track stage changes"""
+        if self._current is not None:
+            self._current.state_update_time = seconds
+        if stage != self._stage:
+            now = time.perf_counter()
+            self.stage_times[self._stage] = self.stage_times.get(self._stage, 0.0) + now - self._stage_entered
+            self._stage = stage
+            self._stage_entered = now
+    
+    def end_turn(self, reply=None, cached=False, error=None):
+        """
+        Finish timing the current turn
+        
+        Args:
+            reply: ModelReply with token usage, if the model was called
+            cached: True if the reply came from the response cache
+            error: Error message if the turn failed
+        """
+        turn = self._current
+        if turn is None:
+            return
+        if self.profiler:
+            self.profiler.disable()
+        turn.wall_time = time.perf_counter() - self._turn_start
+        if turn.time_to_first_token is None:
+            turn.time_to_first_token = turn.wall_time
+        if reply is not None:
+            turn.prompt_tokens += reply.prompt_tokens
+            turn.completion_tokens += reply.completion_tokens
+        turn.cached = cached
+        turn.error = error
+        self.turns.append(turn)
+        self._current = None
+        for hook in self.hooks:
+            hook(turn)
+    
+    def record_turns_saved(self, count=1):
+        """Count model turns the structured stage controller avoided"""
+        self.turns_saved += count
+    
+    def get_stage_times(self):
+        """Seconds spent in each stage, including the current one"""
+        times = dict(self.stage_times)
+        if self._stage is not None:
+            times[self._stage] = times.get(self._stage, 0.0) + time.perf_counter() - self._stage_entered
+        return times
+    
+    def summary(self):
+        """Totals for the session"""
+        completed = [turn for turn in self.turns if turn.error is None]
+        return {
+            "turns": len(self.turns),
+            "errors": len(self.turns) - len(completed),
+            "cached_turns": sum(turn.cached for turn in self.turns),
+            "hedged_turns": sum(turn.hedged for turn in self.turns),
+            "total_wall_time": sum(turn.wall_time for turn in completed),
+            "prompt_tokens": sum(turn.prompt_tokens for turn in self.turns),
+            "completion_tokens": sum(turn.completion_tokens for turn in self.turns),
+            "turns_saved": self.turns_saved,
+            "background_prompt_tokens": self.background_prompt_tokens,
+            "background_completion_tokens": self.background_completion_tokens,
+            "stage_times": self.get_stage_times(),
+            "stages": stage_report(self.turns),
+        }
+    
+    def write_jsonl(self, file):
+        """Write one JSON object per turn to an open text file"""
+        for turn in self.turns:
+            file.write(json.dumps(turn.to_dict()) + "\n")
+    
+    def export_jsonl(self, path):
+        """Append this session's turns to a JSONL file"""
+        with open(path, "a", encoding="utf-8") as f:
+            self.write_jsonl(f)
+    
+    def profile_report(self, limit=25):
+        """Get the cProfile report sorted by cumulative time"""
+        if self.profiler is None:
+            return ""
+        import pstats
+        stream = io.StringIO()
+        pstats.Stats(self.profiler, stream=stream).sort_stats("cumulative").print_stats(limit)
+        return stream.getvalue()
+
+
+def percentile(values, percent):
+    """Nearest-rank percentile of a list of numbers (0.0 if empty)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(percent / 100 * len(ordered)) - 1)]
+
+
+def stage_report(turns):
+    """
+    Latency and token use per stage and model, for tuning Config.STAGE_MODELS
+    
+    Only turns that called the model count; cached and failed turns are
+    left out.
+    
+    Args:
+        turns: Iterable of TurnMetrics, or their to_dict() records (e.g.
+            read back from a Config.METRICS_PATH file)
+    
+    Returns:
+        dict: stage -> model -> turns, time-to-first-token and wall time
+            p50/p95 in seconds, and mean prompt/completion tokens
+    """
+    groups = {}
+    for turn in turns:
+        record = turn if isinstance(turn, dict) else turn.to_dict()
+        if record.get("cached") or record.get("error"):
+            continue
+        key = (record["stage"], record.get("model") or "unknown")
+        groups.setdefault(key, []).append(record)
+    
+    report = {}
+    for (stage, model), records in sorted(groups.items()):
+        first_token = [record["time_to_first_token"] for record in records]
+        wall = [record["wall_time"] for record in records]
+        report.setdefault(stage, {})[model] = {
+            "turns": len(records),
+            "ttft_p50_s": round(percentile(first_token, 50), 3),
+            "ttft_p95_s": round(percentile(first_token, 95), 3),
+            "wall_p50_s": round(percentile(wall, 50), 3),
+            "wall_p95_s": round(percentile(wall, 95), 3),
+            "prompt_tokens_mean": round(sum(record["prompt_tokens"] for record in records) / len(records), 1),
+            "completion_tokens_mean": round(sum(record["completion_tokens"] for record in records) / len(records), 1),
+        }
+    return report
+
+
+class JsonlExporter:
+    """Turn hook that appends each completed turn to a JSONL file"""
+    
+    def __init__(self, path):
+        self.path = path
+    
+    def __call__(self, turn):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(turn.to_dict()) + "\n")
+
+
+def to_prometheus(sessions, guard=None, registry=None):
+    """
+    Render metrics for one or more sessions in Prometheus text format
+    
+    Args:
+        sessions: Iterable of SessionMetrics
+        guard: Optional RequestGuard whose counters are included
+        registry: Optional SessionRegistry whose memory gauges and
+            eviction counters are included
+    
+    Returns:
+        str: Prometheus exposition text
+    """
+    turns = {}
+    wall = {}
+    first_token = {}
+    prompt_tokens = {}
+    completion_tokens = {}
+    errors = {}
+    hedged = {}
+    stage_seconds = {}
+    turns_saved = 0
+    for session in sessions:
+        turns_saved += session.turns_saved
+        for turn in session.turns:
+            stage = turn.stage
+            turns[stage] = turns.get(stage, 0) + 1
+            if turn.hedged:
+                hedged[stage] = hedged.get(stage, 0) + 1
+            if turn.error:
+                errors[stage] = errors.get(stage, 0) + 1
+                continue
+            wall[stage] = wall.get(stage, 0.0) + turn.wall_time
+            first_token[stage] = first_token.get(stage, 0.0) + turn.time_to_first_token
+            prompt_tokens[stage] = prompt_tokens.get(stage, 0) + turn.prompt_tokens
+            completion_tokens[stage] = completion_tokens.get(stage, 0) + turn.completion_tokens
+        for stage, seconds in session.get_stage_times().items():
+            stage_seconds[stage] = stage_seconds.get(stage, 0.0) + seconds
+    
+    lines = []
+    
+    def add_metric(name, metric_type, help_text, values):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        for stage, value in sorted(values.items()):
+            lines.append(f'{name}{{stage="{stage}"}} {value}')
+    
+    add_metric("interview_turns_total", "counter", "Turns handled", turns)
+    add_metric("interview_turn_errors_total", "counter", "Turns that failed", errors)
+    add_metric("interview_hedged_turns_total", "counter", "Turns whose model call was hedged", hedged)
+    add_metric("interview_turn_seconds_sum", "counter", "Total turn wall time", wall)
+    add_metric("interview_first_token_seconds_sum", "counter", "Total time to first token", first_token)
+    add_metric("interview_prompt_tokens_total", "counter", "Prompt tokens used", prompt_tokens)
+    add_metric("interview_completion_tokens_total", "counter", "Completion tokens used", completion_tokens)
+    add_metric("interview_stage_seconds_total", "counter", "Time sessions spent in each stage", stage_seconds)
+    lines.append("# HELP interview_turns_saved_total Model turns avoided by the structured stage controller")
+    lines.append("# TYPE interview_turns_saved_total counter")
+    lines.append(f"interview_turns_saved_total {turns_saved}")
+    
+    if guard is not None:
+        for name, value in guard.stats().items():
+            if isinstance(value, int):
+                lines.append(f"# TYPE interview_requests_{name}_total counter")
+                lines.append(f"interview_requests_{name}_total {value}")
+    
+    if registry is not None:
+        stats = registry.stats()
+        for name in ("live_sessions", "hibernated_sessions", "session_bytes", "rss_bytes"):
+            lines.append(f"# TYPE interview_registry_{name} gauge")
+            lines.append(f"interview_registry_{name} {stats[name]}")
+        for name in ("idle_evictions", "memory_evictions", "restores", "expired_snapshots"):
+            lines.append(f"# TYPE interview_registry_{name}_total counter")
+            lines.append(f"interview_registry_{name}_total {stats[name]}")
+    
+    return "\n".join(lines) + "\n"
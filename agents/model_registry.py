@@ -0,0 +1,88 @@
+"""
+Process-wide registry of configured model backends
+"""
+import threading
+from config import Config
+from agents.cassette import RecordingBackend, ReplayBackend
+from agents.hedging import HedgingBackend
+from agents.llm_backend import GeminiBackend
+from agents.resilience import ResilientBackend
+
+class ModelRegistry:
+    """
+    Thread-safe pool of shared backends
+    
+    Backends (and the client connections behind them) are built once per
+    (model, system instruction) and reused by every InterviewAgent in the
+    process; each agent only creates its own chat session. Every backend
+    is wrapped in the shared RequestGuard so all sessions draw on one quota,
+    and, with Config.HEDGE_REQUESTS, in a HedgingBackend outside of that so
+    hedged duplicates are rate limited like any other call.
+    
+    With Config.CASSETTE_MODE "record" every backend also records its
+    calls into the shared cassette; with "replay" backends answer from
+    the cassette and no Gemini client is built at all.
+    """
+    
+    _backends = {}
+    _lock = threading.Lock()
+    
+    @classmethod
+    def get_backend(cls, model_name=None, system_instruction=None, generation_config=None):
+        """
+        Get the shared backend for a model configuration
+        
+        Args:
+            model_name: Gemini model to use (defaults to Config.GEMINI_MODEL)
+            system_instruction: Static instructions applied to every turn
+            generation_config: Optional dict of generation settings
+        
+        Returns:
+            LLMBackend: A configured, shared backend
+        """
+        generation = tuple(sorted((generation_config or {}).items()))
+        key = (model_name or Config.GEMINI_MODEL, system_instruction, generation)
+        backend = cls._backends.get(key)
+        if backend is None:
+            with cls._lock:
+                backend = cls._backends.get(key)
+                if backend is None:
+                    backend = cls._build_backend(key[0], system_instruction, dict(generation) or None)
+                    cls._backends[key] = backend
+        return backend
+    
+    @staticmethod
+    def _build_backend(model_name, system_instruction, generation_config):
+        """Build a backend with the configured wrappers"""
+        if Config.CASSETTE_MODE == "replay":
+            return ReplayBackend(model_name=model_name, system_instruction=system_instruction)
+        backend = ResilientBackend(
+            GeminiBackend(model_name, system_instruction=system_instruction, generation_config=generation_config)
+        )
+        if Config.HEDGE_REQUESTS:
+            backend = HedgingBackend(backend)
+        if Config.CASSETTE_MODE == "record":
+            # Outermost, so each call the agent makes is recorded once
+            backend = RecordingBackend(backend)
+        return backend
+    
+    @classmethod
+    def get_stage_backend(cls, stage, system_instruction=None):
+        """
+        Get the shared backend configured for a stage in Config.STAGE_MODELS
+        
+        Stages missing from the table use Config.GEMINI_MODEL with the
+        model's default generation settings.
+        """
+        settings = Config.STAGE_MODELS.get(stage, {})
+        generation_config = {
+            name: settings[name] for name in ("max_output_tokens", "temperature")
+            if settings.get(name) is not None
+        }
+        return cls.get_backend(settings.get("model"), system_instruction, generation_config)
+    
+    @classmethod
+    def clear(cls):
+        """Drop every shared backend"""
+        with cls._lock:
+            cls._backends.clear()
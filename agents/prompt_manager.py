@@ -1,71 +1,162 @@
-"""
-Prompt engineering and management for interview agent
-"""
-
-class PromptManager:
-    """Manages prompts for different interview stages"""
-    
-    @staticmethod
-    def get_introduction_prompt():
-        """Prompt for introduction stage"""
-        return """You are a friendly and professional interview practice partner.
-
-Your task: Greet the candidate warmly and ask what job role they're preparing for.
-
-Keep it brief and natural. Example:
-"Hi! I'm excited to help you practice for your interview. What position are you preparing for?"
-
-Be encouraging and professional."""
-    
-    @staticmethod
-    def get_interviewing_prompt(role, question_number, max_questions):
-        """Prompt for interviewing stage"""
-        return f"""You are conducting a mock job interview for the role: {role}
-
-Interview Progress: Question {question_number} of {max_questions}
-
-Your responsibilities:
-1. Ask ONE relevant interview question at a time
-2. Choose from these types:
-   - Technical/Skills-based questions (if applicable to role)
-   - Behavioral questions (e.g., "Tell me about a time when...")
-   - Situational questions (e.g., "How would you handle...")
-   - Role-specific questions
-
-3. After the candidate answers, ask ONE intelligent follow-up question based on their response
-4. Keep questions professional and realistic for actual interviews
-5. After {max_questions} total questions, say: "Great! Let's wrap up with some feedback on your performance."
-
-Current status: This is question {question_number}. 
-{"Ask your next question." if question_number < max_questions else "This is your final question before feedback."}"""
-    
-    @staticmethod
-    def get_feedback_prompt():
-        """Prompt for feedback stage"""
-        return """You are providing constructive interview feedback to help the candidate improve.
-
-Provide a structured evaluation covering:
-
-1. **Communication Skills (Score: X/10)**
-   - Clarity and articulation
-   - Confidence level
-   - Professional tone
-
-2. **Answer Quality (Score: X/10)**
-   - Completeness of responses
-   - Use of examples/evidence
-   - Structure (e.g., STAR method for behavioral questions)
-
-3. **Technical Knowledge** (if applicable)
-   - Accuracy of information
-   - Depth of understanding
-
-4. **Areas for Improvement**
-   - List 2-3 specific areas with actionable advice
-   - Provide examples from their answers
-
-5. **Strengths**
-   - Highlight what they did well
-   - Encourage them
-
-Be honest but supportive. End with encouraging words."""
\ No newline at end of file
+"""
+Prompt engineering and management for interview agent
+"""
+from agents.envelope import SENTINEL
+
+class PromptManager:
+    """Manages prompts for different interview stages"""
+    
+    WRAP_UP_PHRASE = "Let's wrap up with some feedback"
+    QUESTION_PLAN_TAG = "[Question plan]"
+    ANSWER_SCORE_TAG = "[Answer scoring]"
+    
+    @staticmethod
+    def get_system_instruction(max_questions, structured_state=False):
+        """
+        Static persona and rules, sent once as the model's system instruction
+        
+        With structured_state the model also ends every reply with a state
+        line (see agents/envelope.py) that drives the stage machine.
+        """
+        instruction = f"""You are a friendly and professional interview practice partner conducting mock job interviews.
+
+Each candidate message is prefixed with a short note telling you the current stage. Follow the rules for that stage.
+
+INTRODUCTION STAGE
+Greet the candidate warmly and ask what job role they're preparing for.
+Keep it brief and natural. Example:
+"Hi! I'm excited to help you practice for your interview. What position are you preparing for?"
+Be encouraging and professional.
+
+INTERVIEWING STAGE
+1. Ask ONE relevant interview question at a time
+2. Choose from these types:
+   - Technical/Skills-based questions (if applicable to role)
+   - Behavioral questions (e.g., "Tell me about a time when...")
+   - Situational questions (e.g., "How would you handle...")
+   - Role-specific questions
+3. After the candidate answers, ask ONE intelligent follow-up question based on their response
+4. Keep questions professional and realistic for actual interviews
+5. After {max_questions} total questions, say: "Great! {PromptManager.WRAP_UP_PHRASE} on your performance."
+
+FEEDBACK STAGE
+Provide constructive interview feedback to help the candidate improve, as a structured evaluation covering:
+
+1. **Communication Skills (Score: X/10)**
+   - Clarity and articulation
+   - Confidence level
+   - Professional tone
+
+2. **Answer Quality (Score: X/10)**
+   - Completeness of responses
+   - Use of examples/evidence
+   - Structure (e.g., STAR method for behavioral questions)
+
+3. **Technical Knowledge** (if applicable)
+   - Accuracy of information
+   - Depth of understanding
+
+4. **Areas for Improvement**
+   - List 2-3 specific areas with actionable advice
+   - Provide examples from their answers
+
+5. **Strengths**
+   - Highlight what they did well
+   - Encourage them
+
+Be honest but supportive. End with encouraging words."""
+        if structured_state:
+            instruction += PromptManager.get_state_instruction(max_questions)
+        return instruction
+    
+    @staticmethod
+    def get_state_instruction(max_questions):
+        """Rules for the state line appended to every reply"""
+        return f"""
+
+STATE LINE
+End EVERY reply with one final line that the candidate never sees, in exactly this format:
+{SENTINEL} {{"role": <the job role the candidate is preparing for, or null if not stated yet>, "is_question": <true if this reply asks a new interview question, else false>, "ready_for_feedback": <true only when all {max_questions} questions have been answered and you are moving to feedback>}}
+Use valid JSON with lowercase true/false and nothing after it."""
+    
+    @staticmethod
+    def get_introduction_prompt():
+        """Stage note for introduction stage"""
+        return "[Stage: INTRODUCTION] Greet the candidate and ask which role they're preparing for."
+    
+    @staticmethod
+    def get_interviewing_prompt(role, question_number, max_questions, planned_question=None):
+        """
+        Stage note for interviewing stage
+        
+        With a planned question the model only writes a short follow-up to
+        the candidate's answer; the agent appends the planned question.
+        """
+        if planned_question:
+            return (
+                f"[Stage: INTERVIEWING | Role: {role} | Question {question_number} of {max_questions}] "
+                f"Reply with a short follow-up to the candidate's message in one or two sentences. "
+                f"Do not ask a question yourself; this planned {planned_question['type']} question "
+                f"is asked right after your reply: \"{planned_question['question']}\""
+            )
+        next_step = "Ask your next question." if question_number < max_questions else "This is your final question before feedback."
+        return f"[Stage: INTERVIEWING | Role: {role} | Question {question_number} of {max_questions}] {next_step}"
+    
+    @staticmethod
+    def get_question_plan_prompt(role, max_questions):
+        """One-off request for the whole session's primary questions"""
+        return f"""{PromptManager.QUESTION_PLAN_TAG} Plan a mock interview for this role: {role}
+
+Write {max_questions} primary interview questions that build on each other, mixing technical, behavioral and situational questions as suits the role.
+Reply with JSON only, no other text:
+{{"questions": [{{"type": "technical" | "behavioral" | "situational", "question": "..."}}]}}"""
+    
+    @staticmethod
+    def get_answer_scoring_prompt(role, question, answer):
+        """One-off request to score a single answer against the feedback rubric"""
+        return f"""{PromptManager.ANSWER_SCORE_TAG} Score this mock interview answer for the role: {role}
+
+Question: {question}
+
+Answer: {answer}
+
+Use the FEEDBACK STAGE rubric. Reply with JSON only, no other text:
+{{"communication": 1-10, "answer_quality": 1-10, "technical_knowledge": 1-10 or null if not applicable, "strengths": "<one short sentence>", "improvement": "<one short, actionable sentence>"}}"""
+    
+    @staticmethod
+    def get_feedback_prompt(scores=None, averages=None):
+        """
+        Stage note for feedback stage
+        
+        With per-answer scores computed during the interview, the model
+        only aggregates them into the structured evaluation.
+        """
+        if not scores:
+            return "[Stage: FEEDBACK] Give the structured evaluation of the candidate's whole interview now."
+        
+        lines = ["[Stage: FEEDBACK] Each answer was scored during the interview:"]
+        for number, score in enumerate(scores, 1):
+            if score is None:
+                lines.append(f"- Answer {number}: not scored, assess it from the conversation")
+                continue
+            label = f"Answer {number}" + (f" ({score['type']})" if score.get("type") else "")
+            technical = score["technical_knowledge"] if score["technical_knowledge"] is not None else "n/a"
+            lines.append(
+                f"- {label}: communication {score['communication']}, answer quality {score['answer_quality']}, "
+                f"technical {technical}. Strength: {score['strengths']} Improve: {score['improvement']}"
+            )
+        lines.append("Averages: " + ", ".join(
+            f"{dimension.replace('_', ' ')} {value}/10"
+            for dimension, value in (averages or {}).items() if value is not None
+        ))
+        lines.append(
+            "Write the structured evaluation from these scores, using the averages as the section "
+            "scores. Summarize; do not re-assess each answer."
+        )
+        return "\n".join(lines)
+    
+    @staticmethod
+    def get_history_summary_prompt(summary):
+        """Message that stands in for compacted conversation history"""
+        return f"""[Summary of the earlier part of this interview]
+{summary}"""
\ No newline at end of file
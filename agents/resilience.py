@@ -0,0 +1,390 @@
+"""
+Rate limiting, retries and circuit breaking around model calls
+"""
+import asyncio
+import random
+import threading
+import time
+from config import Config
+from agents.llm_backend import ChatSession, LLMBackend
+
+# HTTP status codes worth retrying (google.api_core exceptions expose .code)
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the model while the circuit is open"""
+
+
+class RateLimitTimeout(Exception):
+    """Raised when a request waited longer than the queue allows"""
+
+
+def is_retryable(error):
+    """Check whether an exception is a transient upstream failure"""
+    if isinstance(error, (ConnectionError, TimeoutError, asyncio.TimeoutError)):
+        return True
+    code = getattr(error, "code", None)
+    code = getattr(code, "value", code)
+    return code in RETRYABLE_STATUS_CODES
+
+
+class TokenBucket:
+    """Refilling token bucket; a capacity of 0 disables the limit"""
+    
+    def __init__(self, capacity, refill_per_second):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.tokens = capacity
+        self.updated = time.monotonic()
+    
+    def reserve(self, amount):
+        """
+        Take amount tokens, possibly going into debt
+        
+        Returns:
+            float: Seconds the caller must wait before using the tokens
+        """
+        if not self.capacity:
+            return 0.0
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_per_second)
+        self.updated = now
+        self.tokens -= min(amount, self.capacity)
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.refill_per_second
+    
+    def refund(self, amount):
+        """Return tokens taken by a reservation that was abandoned"""
+        if self.capacity:
+            self.tokens = min(self.capacity, self.tokens + min(amount, self.capacity))
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute limiter shared by all sessions"""
+    
+    def __init__(self, rpm, tpm, max_wait):
+        self.requests = TokenBucket(rpm, rpm / 60)
+        self.tokens = TokenBucket(tpm, tpm / 60)
+        self.max_wait = max_wait
+        self._lock = threading.Lock()
+    
+    def reserve(self, tokens):
+        """
+        Reserve quota for one request
+        
+        Returns:
+            float: Seconds to wait before sending
+        """
+        with self._lock:
+            wait = max(self.requests.reserve(1), self.tokens.reserve(tokens))
+            if wait > self.max_wait:
+                self.requests.refund(1)
+                self.tokens.refund(tokens)
+                raise RateLimitTimeout(f"Request would wait {wait:.0f}s for quota")
+        return wait
+
+
+class CircuitBreaker:
+    """Fails fast after repeated upstream failures, then probes for recovery"""
+    
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+    
+    def allow(self):
+        """Check whether a request may be sent now"""
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                return True
+            return self.state == self.CLOSED
+    
+    def release_probe(self):
+        """Give up a probe that never got an answer, so the next request probes again"""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self.state = self.OPEN
+    
+    def record_success(self):
+        """Close the circuit after a successful call"""
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+    
+    def record_failure(self):
+        """Count a failure, opening the circuit past the threshold"""
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+class RequestGuard:
+    """
+    Applies the rate limiter, retry policy and circuit breaker to model calls
+    
+    Counters:
+        queued: requests that had to wait for quota
+        retried: retry attempts after a transient failure
+        short_circuited: requests rejected while the circuit was open
+        failed: requests that failed after all attempts
+    """
+    
+    _shared = None
+    _shared_lock = threading.Lock()
+    
+    def __init__(self, limiter, breaker, max_attempts, base_delay, max_delay):
+        self.limiter = limiter
+        self.breaker = breaker
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.queued = 0
+        self.retried = 0
+        self.short_circuited = 0
+        self.failed = 0
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def shared(cls):
+        """Get the process-wide guard configured from Config"""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls(
+                    RateLimiter(Config.RATE_LIMIT_RPM, Config.RATE_LIMIT_TPM, Config.RATE_LIMIT_MAX_WAIT),
+                    CircuitBreaker(Config.CIRCUIT_FAILURE_THRESHOLD, Config.CIRCUIT_RESET_TIMEOUT),
+                    Config.RETRY_MAX_ATTEMPTS,
+                    Config.RETRY_BASE_DELAY,
+                    Config.RETRY_MAX_DELAY
+                )
+            return cls._shared
+    
+    def _count(self, name):
+        """Increment a counter"""
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+    
+    def stats(self):
+        """Get counters and breaker state"""
+        return {
+            "queued": self.queued,
+            "retried": self.retried,
+            "short_circuited": self.short_circuited,
+            "failed": self.failed,
+            "circuit_state": self.breaker.state,
+        }
+    
+    def backoff(self, attempt):
+        """Full-jitter exponential backoff delay for a retry attempt"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+    
+    def before_attempt(self, tokens):
+        """
+        Check the breaker and reserve quota for one attempt
+        
+        Returns:
+            float: Seconds to wait before sending
+        """
+        if not self.breaker.allow():
+            self._count("short_circuited")
+            raise CircuitOpenError("The interview service is temporarily unavailable. Please try again shortly.")
+        try:
+            wait = self.limiter.reserve(tokens)
+        except RateLimitTimeout:
+            # The probe was never sent, so it says nothing about the upstream
+            self.breaker.release_probe()
+            raise
+        if wait:
+            self._count("queued")
+        return wait
+    
+    def after_failure(self, error, attempt):
+        """
+        Record a failed attempt
+        
+        Returns:
+            bool: True if the call should be retried
+        """
+        if not is_retryable(error):
+            self._count("failed")
+            # A probe has to settle the breaker whatever the error was
+            if self.breaker.state == self.breaker.HALF_OPEN:
+                self.breaker.record_failure()
+            return False
+        self.breaker.record_failure()
+        if attempt + 1 >= self.max_attempts:
+            self._count("failed")
+            return False
+        self._count("retried")
+        return True
+    
+    def after_abandon(self, started):
+        """
+        Settle the breaker for a call that was cancelled or whose stream was closed early
+        
+        Args:
+            started: True if the upstream had already sent part of the reply
+        """
+        if started:
+            self.breaker.record_success()
+        else:
+            self.breaker.release_probe()
+    
+    def call(self, func, tokens):
+        """Run a blocking model call under the guard"""
+        for attempt in range(self.max_attempts):
+            wait = self.before_attempt(tokens)
+            try:
+                time.sleep(wait)
+                result = func()
+            except Exception as e:
+                if not self.after_failure(e, attempt):
+                    raise
+                time.sleep(self.backoff(attempt))
+                continue
+            except BaseException:
+                self.after_abandon(False)
+                raise
+            self.breaker.record_success()
+            return result
+    
+    async def call_async(self, func, tokens):
+        """Await a model call under the guard"""
+        for attempt in range(self.max_attempts):
+            wait = self.before_attempt(tokens)
+            try:
+                await asyncio.sleep(wait)
+                result = await func()
+            except Exception as e:
+                if not self.after_failure(e, attempt):
+                    raise
+                await asyncio.sleep(self.backoff(attempt))
+                continue
+            except BaseException:
+                # Cancelled, e.g. the losing side of a hedged call
+                self.after_abandon(False)
+                raise
+            self.breaker.record_success()
+            return result
+    
+    def stream(self, func, tokens):
+        """Relay a streamed model call, retrying only before the first chunk"""
+        for attempt in range(self.max_attempts):
+            wait = self.before_attempt(tokens)
+            started = False
+            try:
+                time.sleep(wait)
+                for chunk in func():
+                    started = True
+                    yield chunk
+            except Exception as e:
+                # Chunks already relayed cannot be taken back, so never retry then
+                if not self.after_failure(e, self.max_attempts - 1 if started else attempt):
+                    raise
+                time.sleep(self.backoff(attempt))
+                continue
+            except BaseException:
+                # GeneratorExit when the caller stops reading the stream
+                self.after_abandon(started)
+                raise
+            self.breaker.record_success()
+            return
+    
+    async def stream_async(self, func, tokens):
+        """Asynchronously relay a streamed model call, retrying only before the first chunk"""
+        for attempt in range(self.max_attempts):
+            wait = self.before_attempt(tokens)
+            started = False
+            try:
+                await asyncio.sleep(wait)
+                async for chunk in func():
+                    started = True
+                    yield chunk
+            except Exception as e:
+                # Chunks already relayed cannot be taken back, so never retry then
+                if not self.after_failure(e, self.max_attempts - 1 if started else attempt):
+                    raise
+                await asyncio.sleep(self.backoff(attempt))
+                continue
+            except BaseException:
+                # GeneratorExit from aclose() or a cancelled task
+                self.after_abandon(started)
+                raise
+            self.breaker.record_success()
+            return
+
+
+class ResilientChatSession(ChatSession):
+    """Chat session whose model calls go through a RequestGuard"""
+    
+    def __init__(self, session, guard):
+        # last_reply is read through from the wrapped session
+        self.session = session
+        self.guard = guard
+    
+    @property
+    def history(self):
+        """Get the conversation history"""
+        return self.session.history
+    
+    @property
+    def last_reply(self):
+        """Last complete reply from the wrapped session"""
+        return self.session.last_reply
+    
+    def set_history(self, history):
+        """Replace the conversation history"""
+        self.session.set_history(history)
+    
+    def _estimate_tokens(self, message):
+        """Rough input token estimate for quota accounting"""
+        return (len(message) + sum(len(turn["text"]) for turn in self.session.history)) // 4 + 1
+    
+    def send(self, message):
+        """Send a message and return a ModelReply"""
+        return self.guard.call(lambda: self.session.send(message), self._estimate_tokens(message))
+    
+    def stream(self, message):
+        """Send a message and yield response text chunks"""
+        return self.guard.stream(lambda: self.session.stream(message), self._estimate_tokens(message))
+    
+    async def send_async(self, message):
+        """Send a message and await a ModelReply"""
+        return await self.guard.call_async(lambda: self.session.send_async(message), self._estimate_tokens(message))
+    
+    def stream_async(self, message):
+        """Send a message and asynchronously yield response text chunks"""
+        return self.guard.stream_async(lambda: self.session.stream_async(message), self._estimate_tokens(message))
+
+
+class ResilientBackend(LLMBackend):
+    """Backend wrapper that guards every chat session it starts"""
+    
+    def __init__(self, backend, guard=None):
+        self.backend = backend
+        self.guard = guard or RequestGuard.shared()
+    
+    @property
+    def system_instruction(self):
+        """System instruction of the wrapped backend"""
+        return self.backend.system_instruction
+    
+    @property
+    def model_name(self):
+        """Model of the wrapped backend"""
+        return self.backend.model_name
+    
+    def start_chat(self, history=None):
+        """Start a guarded chat session"""
+        return ResilientChatSession(self.backend.start_chat(history), self.guard)
@@ -0,0 +1,127 @@
+"""
+Cross-session cache of model replies for deterministic turns
+"""
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+from config import Config
+
+class ResponseCache:
+    """
+    LRU + TTL cache of interviewer replies
+    
+    Each key holds a small variety pool of replies. Until the pool has
+    `variants` entries every lookup is a miss, so the first sessions fill
+    it with genuinely different replies; after that a random one is served.
+    With a `path`, entries are persisted to a JSON file and survive restarts.
+    """
+    
+    _shared = None
+    _shared_lock = threading.Lock()
+    
+    def __init__(self, max_entries=256, ttl=86400, path=None, variants=3):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = path
+        self.variants = variants
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._load()
+    
+    @classmethod
+    def shared(cls):
+        """Get the process-wide cache configured from Config"""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls(
+                    max_entries=Config.RESPONSE_CACHE_SIZE,
+                    ttl=Config.RESPONSE_CACHE_TTL,
+                    path=Config.RESPONSE_CACHE_PATH,
+                    variants=Config.RESPONSE_CACHE_VARIANTS
+                )
+            return cls._shared
+    
+    @staticmethod
+    def make_key(stage_prompt, role, user_input):
+        """
+        Build a cache key for a turn
+        
+        Args:
+            stage_prompt: Prompt text for the current stage
+            role: Candidate's target role (or None)
+            user_input: The candidate's message
+            
+        Returns:
+            str: Hex digest identifying the turn
+        """
+        normalized_role = " ".join((role or "").lower().split())
+        normalized_input = " ".join(user_input.lower().split())
+        raw = "\x1f".join([stage_prompt, normalized_role, normalized_input])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+    
+    def get(self, key):
+        """Return a cached reply for key, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - entry["created"] > self.ttl:
+                del self._entries[key]
+                entry = None
+            if entry is None or len(entry["replies"]) < self.variants:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return random.choice(entry["replies"])
+    
+    def put(self, key, reply):
+        """Add a reply to the variety pool for key"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = {"created": time.time(), "replies": []}
+                self._entries[key] = entry
+            if len(entry["replies"]) < self.variants and reply not in entry["replies"]:
+                entry["replies"].append(reply)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._save()
+    
+    def clear(self):
+        """Remove every entry"""
+        with self._lock:
+            self._entries.clear()
+            self._save()
+    
+    def _load(self):
+        """Load unexpired entries from disk"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Response cache not loaded: {e}")
+            return
+        now = time.time()
+        for key, entry in entries.items():
+            if now - entry["created"] <= self.ttl:
+                self._entries[key] = entry
+    
+    def _save(self):
+        """Write entries to disk atomically (caller holds the lock)"""
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Response cache not saved: {e}")
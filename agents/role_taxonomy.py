@@ -0,0 +1,268 @@
+"""
+Local job-role matcher over a role taxonomy
+
+Detects the role a candidate names ("I'm interviewing for an SRE job")
+without a model call. Aliases are indexed by word sequence, so matching
+is one dictionary lookup per word n-gram of the message.
+"""
+import re
+from config import Config
+
+# Canonical role -> aliases (lowercase, matched on whole words)
+ROLE_TAXONOMY = {
+    # Software engineering
+    "Software Engineer": (
+        "software engineer", "software developer", "software dev", "swe", "sde",
+        "programmer", "coder", "application developer", "developer", "engineer",
+    ),
+    "Backend Engineer": ("backend engineer", "back end engineer", "backend developer", "back end developer", "server side developer"),
+    "Frontend Engineer": (
+        "frontend engineer", "front end engineer", "frontend developer", "front end developer",
+        "ui developer", "ui engineer", "javascript developer", "react developer", "angular developer",
+    ),
+    "Full Stack Engineer": ("full stack engineer", "fullstack engineer", "full stack developer", "fullstack developer", "mern developer"),
+    "Mobile Engineer": (
+        "mobile engineer", "mobile developer", "ios developer", "ios engineer", "android developer",
+        "android engineer", "flutter developer", "react native developer",
+    ),
+    "Web Developer": ("web developer", "web engineer", "wordpress developer", "php developer"),
+    "Embedded Software Engineer": ("embedded engineer", "embedded software engineer", "firmware engineer", "embedded developer"),
+    "Game Developer": ("game developer", "game programmer", "gameplay programmer", "unity developer", "unreal developer"),
+    "Java Developer": ("java developer", "java engineer", "spring developer"),
+    "Python Developer": ("python developer", "python engineer", "django developer"),
+    ".NET Developer": ("net developer", "dotnet developer", "c# developer", "asp net developer"),
+    "Software Architect": ("software architect", "solutions architect", "solution architect", "technical architect", "enterprise architect", "cloud architect"),
+    "Engineering Manager": ("engineering manager", "software engineering manager", "development manager", "dev manager"),
+    "Tech Lead": ("tech lead", "technical lead", "lead engineer", "lead developer", "staff engineer", "principal engineer"),
+    "CTO": ("cto", "chief technology officer", "vp of engineering", "vp engineering", "head of engineering", "director of engineering"),
+    "QA Engineer": (
+        "qa engineer", "qa analyst", "qa tester", "quality assurance engineer", "quality assurance analyst",
+        "test engineer", "software tester", "tester", "sdet", "automation engineer", "test automation engineer",
+    ),
+    # Infrastructure and operations
+    "Site Reliability Engineer": ("site reliability engineer", "sre", "reliability engineer", "production engineer"),
+    "DevOps Engineer": ("devops engineer", "devops", "dev ops engineer", "build engineer", "release engineer", "platform engineer", "infrastructure engineer"),
+    "Cloud Engineer": ("cloud engineer", "aws engineer", "azure engineer", "gcp engineer", "cloud administrator"),
+    "Systems Administrator": ("systems administrator", "system administrator", "sysadmin", "sys admin", "linux administrator", "windows administrator"),
+    "Network Engineer": ("network engineer", "network administrator", "network architect", "noc engineer"),
+    "Database Administrator": ("database administrator", "dba", "database engineer", "database developer", "sql developer"),
+    "IT Support Specialist": (
+        "it support", "it support specialist", "help desk", "helpdesk", "help desk technician",
+        "desktop support", "technical support", "tech support", "it technician", "service desk analyst",
+    ),
+    "IT Manager": ("it manager", "it director", "head of it", "cio", "chief information officer"),
+    # Security
+    "Security Engineer": ("security engineer", "application security engineer", "appsec engineer", "devsecops engineer", "cloud security engineer"),
+    "Security Analyst": ("security analyst", "soc analyst", "cybersecurity analyst", "cyber security analyst", "information security analyst", "infosec analyst"),
+    "Penetration Tester": ("penetration tester", "pen tester", "pentester", "ethical hacker", "red team", "red teamer"),
+    "CISO": ("ciso", "chief information security officer", "security manager", "head of security"),
+    # Data and AI
+    "Data Scientist": ("data scientist", "research scientist", "applied scientist", "decision scientist"),
+    "Data Analyst": ("data analyst", "analytics analyst", "reporting analyst", "insights analyst", "bi analyst", "business intelligence analyst"),
+    "Data Engineer": ("data engineer", "etl developer", "big data engineer", "analytics engineer", "data platform engineer"),
+    "Machine Learning Engineer": (
+        "machine learning engineer", "ml engineer", "mle", "ai engineer", "deep learning engineer",
+        "computer vision engineer", "nlp engineer", "mlops engineer", "llm engineer", "prompt engineer",
+    ),
+    "AI Researcher": ("ai researcher", "machine learning researcher", "ml researcher", "research engineer"),
+    "Statistician": ("statistician", "biostatistician", "quantitative analyst", "quant", "quant developer", "quant researcher"),
+    "Data Architect": ("data architect", "data modeler", "data warehouse architect"),
+    # Product, design and project
+    "Product Manager": ("product manager", "pm", "technical product manager", "tpm", "associate product manager", "apm", "group product manager", "head of product", "vp of product"),
+    "Product Owner": ("product owner", "agile product owner"),
+    "Product Designer": ("product designer", "ux designer", "ui designer", "ui ux designer", "ux ui designer", "interaction designer", "ux engineer"),
+    "UX Researcher": ("ux researcher", "user researcher", "design researcher", "usability researcher"),
+    "Graphic Designer": ("graphic designer", "visual designer", "brand designer", "illustrator", "motion designer", "art director"),
+    "Designer": ("designer", "creative director", "web designer", "fashion designer", "interior designer", "industrial designer"),
+    "Project Manager": ("project manager", "program manager", "technical program manager", "delivery manager", "pmo", "project coordinator", "program coordinator"),
+    "Scrum Master": ("scrum master", "agile coach", "agile project manager"),
+    "Business Analyst": ("business analyst", "systems analyst", "business systems analyst", "requirements analyst", "functional analyst"),
+    # Business, finance and operations
+    "Accountant": ("accountant", "cpa", "chartered accountant", "staff accountant", "tax accountant", "auditor", "bookkeeper", "accounts payable", "accounts receivable"),
+    "Financial Analyst": ("financial analyst", "finance analyst", "fp&a analyst", "fpa analyst", "investment analyst", "equity research analyst", "credit analyst", "risk analyst"),
+    "Investment Banker": ("investment banker", "investment banking analyst", "ib analyst", "m&a analyst", "private equity associate", "venture capital associate"),
+    "Finance Manager": ("finance manager", "financial controller", "controller", "cfo", "chief financial officer", "treasurer", "finance director"),
+    "Actuary": ("actuary", "actuarial analyst"),
+    "Operations Manager": ("operations manager", "ops manager", "operations director", "coo", "chief operating officer", "general manager", "plant manager"),
+    "Operations Analyst": ("operations analyst", "business operations analyst", "strategy and operations analyst", "bizops analyst"),
+    "Supply Chain Manager": ("supply chain manager", "supply chain analyst", "logistics manager", "logistics coordinator", "procurement manager", "buyer", "purchasing manager", "inventory manager"),
+    "Management Consultant": ("management consultant", "strategy consultant", "business consultant", "consultant", "associate consultant", "it consultant", "technology consultant"),
+    "Entrepreneur": ("entrepreneur", "founder", "co founder", "cofounder", "startup founder", "ceo", "chief executive officer"),
+    "Executive Assistant": ("executive assistant", "personal assistant", "administrative assistant", "admin assistant", "office manager", "receptionist", "secretary"),
+    "Economist": ("economist", "policy analyst", "research analyst"),
+    # Sales, marketing and customer
+    "Sales Representative": (
+        "sales representative", "sales rep", "sales associate", "sales executive", "sales", "salesperson",
+        "sales development representative", "sdr", "business development representative", "bdr",
+        "inside sales", "outside sales", "retail sales associate",
+    ),
+    "Account Executive": ("account executive", "enterprise account executive", "key account manager"),
+    "Account Manager": ("account manager", "client manager", "relationship manager", "client partner"),
+    "Sales Manager": ("sales manager", "sales director", "head of sales", "vp of sales", "regional sales manager", "business development manager", "bdm"),
+    "Sales Engineer": ("sales engineer", "solutions engineer", "pre sales engineer", "presales engineer", "solutions consultant"),
+    "Customer Success Manager": ("customer success manager", "csm", "customer success", "client success manager", "onboarding specialist"),
+    "Customer Service Representative": (
+        "customer service representative", "customer service", "customer support", "customer support representative",
+        "call center agent", "call centre agent", "customer care", "support specialist",
+    ),
+    "Marketing Manager": ("marketing manager", "marketing", "marketing director", "head of marketing", "cmo", "chief marketing officer", "brand manager", "product marketing manager", "pmm"),
+    "Digital Marketing Specialist": (
+        "digital marketing specialist", "digital marketer", "digital marketing", "seo specialist", "seo analyst",
+        "sem specialist", "ppc specialist", "performance marketer", "growth marketer", "growth manager",
+        "email marketing specialist", "marketing specialist", "marketing coordinator", "marketing associate",
+    ),
+    "Social Media Manager": ("social media manager", "social media specialist", "community manager", "social media coordinator"),
+    "Content Writer": ("content writer", "copywriter", "content strategist", "content marketer", "content creator", "writer", "blogger", "technical writer"),
+    "Public Relations Specialist": ("public relations specialist", "pr specialist", "pr manager", "communications manager", "communications specialist", "publicist"),
+    "Market Research Analyst": ("market research analyst", "market researcher", "consumer insights analyst"),
+    # People
+    "HR Manager": ("hr manager", "human resources manager", "hr director", "chro", "head of people", "people manager", "hr business partner", "hrbp"),
+    "HR Generalist": ("hr generalist", "hr specialist", "human resources specialist", "hr coordinator", "hr assistant", "people operations", "people ops"),
+    "Recruiter": ("recruiter", "technical recruiter", "talent acquisition", "talent acquisition specialist", "talent partner", "sourcer", "headhunter"),
+    "Trainer": ("trainer", "corporate trainer", "learning and development specialist", "l&d specialist", "instructional designer"),
+    # Healthcare
+    "Nurse": ("nurse", "registered nurse", "rn", "lpn", "licensed practical nurse", "nurse practitioner", "np", "icu nurse", "er nurse", "charge nurse", "nursing"),
+    "Doctor": ("doctor", "physician", "medical doctor", "md", "surgeon", "resident", "resident doctor", "general practitioner", "gp", "hospitalist", "anesthesiologist", "cardiologist", "pediatrician", "psychiatrist", "radiologist"),
+    "Dentist": ("dentist", "dental hygienist", "orthodontist", "dental assistant"),
+    "Pharmacist": ("pharmacist", "pharmacy technician", "clinical pharmacist"),
+    "Physical Therapist": ("physical therapist", "physiotherapist", "occupational therapist", "speech therapist", "speech language pathologist"),
+    "Medical Assistant": ("medical assistant", "healthcare assistant", "patient care technician", "cna", "certified nursing assistant", "caregiver", "home health aide"),
+    "Paramedic": ("paramedic", "emt", "emergency medical technician"),
+    "Psychologist": ("psychologist", "therapist", "counselor", "counsellor", "mental health counselor", "social worker", "case manager"),
+    "Clinical Research Associate": ("clinical research associate", "cra", "clinical research coordinator", "clinical trial manager"),
+    "Healthcare Administrator": ("healthcare administrator", "hospital administrator", "practice manager", "medical office manager", "health services manager"),
+    "Lab Technician": ("lab technician", "laboratory technician", "medical laboratory scientist", "lab assistant", "phlebotomist", "radiographer", "sonographer"),
+    "Veterinarian": ("veterinarian", "vet", "veterinary technician", "vet tech"),
+    "Dietitian": ("dietitian", "nutritionist"),
+    # Science and engineering (non-software)
+    "Scientist": ("scientist", "research associate", "chemist", "biologist", "physicist", "microbiologist", "biochemist", "geologist", "environmental scientist", "postdoc", "postdoctoral researcher"),
+    "Mechanical Engineer": ("mechanical engineer", "mechanical design engineer", "hvac engineer", "manufacturing engineer", "process engineer"),
+    "Electrical Engineer": ("electrical engineer", "electronics engineer", "hardware engineer", "pcb designer", "power engineer", "rf engineer"),
+    "Civil Engineer": ("civil engineer", "structural engineer", "geotechnical engineer", "transportation engineer", "site engineer"),
+    "Chemical Engineer": ("chemical engineer", "process chemist"),
+    "Aerospace Engineer": ("aerospace engineer", "aeronautical engineer", "avionics engineer"),
+    "Biomedical Engineer": ("biomedical engineer", "bioengineer", "medical device engineer"),
+    "Industrial Engineer": ("industrial engineer", "quality engineer", "reliability engineer", "lean engineer", "continuous improvement engineer"),
+    "Environmental Engineer": ("environmental engineer", "sustainability manager", "sustainability analyst", "energy engineer"),
+    "Architect": ("architect", "architectural designer", "landscape architect", "urban planner", "city planner"),
+    "Construction Manager": ("construction manager", "project engineer", "site manager", "general contractor", "foreman", "superintendent", "estimator", "quantity surveyor"),
+    # Education
+    "Teacher": ("teacher", "school teacher", "elementary teacher", "high school teacher", "math teacher", "science teacher", "english teacher", "esl teacher", "special education teacher", "substitute teacher", "tutor", "educator"),
+    "Professor": ("professor", "lecturer", "assistant professor", "associate professor", "adjunct professor", "faculty", "teaching assistant"),
+    "School Administrator": ("school administrator", "principal", "vice principal", "dean", "academic advisor", "school counselor", "admissions counselor"),
+    "Librarian": ("librarian", "library assistant", "archivist"),
+    # Legal and public sector
+    "Lawyer": ("lawyer", "attorney", "solicitor", "barrister", "legal counsel", "general counsel", "associate attorney", "corporate lawyer", "litigator"),
+    "Paralegal": ("paralegal", "legal assistant", "legal secretary", "law clerk"),
+    "Compliance Officer": ("compliance officer", "compliance analyst", "compliance manager", "aml analyst", "kyc analyst", "risk and compliance analyst"),
+    "Police Officer": ("police officer", "police", "detective", "sheriff", "law enforcement officer", "security guard", "security officer"),
+    "Firefighter": ("firefighter", "fire fighter"),
+    "Civil Servant": ("civil servant", "government official", "public servant", "administrative officer", "policy advisor", "diplomat"),
+    "Military Officer": ("military officer", "army officer", "soldier", "navy officer", "air force officer"),
+    # Trades, retail and service
+    "Electrician": ("electrician", "apprentice electrician"),
+    "Plumber": ("plumber", "pipefitter"),
+    "Mechanic": ("mechanic", "auto mechanic", "automotive technician", "diesel mechanic", "aircraft mechanic", "maintenance technician", "technician"),
+    "Carpenter": ("carpenter", "joiner", "welder", "machinist", "cnc operator"),
+    "Driver": ("driver", "truck driver", "delivery driver", "bus driver", "courier", "chauffeur"),
+    "Pilot": ("pilot", "airline pilot", "first officer", "flight attendant", "cabin crew", "air traffic controller"),
+    "Chef": ("chef", "cook", "line cook", "sous chef", "head chef", "pastry chef", "baker", "kitchen manager"),
+    "Restaurant Manager": ("restaurant manager", "food and beverage manager", "hospitality manager", "hotel manager", "front desk agent", "concierge", "event planner", "event manager"),
+    "Server": ("server", "waiter", "waitress", "bartender", "barista", "hostess"),
+    "Retail Manager": ("retail manager", "store manager", "assistant store manager", "shift manager", "shift supervisor", "department manager", "merchandiser", "visual merchandiser"),
+    "Cashier": ("cashier", "retail associate", "sales clerk", "shop assistant", "stock associate", "warehouse associate", "warehouse worker", "picker packer"),
+    "Real Estate Agent": ("real estate agent", "realtor", "property manager", "leasing agent", "real estate broker", "mortgage broker", "loan officer", "underwriter"),
+    "Insurance Agent": ("insurance agent", "insurance broker", "claims adjuster", "claims analyst", "financial advisor", "financial planner", "wealth manager", "bank teller", "personal banker"),
+    # Media and arts
+    "Journalist": ("journalist", "reporter", "editor", "news editor", "copy editor", "correspondent", "producer", "news producer"),
+    "Video Editor": ("video editor", "videographer", "film editor", "cinematographer", "animator", "3d artist", "photographer"),
+    "Musician": ("musician", "music teacher", "sound engineer", "audio engineer", "actor", "performer"),
+    # Research and academia support
+    "Research Assistant": ("research assistant", "graduate research assistant", "lab manager"),
+    # Early career
+    "Intern": ("intern", "internship", "summer intern", "graduate trainee", "trainee", "apprentice", "new grad", "graduate program"),
+}
+
+# Aliases that are also everyday words ("3 pm", "my vet", "the founder",
+# "a web server"); they only count right after "as a" or right before
+# "role", "position" or "job" ("as a cook", "the pm role")
+AMBIGUOUS_ALIASES = frozenset({
+    "pm", "md", "rn", "np", "gp", "vet", "server", "cook", "driver", "resident", "founder",
+})
+_CUES_BEFORE = (("as",), ("as", "a"), ("as", "an"))
+_CUES_AFTER = frozenset({"role", "roles", "position", "positions", "job", "jobs"})
+
+_WORD_PATTERN = re.compile(r"[a-z0-9+#&]+")
+
+
+def _tokenize(text):
+    """Lowercase word tokens; punctuation such as '/', '-' and '.' separates words"""
+    return tuple(_WORD_PATTERN.findall(text.lower()))
+
+
+class RoleMatcher:
+    """
+    Finds the most specific taxonomy role mentioned in a message
+    
+    The longest alias wins ("senior backend engineer" matches "Backend
+    Engineer", not "Software Engineer"); ties go to the earliest mention.
+    Config.JOB_KEYWORDS are included as catch-all aliases. Ambiguous
+    aliases only match next to a role cue (see AMBIGUOUS_ALIASES).
+    """
+    
+    _default = None
+    
+    def __init__(self, taxonomy=None, extra_keywords=(), ambiguous=AMBIGUOUS_ALIASES):
+        self.index = {}
+        for role, aliases in (taxonomy or ROLE_TAXONOMY).items():
+            for alias in aliases + (role.lower(),):
+                self.index.setdefault(_tokenize(alias), role)
+        for keyword in extra_keywords:
+            self.index.setdefault(_tokenize(keyword), keyword.title())
+        # Plural forms ("data scientists") map to the same role
+        for tokens, role in list(self.index.items()):
+            if not tokens[-1].endswith("s"):
+                self.index.setdefault(tokens[:-1] + (tokens[-1] + "s",), role)
+        self.ambiguous = {_tokenize(alias) for alias in ambiguous}
+        self.ambiguous |= {tokens[:-1] + (tokens[-1] + "s",) for tokens in self.ambiguous}
+        self.max_words = max(len(tokens) for tokens in self.index)
+    
+    @classmethod
+    def default(cls):
+        """Get the matcher over ROLE_TAXONOMY and Config.JOB_KEYWORDS"""
+        if cls._default is None:
+            cls._default = cls(extra_keywords=Config.JOB_KEYWORDS)
+        return cls._default
+    
+    def match(self, text, confident=False):
+        """
+        Find the role named in text
+        
+        Args:
+            text: Message to search
+            confident: Only accept multi-word aliases and single words next
+                to a role cue ("a product manager", "as a pharmacist"), for
+                deciding before the model has read the message
+        
+        Returns:
+            str or None: Canonical role name
+        """
+        words = _tokenize(text)
+        best = None
+        best_length = 0
+        for start in range(len(words)):
+            for length in range(min(self.max_words, len(words) - start), best_length, -1):
+                tokens = words[start:start + length]
+                role = self.index.get(tokens)
+                needs_cue = tokens in self.ambiguous or (confident and length == 1)
+                if role is not None and (not needs_cue or self._has_cue(words, start, length)):
+                    best, best_length = role, length
+                    break
+        return best
+    
+    @staticmethod
+    def _has_cue(words, start, length):
+        """True if the words at start are introduced or followed by a role cue"""
+        if any(words[max(0, start - len(cue)):start] == cue for cue in _CUES_BEFORE):
+            return True
+        return start + length < len(words) and words[start + length] in _CUES_AFTER
@@ -0,0 +1,272 @@
+"""
+Process-wide registry of live interview agents with a memory cap
+
+Sessions that sit idle past Config.SESSION_IDLE_TTL, and the least
+recently used ones once the cap is exceeded, are hibernated: written to
+a gzip-compressed JSON snapshot (InterviewAgent.to_dict) and dropped
+from memory. The next get() restores them transparently. Snapshots not
+restored within Config.SESSION_TTL are deleted, like the store's copy.
+"""
+import gzip
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from config import Config
+
+
+def process_rss():
+    """Resident set size of this process in bytes (0 if unknown)"""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        # Peak rather than current RSS, in KB on Linux and bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if os.uname().sysname == "Darwin" else peak * 1024
+    except (ImportError, AttributeError):
+        return 0
+
+
+class _Entry:
+    """A live agent and its bookkeeping"""
+    
+    __slots__ = ("agent", "size", "logged", "last_used")
+    
+    def __init__(self, agent, size):
+        self.agent = agent
+        self.size = size
+        self.logged = len(agent.conversation_log)
+        self.last_used = time.monotonic()
+
+
+class SessionRegistry:
+    """
+    Bounded set of live agents keyed by session id
+    
+    Entry sizes are the length of the serialized agent state, which is
+    also what a snapshot holds; in-memory objects are a small multiple of
+    that. The size is measured when a session is registered or restored
+    and then grown by an estimate per logged message, so a turn never
+    re-serializes the agent. Sessions used within Config.SESSION_EVICT_MIN_IDLE seconds are
+    never evicted, so a turn in progress keeps its agent; the memory cap
+    is therefore soft while many sessions are active at once.
+    """
+    
+    # Serialized bytes per logged message besides its text: the stage
+    # note sent with it in the chat history, plus JSON keys and timestamps
+    MESSAGE_OVERHEAD = 400
+    
+    _shared = None
+    _shared_lock = threading.Lock()
+    
+    def __init__(self, memory_limit=None, idle_ttl=None, snapshot_dir=None, restore=None):
+        """
+        Args:
+            memory_limit: Bytes of serialized state kept live (0 = no cap)
+            idle_ttl: Seconds before an unused session is hibernated (0 = never)
+            snapshot_dir: Directory for hibernated sessions
+            restore: Callable building an agent from a snapshot dict
+                (defaults to InterviewAgent.from_dict)
+        """
+        self.memory_limit = Config.SESSION_MEMORY_LIMIT_MB * 1024 * 1024 if memory_limit is None else memory_limit
+        self.idle_ttl = Config.SESSION_IDLE_TTL if idle_ttl is None else idle_ttl
+        self.snapshot_dir = snapshot_dir or Config.SESSION_SNAPSHOT_DIR
+        self.restore = restore
+        self.idle_evictions = 0
+        self.memory_evictions = 0
+        self.restores = 0
+        self.expired = 0
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+        self._last_sweep = time.monotonic()
+    
+    @classmethod
+    def shared(cls):
+        """Get the process-wide registry configured from Config"""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+    
+    def _snapshot_path(self, session_id):
+        """Snapshot file of a session (ids come from URLs, so check them)"""
+        if not session_id.isalnum():
+            raise ValueError(f"Invalid session id: {session_id!r}")
+        return os.path.join(self.snapshot_dir, f"{session_id}.json.gz")
+    
+    @staticmethod
+    def _serialize(agent):
+        return json.dumps(agent.to_dict(), separators=(",", ":")).encode("utf-8")
+    
+    def register(self, agent):
+        """
+        Track a live agent, replacing any agent held for the same session
+        
+        Returns:
+            str: The agent's session id
+        """
+        session_id = agent.metrics.session_id
+        size = len(self._serialize(agent))
+        with self._lock:
+            old = self._entries.pop(session_id, None)
+            if old is not None and old.agent is not agent:
+                old.agent.conversation_log.close()
+            self._entries[session_id] = _Entry(agent, size)
+        self.sweep()
+        return session_id
+    
+    def get(self, session_id):
+        """
+        Get a session's agent, restoring it from its snapshot if hibernated
+        
+        Returns:
+            InterviewAgent or None: None if the session is unknown here
+        """
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is not None:
+                entry.last_used = time.monotonic()
+                self._entries.move_to_end(session_id)
+                return entry.agent
+            agent = self._restore(session_id)
+        if agent is not None:
+            self.sweep()
+        return agent
+    
+    def _restore(self, session_id):
+        """Load a hibernated session back into memory (lock held)"""
+        try:
+            path = self._snapshot_path(session_id)
+            with gzip.open(path, "rb") as f:
+                payload = f.read()
+        except (ValueError, OSError):
+            return None
+        restore = self.restore
+        if restore is None:
+            from agents.interview_agent import InterviewAgent
+            restore = InterviewAgent.from_dict
+        agent = restore(json.loads(payload))
+        self._entries[session_id] = _Entry(agent, len(payload))
+        os.remove(path)
+        self.restores += 1
+        return agent
+    
+    def live_agents(self):
+        """Agents currently held in memory"""
+        with self._lock:
+            return [entry.agent for entry in self._entries.values()]
+    
+    def checkin(self, session_id):
+        """Grow a session's size by the messages of its last turn and enforce the limits"""
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is not None:
+                log = entry.agent.conversation_log
+                # Each message is held twice: in the transcript and in the chat history
+                entry.size += sum(2 * len(message.content) + self.MESSAGE_OVERHEAD for message in log[entry.logged:])
+                entry.logged = len(log)
+                entry.last_used = time.monotonic()
+                self._entries.move_to_end(session_id)
+        self.sweep()
+    
+    def discard(self, session_id):
+        """Forget a session, live or hibernated"""
+        with self._lock:
+            entry = self._entries.pop(session_id, None)
+            if entry is not None:
+                entry.agent.conversation_log.close()
+            try:
+                os.remove(self._snapshot_path(session_id))
+            except (ValueError, OSError):
+                pass
+    
+    def hibernate(self, session_id):
+        """Write a live session to its snapshot and drop it from memory"""
+        with self._lock:
+            entry = self._entries.pop(session_id, None)
+            if entry is None:
+                return False
+            os.makedirs(self.snapshot_dir, exist_ok=True)
+            path = self._snapshot_path(session_id)
+            temp_path = f"{path}.tmp"
+            with gzip.open(temp_path, "wb", compresslevel=6) as f:
+                f.write(self._serialize(entry.agent))
+            os.replace(temp_path, path)
+            entry.agent.conversation_log.close()
+            return True
+    
+    def sweep(self, force=False):
+        """
+        Hibernate idle sessions, then least recently used ones over the cap
+        
+        Runs at most every Config.SESSION_SWEEP_INTERVAL seconds unless forced.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._last_sweep < Config.SESSION_SWEEP_INTERVAL:
+                return
+            self._last_sweep = now
+            self._expire_snapshots()
+            
+            if self.idle_ttl:
+                for session_id in [sid for sid, entry in self._entries.items() if now - entry.last_used > self.idle_ttl]:
+                    self.hibernate(session_id)
+                    self.idle_evictions += 1
+            
+            if self.memory_limit:
+                total = sum(entry.size for entry in self._entries.values())
+                # Oldest first; stop at sessions that may still be mid-turn
+                for session_id, entry in list(self._entries.items()):
+                    if total <= self.memory_limit or now - entry.last_used < Config.SESSION_EVICT_MIN_IDLE:
+                        break
+                    total -= entry.size
+                    self.hibernate(session_id)
+                    self.memory_evictions += 1
+    
+    def _expire_snapshots(self):
+        """Delete snapshots of sessions untouched for Config.SESSION_TTL (lock held)"""
+        if not Config.SESSION_TTL:
+            return
+        cutoff = time.time() - Config.SESSION_TTL
+        try:
+            names = os.listdir(self.snapshot_dir)
+        except OSError:
+            return
+        for name in names:
+            if not name.endswith(".json.gz"):
+                continue
+            path = os.path.join(self.snapshot_dir, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    self.expired += 1
+            except OSError:
+                pass
+    
+    def stats(self):
+        """Live and hibernated session counts, memory use and evictions"""
+        with self._lock:
+            sizes = {session_id: entry.size for session_id, entry in self._entries.items()}
+        try:
+            hibernated = sum(name.endswith(".json.gz") for name in os.listdir(self.snapshot_dir))
+        except OSError:
+            hibernated = 0
+        rss = process_rss()
+        return {
+            "live_sessions": len(sizes),
+            "hibernated_sessions": hibernated,
+            "session_bytes": sum(sizes.values()),
+            "memory_limit_bytes": self.memory_limit,
+            "rss_bytes": rss,
+            "rss_per_session_bytes": rss // len(sizes) if sizes else 0,
+            "idle_evictions": self.idle_evictions,
+            "memory_evictions": self.memory_evictions,
+            "restores": self.restores,
+            "expired_snapshots": self.expired,
+            "session_sizes": sizes,
+        }
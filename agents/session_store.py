@@ -0,0 +1,353 @@
+"""
+External session stores so any app worker can serve any interview
+
+Each store keeps a JSON document per session id together with a version
+number. put() only succeeds if the caller saw the latest version
+(optimistic concurrency), so two workers handling the same session at
+once cannot silently overwrite each other's turn.
+"""
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from urllib.parse import urlparse
+from config import Config
+
+
+class SessionConflictError(Exception):
+    """Raised when a session changed since the caller loaded it"""
+
+
+class SessionStore:
+    """
+    Base class for session stores
+    
+    get() returns (data, version) or None; put() takes the version the
+    caller loaded (None for a new session) and returns the new version.
+    """
+    
+    _shared = None
+    _shared_lock = threading.Lock()
+    
+    def __init__(self, ttl=None):
+        self.ttl = ttl if ttl is not None else Config.SESSION_TTL
+    
+    @classmethod
+    def shared(cls):
+        """Get the process-wide store configured by Config.SESSION_STORE"""
+        with SessionStore._shared_lock:
+            if SessionStore._shared is None:
+                SessionStore._shared = SessionStore.from_url(Config.SESSION_STORE)
+            return SessionStore._shared
+    
+    @staticmethod
+    def from_url(url):
+        """
+        Build a store from a URL
+        
+        Args:
+            url: "memory", "sqlite:///path/to/sessions.db" or
+                "redis://host:port/db"
+        
+        Returns:
+            SessionStore: The configured store
+        """
+        parsed = urlparse(url)
+        if url == "memory":
+            return MemorySessionStore()
+        if parsed.scheme == "sqlite":
+            # sqlite:///relative.db or sqlite:////absolute/path.db
+            return SQLiteSessionStore(parsed.path[1:] or "sessions.db")
+        if parsed.scheme == "redis":
+            return RedisSessionStore(
+                parsed.hostname or "localhost",
+                parsed.port or 6379,
+                int(parsed.path.lstrip("/") or 0)
+            )
+        raise ValueError(f"Unknown session store: {url}")
+    
+    def get(self, session_id):
+        """Load a session as (data, version), or None if unknown or expired"""
+        raise NotImplementedError
+    
+    def version(self, session_id):
+        """Current version of a session without loading it, or None"""
+        record = self.get(session_id)
+        return record[1] if record else None
+    
+    def put(self, session_id, data, expected_version=None):
+        """
+        Save a session
+        
+        Args:
+            session_id: Session to save
+            data: JSON-serializable session state
+            expected_version: Version the caller loaded, None for a new session
+        
+        Returns:
+            int: The new version
+        
+        Raises:
+            SessionConflictError: If the stored version is not expected_version
+        """
+        raise NotImplementedError
+    
+    def delete(self, session_id):
+        """Forget a session"""
+        raise NotImplementedError
+
+
+class MemorySessionStore(SessionStore):
+    """
+    In-process store (one worker only); sessions are kept as JSON like the shared stores
+    
+    Expired sessions are dropped by a sweep that put() runs at most every
+    Config.SESSION_SWEEP_INTERVAL seconds, so sessions that are never read
+    again do not stay in memory.
+    """
+    
+    def __init__(self, ttl=None):
+        super().__init__(ttl)
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+    
+    def get(self, session_id):
+        with self._lock:
+            record = self._sessions.get(session_id)
+            if record is None:
+                return None
+            payload, version, updated_at = record
+            if self.ttl and time.time() - updated_at > self.ttl:
+                del self._sessions[session_id]
+                return None
+        return json.loads(payload), version
+    
+    def version(self, session_id):
+        with self._lock:
+            record = self._sessions.get(session_id)
+        if record is None or (self.ttl and time.time() - record[2] > self.ttl):
+            return None
+        return record[1]
+    
+    def put(self, session_id, data, expected_version=None):
+        payload = json.dumps(data)
+        with self._lock:
+            self._sweep()
+            record = self._sessions.get(session_id)
+            current = record[1] if record and not (self.ttl and time.time() - record[2] > self.ttl) else None
+            if current != expected_version:
+                raise SessionConflictError(f"Session {session_id} is at version {current}, not {expected_version}")
+            version = (current or 0) + 1
+            self._sessions[session_id] = (payload, version, time.time())
+        return version
+    
+    def delete(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+    
+    def _sweep(self):
+        """Drop expired sessions, at most once per sweep interval (lock held)"""
+        now = time.monotonic()
+        if not self.ttl or now - self._last_sweep < Config.SESSION_SWEEP_INTERVAL:
+            return
+        self._last_sweep = now
+        cutoff = time.time() - self.ttl
+        for session_id in [sid for sid, record in self._sessions.items() if record[2] < cutoff]:
+            del self._sessions[session_id]
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Store backed by a SQLite file
+    
+    Serves several worker processes on one host; SQLite's own locking
+    makes each compare-and-set atomic.
+    """
+    
+    def __init__(self, path, ttl=None):
+        super().__init__(ttl)
+        self.path = path
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._connection = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "id TEXT PRIMARY KEY, version INTEGER NOT NULL, data TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+    
+    def get(self, session_id):
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT data, version, updated_at FROM sessions WHERE id = ?", (session_id,)
+            ).fetchone()
+        if row is None or (self.ttl and time.time() - row[2] > self.ttl):
+            return None
+        return json.loads(row[0]), row[1]
+    
+    def version(self, session_id):
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT version, updated_at FROM sessions WHERE id = ?", (session_id,)
+            ).fetchone()
+        if row is None or (self.ttl and time.time() - row[1] > self.ttl):
+            return None
+        return row[0]
+    
+    def put(self, session_id, data, expected_version=None):
+        payload = json.dumps(data)
+        now = time.time()
+        with self._lock:
+            connection = self._connection
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                if self.ttl and time.monotonic() - self._last_sweep >= Config.SESSION_SWEEP_INTERVAL:
+                    # Drop every expired session, not only this one, so the file stays bounded
+                    self._last_sweep = time.monotonic()
+                    connection.execute("DELETE FROM sessions WHERE updated_at < ?", (now - self.ttl,))
+                elif self.ttl:
+                    connection.execute("DELETE FROM sessions WHERE id = ? AND updated_at < ?", (session_id, now - self.ttl))
+                if expected_version is None:
+                    try:
+                        connection.execute(
+                            "INSERT INTO sessions (id, version, data, updated_at) VALUES (?, 1, ?, ?)",
+                            (session_id, payload, now)
+                        )
+                    except sqlite3.IntegrityError:
+                        raise SessionConflictError(f"Session {session_id} already exists")
+                    version = 1
+                else:
+                    version = expected_version + 1
+                    cursor = connection.execute(
+                        "UPDATE sessions SET version = ?, data = ?, updated_at = ? WHERE id = ? AND version = ?",
+                        (version, payload, now, session_id, expected_version)
+                    )
+                    if cursor.rowcount != 1:
+                        raise SessionConflictError(f"Session {session_id} is no longer at version {expected_version}")
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+        return version
+    
+    def delete(self, session_id):
+        with self._lock:
+            self._connection.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+
+class RedisConnection:
+    """Minimal RESP client: just enough of the Redis protocol for RedisSessionStore"""
+    
+    def __init__(self, host, port, db=0, timeout=5.0):
+        self._socket = socket.create_connection((host, port), timeout=timeout)
+        self._reader = self._socket.makefile("rb")
+        if db:
+            self.command("SELECT", db)
+    
+    def command(self, *args):
+        """Send a command and return its decoded reply"""
+        parts = [f"*{len(args)}\r\n".encode()]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode()
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        self._socket.sendall(b"".join(parts))
+        return self._read_reply()
+    
+    def _read_reply(self):
+        line = self._reader.readline()
+        if not line:
+            raise ConnectionError("Redis connection closed")
+        kind, rest = line[:1], line[1:-2]
+        if kind == b"+":
+            return rest.decode()
+        if kind == b"-":
+            raise RuntimeError(f"Redis error: {rest.decode()}")
+        if kind == b":":
+            return int(rest)
+        if kind == b"$":
+            length = int(rest)
+            if length < 0:
+                return None
+            data = self._reader.read(length + 2)
+            return data[:-2]
+        if kind == b"*":
+            length = int(rest)
+            if length < 0:
+                return None
+            return [self._read_reply() for _ in range(length)]
+        raise ConnectionError(f"Unexpected Redis reply: {line!r}")
+    
+    def close(self):
+        """Close the connection"""
+        self._reader.close()
+        self._socket.close()
+
+
+class RedisSessionStore(SessionStore):
+    """
+    Store backed by a Redis-protocol server, shared by workers on any host
+    
+    Each session is a hash with "version" and "data" fields that expires
+    after the TTL. Compare-and-set uses WATCH/MULTI/EXEC, so any server
+    that speaks those commands will do.
+    """
+    
+    KEY_PREFIX = "interview:session:"
+    
+    def __init__(self, host="localhost", port=6379, db=0, ttl=None):
+        super().__init__(ttl)
+        self.address = (host, port, db)
+        self._connection = None
+        self._lock = threading.Lock()
+    
+    def _command(self, *args):
+        """Run a command, connecting first if needed"""
+        if self._connection is None:
+            self._connection = RedisConnection(*self.address)
+        try:
+            return self._connection.command(*args)
+        except (ConnectionError, OSError):
+            # Reconnect on the next call; a WATCH does not survive this one
+            self._connection.close()
+            self._connection = None
+            raise
+    
+    def get(self, session_id):
+        with self._lock:
+            version, payload = self._command("HMGET", self.KEY_PREFIX + session_id, "version", "data")
+        if version is None:
+            return None
+        return json.loads(payload), int(version)
+    
+    def version(self, session_id):
+        with self._lock:
+            version = self._command("HGET", self.KEY_PREFIX + session_id, "version")
+        return int(version) if version is not None else None
+    
+    def put(self, session_id, data, expected_version=None):
+        key = self.KEY_PREFIX + session_id
+        payload = json.dumps(data)
+        with self._lock:
+            # WATCH makes EXEC fail if another worker writes the key first
+            self._command("WATCH", key)
+            current = self._command("HGET", key, "version")
+            current = int(current) if current is not None else None
+            if current != expected_version:
+                self._command("UNWATCH")
+                raise SessionConflictError(f"Session {session_id} is at version {current}, not {expected_version}")
+            version = (current or 0) + 1
+            self._command("MULTI")
+            self._command("HSET", key, "version", version, "data", payload)
+            if self.ttl:
+                self._command("EXPIRE", key, int(self.ttl))
+            if self._command("EXEC") is None:
+                raise SessionConflictError(f"Session {session_id} changed during the update")
+        return version
+    
+    def delete(self, session_id):
+        with self._lock:
+            self._command("DEL", self.KEY_PREFIX + session_id)
@@ -0,0 +1,200 @@
+"""
+Compact transcript storage streamed to disk as the interview happens
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+from config import Config
+
+class TranscriptEntry:
+    """A single message in the transcript"""
+    
+    __slots__ = ("role", "content", "stage", "timestamp")
+    
+    def __init__(self, role, content, stage, timestamp=None):
+        self.role = sys.intern(role)
+        self.content = content
+        self.stage = sys.intern(stage)
+        self.timestamp = timestamp or time.time()
+    
+    def __getitem__(self, key):
+        """Allow dict-style access (entry["role"]) used by the UI"""
+        return getattr(self, key)
+    
+    def to_dict(self):
+        """Convert to a JSON-serializable dict"""
+        return {
+            "role": self.role,
+            "content": self.content,
+            "stage": self.stage,
+            "timestamp": self.timestamp
+        }
+    
+    @classmethod
+    def from_dict(cls, data):
+        """Build an entry from a dict written by to_dict"""
+        return cls(data["role"], data["content"], data["stage"], data.get("timestamp"))
+
+
+class Transcript:
+    """
+    Append-only conversation log shared by the agent and the UI
+    
+    Each entry is appended to a JSONL spool file in
+    Config.TRANSCRIPT_DIR/.active as soon as it is logged. Saving moves
+    that file into place, so it costs O(1) however long the interview
+    was; unsaved spool files are deleted when the transcript is closed.
+    With spool=False the transcript is kept in memory until it is saved.
+    """
+    
+    EXPORT_FORMATS = ("jsonl", "json", "markdown", "text")
+    
+    def __init__(self, spool=True):
+        self.entries = []
+        self.path = None
+        self.saved = False
+        self._file = None
+        self._offsets = []
+        if spool:
+            spool_dir = os.path.join(Config.TRANSCRIPT_DIR, ".active")
+            os.makedirs(spool_dir, exist_ok=True)
+            fd, self.path = tempfile.mkstemp(suffix=".jsonl", dir=spool_dir)
+            self._file = os.fdopen(fd, "w", encoding="utf-8")
+    
+    def __len__(self):
+        return len(self.entries)
+    
+    def __iter__(self):
+        return iter(self.entries)
+    
+    def __getitem__(self, index):
+        return self.entries[index]
+    
+    def append(self, role, content, stage):
+        """Log a message and write it through to the spool file"""
+        entry = TranscriptEntry(role, content, stage)
+        self._add(entry)
+        return entry
+    
+    def extend(self, records):
+        """Append entries from dicts written by TranscriptEntry.to_dict"""
+        for record in records:
+            self._add(TranscriptEntry.from_dict(record))
+    
+    def _add(self, entry):
+        """Store an entry and write it through to the spool file"""
+        self.entries.append(entry)
+        if self._file:
+            self._write(entry)
+            self._file.flush()
+    
+    def _write(self, entry):
+        """Write one entry to the open file, remembering where it starts"""
+        self._offsets.append(self._file.tell())
+        self._file.write(json.dumps(entry.to_dict()) + "\n")
+    
+    def pop(self):
+        """Remove the last message (e.g. an unanswered user turn)"""
+        entry = self.entries.pop()
+        if self._file:
+            self._file.truncate(self._offsets.pop())
+            self._file.seek(0, os.SEEK_END)
+        return entry
+    
+    def iter_records(self):
+        """Stream entries as dicts, reading from disk when spooled"""
+        if self._file is None:
+            for entry in self.entries:
+                yield entry.to_dict()
+            return
+        if self._file:
+            self._file.flush()
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                yield json.loads(line)
+    
+    def save(self, path=None):
+        """
+        Keep the transcript on disk
+        
+        Args:
+            path: Destination JSONL path (defaults to a timestamped file
+                in Config.TRANSCRIPT_DIR)
+        
+        Returns:
+            str: Path of the saved transcript
+        """
+        if path is None:
+            path = os.path.join(
+                Config.TRANSCRIPT_DIR,
+                f"transcript_{time.strftime('%Y%m%d_%H%M%S')}_{id(self):x}.jsonl"
+            )
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        
+        if self._file is None:
+            # Write out what is in memory and keep appending there too
+            self._file = open(path, "w", encoding="utf-8")
+            self._offsets = []
+            for entry in self.entries:
+                self._write(entry)
+            self._file.flush()
+            self.path = path
+            self.saved = True
+            return path
+        
+        # Move the spool file into place and keep appending there
+        self._file.close()
+        os.replace(self.path, path)
+        self.path = path
+        self._file = open(path, "a", encoding="utf-8")
+        self.saved = True
+        return path
+    
+    def export(self, path, fmt="markdown"):
+        """
+        Stream the transcript to a file in another format
+        
+        Args:
+            path: Destination file path
+            fmt: One of "jsonl", "json", "markdown" or "text"
+        
+        Returns:
+            str: The destination path
+        """
+        if fmt not in self.EXPORT_FORMATS:
+            raise ValueError(f"Unknown transcript format: {fmt}")
+        
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as out:
+            if fmt == "json":
+                out.write("[")
+            for index, record in enumerate(self.iter_records()):
+                if fmt == "jsonl":
+                    out.write(json.dumps(record) + "\n")
+                elif fmt == "json":
+                    out.write(("," if index else "") + "\n  " + json.dumps(record))
+                elif fmt == "markdown":
+                    speaker = "Interviewer" if record["role"] == "assistant" else "Candidate"
+                    out.write(f"**{speaker}** _({record['stage']})_\n\n{record['content']}\n\n---\n\n")
+                else:
+                    speaker = "Interviewer" if record["role"] == "assistant" else "You"
+                    out.write(f"{speaker}: {record['content']}\n\n")
+            if fmt == "json":
+                out.write("\n]\n")
+        return path
+    
+    def close(self):
+        """Close the spool file, deleting it unless it was saved"""
+        if self._file:
+            self._file.close()
+            self._file = None
+            if not self.saved and os.path.exists(self.path):
+                os.remove(self.path)
+    
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
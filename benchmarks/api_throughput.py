@@ -0,0 +1,167 @@
+"""
+Throughput benchmark for the HTTP/SSE interview API
+
+Drives server.InterviewAPI in-process through the ASGI interface (no
+sockets), so the numbers measure the API and agent overhead on one event
+loop. The model is the local StubBackend. Each simulated client creates
+a session and streams every turn of a full interview over SSE. Turns
+refused with 503 are retried after their Retry-After delay and counted.
+
+Usage:
+    python -m benchmarks.api_throughput --sessions 200 --latency 0.2 --token-rate 50
+    python -m benchmarks.api_throughput --sessions 500 --max-pending 100
+"""
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+from config import Config
+from agents.llm_backend import StubBackend
+from agents.metrics import percentile
+from agents.session_registry import SessionRegistry
+from benchmarks.load_test import CANDIDATE_SCRIPT
+from server import InterviewAPI
+
+
+async def call(app, method, path, body=None, accept="application/json"):
+    """
+    Make one in-process ASGI request
+    
+    Returns:
+        tuple: (status, headers dict, body bytes, seconds to first body chunk)
+    """
+    scope = {
+        "type": "http",
+        "method": method,
+        "path": path,
+        "headers": [(b"accept", accept.encode()), (b"content-type", b"application/json")],
+    }
+    request = json.dumps(body).encode() if body is not None else b""
+    received = False
+    start = time.perf_counter()
+    response = {"status": None, "headers": {}, "chunks": [], "first_chunk": None}
+    
+    async def receive():
+        nonlocal received
+        if received:
+            # Nothing more will arrive; park like a connected client
+            await asyncio.Event().wait()
+        received = True
+        return {"type": "http.request", "body": request, "more_body": False}
+    
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = {name.decode(): value.decode() for name, value in message["headers"]}
+        elif message.get("body"):
+            if response["first_chunk"] is None:
+                response["first_chunk"] = time.perf_counter() - start
+            response["chunks"].append(message["body"])
+    
+    await app(scope, receive, send)
+    return response["status"], response["headers"], b"".join(response["chunks"]), response["first_chunk"]
+
+
+class ThroughputResult:
+    """Samples collected during a benchmark run"""
+    
+    def __init__(self):
+        self.turn_latencies = []
+        self.first_token_latencies = []
+        self.rejections = 0
+        self.completed_sessions = 0
+
+
+async def run_client(app, result):
+    """Create a session and stream a full interview through the API"""
+    while True:
+        status, headers, body, _ = await call(app, "POST", "/sessions")
+        if status != 503:
+            break
+        result.rejections += 1
+        await asyncio.sleep(float(headers.get("retry-after", 1)))
+    session_id = json.loads(body)["session_id"]
+    
+    for answer in CANDIDATE_SCRIPT:
+        while True:
+            start = time.perf_counter()
+            status, headers, body, first_chunk = await call(
+                app, "POST", f"/sessions/{session_id}/turns", {"message": answer}, accept="text/event-stream"
+            )
+            if status != 503:
+                break
+            result.rejections += 1
+            await asyncio.sleep(float(headers.get("retry-after", 1)))
+        result.turn_latencies.append(time.perf_counter() - start)
+        result.first_token_latencies.append(first_chunk or 0.0)
+    
+    status, _, body, _ = await call(app, "GET", f"/sessions/{session_id}")
+    result.completed_sessions += json.loads(body)["stage"] == "feedback"
+    await call(app, "DELETE", f"/sessions/{session_id}")
+
+
+def run_benchmark(sessions, latency, token_rate, max_pending):
+    """
+    Run the benchmark and return a summary dict
+    
+    Args:
+        sessions: Concurrent simulated clients
+        latency: Simulated time to first token, in seconds
+        token_rate: Simulated words generated per second (0 = instant)
+        max_pending: Config.API_MAX_PENDING_TURNS for the run
+    """
+    Config.API_MAX_PENDING_TURNS = max_pending
+    backend = StubBackend(latency=latency, tokens_per_second=token_rate)
+    with tempfile.TemporaryDirectory() as snapshot_dir:
+        app = InterviewAPI(backend=backend)
+        app.registry = SessionRegistry(snapshot_dir=snapshot_dir, restore=app._restore_agent)
+        result = ThroughputResult()
+        
+        async def run_all():
+            await asyncio.gather(*(run_client(app, result) for _ in range(sessions)))
+        
+        start = time.perf_counter()
+        asyncio.run(run_all())
+        elapsed = time.perf_counter() - start
+    
+    turns = len(result.turn_latencies)
+    return {
+        "sessions": sessions,
+        "completed_sessions": result.completed_sessions,
+        "turns": turns,
+        "rejected_turns": result.rejections,
+        "elapsed_s": elapsed,
+        "turns_per_s": turns / elapsed if elapsed else 0.0,
+        "turn_p50_ms": percentile(result.turn_latencies, 50) * 1000,
+        "turn_p95_ms": percentile(result.turn_latencies, 95) * 1000,
+        "turn_p99_ms": percentile(result.turn_latencies, 99) * 1000,
+        "ttft_p50_ms": percentile(result.first_token_latencies, 50) * 1000,
+        "ttft_p99_ms": percentile(result.first_token_latencies, 99) * 1000,
+    }
+
+
+def main():
+    """Parse arguments and print a throughput report"""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sessions", type=int, default=100, help="concurrent clients")
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds to first token")
+    parser.add_argument("--token-rate", type=float, default=50, help="words per second (0 = instant)")
+    parser.add_argument("--max-pending", type=int, default=Config.API_MAX_PENDING_TURNS,
+                        help="turns in flight before the API answers 503")
+    args = parser.parse_args()
+    
+    report = run_benchmark(args.sessions, args.latency, args.token_rate, args.max_pending)
+    
+    print("=" * 50)
+    print(f"API throughput: {report['sessions']} clients over SSE")
+    print("=" * 50)
+    for key, value in report.items():
+        if isinstance(value, float):
+            print(f"  {key:<28} {value:>12.2f}")
+        elif key != "sessions":
+            print(f"  {key:<28} {value:>12}")
+
+
+if __name__ == "__main__":
+    main()
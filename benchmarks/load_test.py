@@ -0,0 +1,148 @@
+"""
+Concurrent load test for the interview agent
+
+Simulates N candidates running full introduction, interviewing and
+feedback sessions against the local StubBackend, so the agent's own
+overhead can be measured without an API key or network.
+
+Usage:
+    python -m benchmarks.load_test --sessions 200 --latency 0.2 --token-rate 50
+"""
+import argparse
+import asyncio
+import statistics
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from config import Config
+from agents.interview_agent import InterviewAgent
+from agents.async_interview_agent import AsyncInterviewAgent
+from agents.llm_backend import StubBackend
+from agents.metrics import percentile
+
+CANDIDATE_SCRIPT = (
+    ["Hello, I'm ready to practice!", "I'm preparing for a software engineer role."]
+    + [
+        "In my last project I profiled a slow service, found an N+1 query "
+        "and cut the p95 latency in half by batching the lookups."
+    ] * Config.MAX_QUESTIONS
+    + ["Thank you, that was helpful."]
+)
+
+
+class LoadTestResult:
+    """Latency samples collected during a load test run"""
+    
+    def __init__(self):
+        self.turn_latencies = []
+        self.first_token_latencies = []
+        self.completed_sessions = 0
+        self._lock = threading.Lock()
+    
+    def record(self, turn_latency, first_token_latency):
+        """Record one turn's timings"""
+        with self._lock:
+            self.turn_latencies.append(turn_latency)
+            self.first_token_latencies.append(first_token_latency)
+
+
+async def run_async_session(backend, result):
+    """Drive one candidate through a full session on the event loop"""
+    agent = AsyncInterviewAgent(backend=backend)
+    for answer in CANDIDATE_SCRIPT:
+        start = time.perf_counter()
+        first_token = None
+        async for _ in agent.send_message_stream(answer):
+            if first_token is None:
+                first_token = time.perf_counter() - start
+        result.record(time.perf_counter() - start, first_token or 0.0)
+    result.completed_sessions += agent.stage == "feedback"
+
+
+def run_thread_session(backend, result):
+    """Drive one candidate through a full session on a worker thread"""
+    agent = InterviewAgent(backend=backend)
+    for answer in CANDIDATE_SCRIPT:
+        start = time.perf_counter()
+        first_token = None
+        for _ in agent.send_message_stream(answer):
+            if first_token is None:
+                first_token = time.perf_counter() - start
+        result.record(time.perf_counter() - start, first_token or 0.0)
+    with result._lock:
+        result.completed_sessions += agent.stage == "feedback"
+
+
+def run_load_test(sessions, latency, token_rate, mode="async"):
+    """
+    Run a load test and return a summary dict
+    
+    Args:
+        sessions: Number of concurrent candidate sessions
+        latency: Simulated time to first token, in seconds
+        token_rate: Simulated words generated per second (0 = instant)
+        mode: "async" for one event loop, "thread" for a thread per session
+        
+    Returns:
+        dict: Latency percentiles, throughput and memory figures
+    """
+    backend = StubBackend(latency=latency, tokens_per_second=token_rate)
+    result = LoadTestResult()
+    
+    tracemalloc.start()
+    start = time.perf_counter()
+    
+    if mode == "async":
+        async def run_all():
+            await asyncio.gather(*(run_async_session(backend, result) for _ in range(sessions)))
+        asyncio.run(run_all())
+    else:
+        with ThreadPoolExecutor(max_workers=sessions) as pool:
+            list(pool.map(lambda _: run_thread_session(backend, result), range(sessions)))
+    
+    elapsed = time.perf_counter() - start
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    turns = len(result.turn_latencies)
+    return {
+        "mode": mode,
+        "sessions": sessions,
+        "completed_sessions": result.completed_sessions,
+        "turns": turns,
+        "elapsed_s": elapsed,
+        "turns_per_s": turns / elapsed if elapsed else 0.0,
+        "turn_p50_ms": percentile(result.turn_latencies, 50) * 1000,
+        "turn_p95_ms": percentile(result.turn_latencies, 95) * 1000,
+        "turn_p99_ms": percentile(result.turn_latencies, 99) * 1000,
+        "ttft_p50_ms": percentile(result.first_token_latencies, 50) * 1000,
+        "ttft_p99_ms": percentile(result.first_token_latencies, 99) * 1000,
+        "turn_mean_ms": statistics.fmean(result.turn_latencies) * 1000 if turns else 0.0,
+        "peak_memory_per_session_kb": peak_memory / sessions / 1024,
+    }
+
+
+def main():
+    """Parse arguments and print a load test report"""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sessions", type=int, default=100, help="concurrent candidates")
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds to first token")
+    parser.add_argument("--token-rate", type=float, default=50, help="words per second (0 = instant)")
+    parser.add_argument("--mode", choices=["async", "thread"], default="async")
+    args = parser.parse_args()
+    
+    report = run_load_test(args.sessions, args.latency, args.token_rate, args.mode)
+    
+    print("=" * 50)
+    print(f"Load test: {report['sessions']} sessions ({report['mode']})")
+    print("=" * 50)
+    for key, value in report.items():
+        if isinstance(value, float):
+            print(f"  {key:<28} {value:>12.2f}")
+        elif key not in ("mode", "sessions"):
+            print(f"  {key:<28} {value:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+"""
+Micro-benchmarks of the agent's own per-turn overhead, with baselines
+
+Times the local work around each model call: building stage prompts in
+PromptManager, update_state, envelope parsing, transcript logging and
+rendering, and a whole session replayed from a cassette with no model
+latency. Every benchmark reports the time per call of its fastest timeit
+batch, which is the least disturbed by other load on the machine.
+Results are compared with benchmarks/baselines.json, and the run exits
+with status 1 when any benchmark is slower than its baseline by more
+than the tolerance. Baselines are machine specific:
+record them again with --update on the machine that runs the check.
+
+Usage:
+    python -m benchmarks.micro
+    python -m benchmarks.micro --filter prompt --repeat 9
+    python -m benchmarks.micro --update
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import timeit
+from config import Config
+from agents.answer_scorer import aggregate_scores
+from agents.cassette import Cassette, RecordingBackend, ReplayBackend
+from agents.envelope import EnvelopeStream, format_state, split_envelope
+from agents.interview_agent import InterviewAgent
+from agents.llm_backend import StubBackend
+from agents.prompt_manager import PromptManager
+from agents.transcript import Transcript
+from benchmarks.load_test import CANDIDATE_SCRIPT
+
+BASELINES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+
+ANSWER = CANDIDATE_SCRIPT[2]
+REPLY = "Thanks, batching the lookups was the right call. How did you verify the fix in production?"
+SCORE = {
+    "type": "technical", "communication": 8, "answer_quality": 7, "technical_knowledge": 7,
+    "strengths": "Clear structure with a concrete example.", "improvement": "Quantify the impact of your work.",
+}
+
+
+def interviewing_agent():
+    """An agent part way through the interview, without a model behind it"""
+    agent = InterviewAgent(backend=StubBackend(), cache=None)
+    agent.role = "Software Engineer"
+    agent.stage = "interviewing"
+    agent.questions_asked = 3
+    agent._planned_question = {"type": "behavioral", "question": "Tell me about a time you disagreed with a teammate."}
+    return agent
+
+
+def session_records():
+    """Transcript entries of a full scripted session"""
+    records = []
+    for number, answer in enumerate(CANDIDATE_SCRIPT):
+        stage = "introduction" if number < 2 else "interviewing" if number < len(CANDIDATE_SCRIPT) - 1 else "feedback"
+        records.append(("user", answer, stage))
+        records.append(("assistant", REPLY, stage))
+    return records
+
+
+def bench_system_instruction():
+    """Static system instruction with the state line rules"""
+    return lambda: PromptManager.get_system_instruction(Config.MAX_QUESTIONS, True)
+
+
+def bench_interviewing_prompt():
+    """Stage note plus candidate text for a planned interviewing turn"""
+    agent = interviewing_agent()
+    return lambda: agent._build_message(ANSWER)
+
+
+def bench_feedback_prompt():
+    """Feedback stage note built from per-answer scores"""
+    scores = [SCORE] * Config.MAX_QUESTIONS
+    return lambda: PromptManager.get_feedback_prompt(scores, aggregate_scores(scores))
+
+
+def bench_update_state():
+    """Stage machine update from a parsed state line"""
+    agent = interviewing_agent()
+    state = {"role": "Software Engineer", "is_question": True, "ready_for_feedback": False}
+    
+    def run():
+        agent.stage = "interviewing"
+        agent.questions_asked = 3
+        agent.update_state(ANSWER, REPLY, state)
+    return run
+
+
+def bench_split_envelope():
+    """Split a complete reply into visible text and state"""
+    text = f"{REPLY}\n{format_state('Software Engineer', is_question=True)}"
+    return lambda: split_envelope(text)
+
+
+def bench_envelope_stream():
+    """Strip the state line from a reply streamed word by word"""
+    text = f"{REPLY}\n{format_state('Software Engineer', is_question=True)}"
+    words = text.split(" ")
+    chunks = [word + " " for word in words[:-1]] + words[-1:]
+    
+    def run():
+        envelope = EnvelopeStream()
+        for chunk in chunks:
+            envelope.feed(chunk)
+        envelope.close()
+    return run
+
+
+def bench_transcript_memory():
+    """Log a full session to an in-memory transcript"""
+    records = session_records()
+    
+    def run():
+        transcript = Transcript(spool=False)
+        for role, content, stage in records:
+            transcript.append(role, content, stage)
+    return run
+
+
+def bench_transcript_spooled():
+    """Log a full session to a transcript spooled to disk"""
+    records = session_records()
+    
+    def run():
+        transcript = Transcript(spool=True)
+        for role, content, stage in records:
+            transcript.append(role, content, stage)
+        transcript.close()
+    return run
+
+
+def bench_render_markdown():
+    """Render a full session transcript as markdown"""
+    transcript = Transcript(spool=False)
+    for role, content, stage in session_records():
+        transcript.append(role, content, stage)
+    path = os.path.join(Config.TRANSCRIPT_DIR, "micro.md")
+    return lambda: transcript.export(path, "markdown")
+
+
+def bench_session_replay():
+    """A full session answered from a cassette recorded off the stub backend"""
+    cassette = Cassette(os.path.join(Config.TRANSCRIPT_DIR, "micro_cassette.jsonl"))
+    recorder = RecordingBackend(StubBackend(), cassette)
+    agent = InterviewAgent(backend=recorder, cache=None)
+    for message in CANDIDATE_SCRIPT:
+        agent.send_message(message)
+    backend = ReplayBackend(cassette, model_name=recorder.model_name, latency_scale=0)
+    
+    def run():
+        agent = InterviewAgent(backend=backend, cache=None)
+        for message in CANDIDATE_SCRIPT:
+            for _ in agent.send_message_stream(message):
+                pass
+        if agent.last_error:
+            raise RuntimeError(agent.last_error)
+    return run
+
+
+BENCHMARKS = {
+    "prompt.system_instruction": bench_system_instruction,
+    "prompt.interviewing_turn": bench_interviewing_prompt,
+    "prompt.feedback_turn": bench_feedback_prompt,
+    "state.update_interviewing": bench_update_state,
+    "envelope.split": bench_split_envelope,
+    "envelope.stream": bench_envelope_stream,
+    "transcript.session_memory": bench_transcript_memory,
+    "transcript.session_spooled": bench_transcript_spooled,
+    "render.markdown_export": bench_render_markdown,
+    "session.replay_full": bench_session_replay,
+}
+
+
+def measure(func, repeat):
+    """Microseconds per call in the fastest of repeat timeit batches of at least 0.2s"""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1e6
+
+
+def load_baselines(path):
+    """Baseline microseconds per benchmark ({} if there is no file yet)"""
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)["benchmarks"]
+
+
+def save_baselines(path, results):
+    """Write results as the new baselines"""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"benchmarks": {name: round(us, 3) for name, us in results.items()}}, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def main():
+    """Run the benchmarks, compare them with the baselines and exit non-zero on a regression"""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--filter", default="", help="only run benchmarks whose name contains this")
+    parser.add_argument("--repeat", type=int, default=7, help="timeit batches per benchmark")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed slowdown over the baseline (0.5 = 50%%)")
+    parser.add_argument("--baselines", default=BASELINES_PATH, help="baselines JSON file")
+    parser.add_argument("--update", action="store_true", help="store this run's results as the baselines")
+    args = parser.parse_args()
+    
+    # Only the agent's own work is measured: no caches, hooks, profiler or scoring threads
+    Config.RESPONSE_CACHE_ENABLED = False
+    Config.METRICS_PATH = None
+    Config.PROFILE_SESSIONS = False
+    Config.BACKGROUND_SCORING = False
+    
+    baselines = load_baselines(args.baselines)
+    results = {}
+    regressions = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        Config.TRANSCRIPT_DIR = work_dir
+        Config.TRANSCRIPT_SPOOL = False
+        
+        print("=" * 70)
+        print(f"Micro-benchmarks (best of {args.repeat} batches, tolerance {args.tolerance:.0%})")
+        print("=" * 70)
+        for name, setup in BENCHMARKS.items():
+            if args.filter not in name:
+                continue
+            results[name] = measure(setup(), args.repeat)
+            baseline = baselines.get(name)
+            if baseline is None:
+                verdict = "new"
+            else:
+                ratio = results[name] / baseline
+                verdict = f"{ratio:5.2f}x"
+                if ratio > 1 + args.tolerance:
+                    verdict += "  REGRESSION"
+                    regressions.append(name)
+            print(f"  {name:<30} {results[name]:>12.2f} us   {verdict}")
+    
+    if args.update:
+        save_baselines(args.baselines, {**baselines, **results})
+        print(f"\nBaselines written to {args.baselines}")
+        return
+    if regressions:
+        print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Streamlit rerun benchmark: page rebuild time against transcript length
+
+Runs app.py headlessly with Streamlit's AppTest for interviews holding
+10, 100 and 500 messages, comparing rendering every message as its own
+chat bubble ("before") with the collapsed, incrementally pre-rendered
+history ("after"). Uses the offline stub backend, so no API key or
+network is needed.
+
+Usage:
+    python -m benchmarks.rerun --reruns 20
+    python -m benchmarks.rerun --messages 10 100 500 1000
+"""
+import argparse
+import time
+from streamlit.testing.v1 import AppTest
+from config import Config
+from agents.interview_agent import InterviewAgent
+from agents.llm_backend import StubBackend
+from agents.session_registry import SessionRegistry
+from agents.session_store import SessionStore
+from agents.metrics import percentile
+
+ANSWER = (
+    "In my last project I profiled the checkout service, found an N+1 query "
+    "in the order history endpoint and replaced it with a single join, which "
+    "cut p95 latency from 900 ms to 120 ms."
+)
+
+
+def build_agent(message_count):
+    """Create an agent whose transcript already holds message_count messages"""
+    agent = InterviewAgent(backend=StubBackend())
+    for i in range(message_count):
+        if i % 2:
+            agent.conversation_log.append("user", ANSWER, "interviewing")
+        else:
+            agent.conversation_log.append("assistant", f"Question {i // 2 + 1}: tell me about a hard bug.", "interviewing")
+    agent.stage = "interviewing"
+    return agent
+
+
+def time_reruns(message_count, recent, reruns):
+    """
+    Time full script reruns of app.py with a pre-filled transcript
+    
+    Returns:
+        list: Rerun durations in seconds (the first, warm-up run excluded)
+    """
+    Config.CHAT_RECENT_MESSAGES = recent
+    agent = build_agent(message_count)
+    session_id = SessionRegistry.shared().register(agent)
+    app = AppTest.from_file("app.py", default_timeout=60)
+    app.session_state["session_id"] = session_id
+    app.session_state["session_version"] = SessionStore.shared().put(session_id, agent.to_dict())
+    app.session_state["interview_started"] = True
+    
+    app.run()
+    durations = []
+    for _ in range(reruns):
+        start = time.perf_counter()
+        app.run()
+        durations.append(time.perf_counter() - start)
+    SessionRegistry.shared().discard(session_id)
+    SessionStore.shared().delete(session_id)
+    return durations
+
+
+def main():
+    """Parse arguments and print the before/after comparison"""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--messages", type=int, nargs="+", default=[10, 100, 500], help="transcript lengths to test")
+    parser.add_argument("--reruns", type=int, default=20, help="timed reruns per transcript length")
+    args = parser.parse_args()
+    
+    if not Config.GEMINI_API_KEY:
+        # The stub backend never touches the network, so any key will do
+        Config.GEMINI_API_KEY = "benchmark-placeholder-key"
+    
+    recent = Config.CHAT_RECENT_MESSAGES
+    modes = {
+        "before (every message)": 0,
+        f"after (last {recent} + cached block)": recent,
+    }
+    
+    print("=" * 70)
+    print(f"Rerun benchmark: {args.reruns} reruns per transcript length")
+    print("=" * 70)
+    for message_count in args.messages:
+        print(f"{message_count} messages")
+        for mode, mode_recent in modes.items():
+            durations = time_reruns(message_count, mode_recent, args.reruns)
+            print(f"  {mode:<34} p50 {percentile(durations, 50) * 1000:9.2f} ms"
+                  f"   p95 {percentile(durations, 95) * 1000:9.2f} ms")
+    Config.CHAT_RECENT_MESSAGES = recent
+
+
+if __name__ == "__main__":
+    main()
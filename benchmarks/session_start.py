@@ -0,0 +1,96 @@
+"""
+Session start benchmark: per-agent client construction vs ModelRegistry
+
+"before" rebuilds and reconfigures the Gemini client for every session,
+as InterviewAgent used to; "after" takes the shared backend from
+ModelRegistry and only creates a chat session. With --live, each session
+also sends one turn to Gemini so per-turn connection overhead (TLS
+handshakes on fresh clients) shows up in the first-turn latency.
+
+Usage:
+    python -m benchmarks.session_start --sessions 50
+    python -m benchmarks.session_start --sessions 10 --live
+"""
+import argparse
+import time
+from config import Config
+from agents.interview_agent import InterviewAgent
+from agents.llm_backend import GeminiBackend
+from agents.model_registry import ModelRegistry
+from agents.prompt_manager import PromptManager
+from agents.metrics import percentile
+
+
+def fresh_backend():
+    """Build a backend the way every agent used to: configure + new model"""
+    GeminiBackend._configured_key = None
+    return GeminiBackend(system_instruction=PromptManager.get_system_instruction(Config.MAX_QUESTIONS))
+
+
+def shared_backend():
+    """Take the shared backend from the registry"""
+    return ModelRegistry.get_backend(
+        system_instruction=PromptManager.get_system_instruction(Config.MAX_QUESTIONS)
+    )
+
+
+def time_sessions(make_backend, sessions, live):
+    """
+    Time agent construction (and optionally a first turn) per session
+    
+    Returns:
+        tuple: (start latencies, first-turn latencies) in seconds
+    """
+    start_latencies = []
+    turn_latencies = []
+    for _ in range(sessions):
+        start = time.perf_counter()
+        agent = InterviewAgent(backend=make_backend())
+        start_latencies.append(time.perf_counter() - start)
+        
+        if live:
+            agent.cache = None
+            start = time.perf_counter()
+            agent.send_message(Config.GREETING_MESSAGE)
+            turn_latencies.append(time.perf_counter() - start)
+    return start_latencies, turn_latencies
+
+
+def print_row(label, values):
+    """Print p50/p95/max of a latency list in milliseconds"""
+    if values:
+        print(f"  {label:<24} p50 {percentile(values, 50) * 1000:9.2f} ms"
+              f"   p95 {percentile(values, 95) * 1000:9.2f} ms"
+              f"   max {max(values) * 1000:9.2f} ms")
+
+
+def main():
+    """Parse arguments and print the before/after comparison"""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sessions", type=int, default=50, help="sessions to start per mode")
+    parser.add_argument("--live", action="store_true", help="also time one Gemini turn per session")
+    args = parser.parse_args()
+    
+    if args.live:
+        Config.validate()
+    elif not Config.GEMINI_API_KEY:
+        # Construction never touches the network, so any key will do
+        Config.GEMINI_API_KEY = "benchmark-placeholder-key"
+    
+    ModelRegistry.clear()
+    results = {
+        "before (per-agent client)": time_sessions(fresh_backend, args.sessions, args.live),
+        "after (ModelRegistry)": time_sessions(shared_backend, args.sessions, args.live),
+    }
+    
+    print("=" * 70)
+    print(f"Session start benchmark: {args.sessions} sessions per mode")
+    print("=" * 70)
+    for mode, (start_latencies, turn_latencies) in results.items():
+        print(mode)
+        print_row("session start", start_latencies)
+        print_row("first turn", turn_latencies)
+
+
+if __name__ == "__main__":
+    main()
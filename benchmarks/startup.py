@@ -0,0 +1,116 @@
+"""
+Startup benchmark: cold-start import time of cli.py and app.py
+
+Each run starts a fresh interpreter with -X importtime and reads the
+cumulative import time of the entry point. For app.py, streamlit is
+imported first, as the streamlit server already has it loaded when it
+runs the script, so only the app's own imports are counted. Exits with
+status 1 when the median of any entry point exceeds
+Config.STARTUP_IMPORT_BUDGET_MS (or --budget).
+
+Usage:
+    python -m benchmarks.startup --runs 10
+    python -m benchmarks.startup --budget 100 --top 15
+"""
+import argparse
+import os
+import subprocess
+import sys
+from config import Config
+from agents.metrics import percentile
+
+ENTRY_POINTS = {
+    "cli.py": ("", "cli"),
+    "app.py": ("import streamlit", "app"),
+}
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_importtime(output):
+    """
+    Parse -X importtime output
+    
+    Returns:
+        list: (module, self_us, cumulative_us, depth) tuples in report order
+    """
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def measure(prelude, module):
+    """
+    Import module in a fresh interpreter
+    
+    Returns:
+        tuple: (cumulative import ms of module, parsed importtime rows)
+    """
+    code = f"{prelude}\nimport {module}"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    rows = parse_importtime(result.stderr)
+    total = next(cumulative for name, _, cumulative, depth in rows if name == module and depth == 0)
+    return total / 1000, rows
+
+
+def top_modules(rows, module, limit):
+    """Get the slowest modules (by self time) imported on behalf of module"""
+    # Rows are reported children first, so the entry point's subtree is the
+    # run of rows ending at its own depth-0 row
+    end = next(i for i, (name, _, _, depth) in enumerate(rows) if name == module and depth == 0)
+    start = end
+    while start > 0 and rows[start - 1][3] > 0:
+        start -= 1
+    subtree = rows[start:end + 1]
+    return sorted(subtree, key=lambda row: row[1], reverse=True)[:limit]
+
+
+def main():
+    """Parse arguments, print import times and enforce the budget"""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=10, help="fresh interpreters per entry point")
+    parser.add_argument("--budget", type=float, default=Config.STARTUP_IMPORT_BUDGET_MS, help="budget per entry point in ms")
+    parser.add_argument("--top", type=int, default=10, help="slowest modules to list")
+    parser.add_argument("--entry", choices=list(ENTRY_POINTS), nargs="+", default=list(ENTRY_POINTS), help="entry points to measure")
+    args = parser.parse_args()
+    
+    print("=" * 70)
+    print(f"Startup benchmark: {args.runs} cold starts per entry point, budget {args.budget:.0f} ms")
+    print("=" * 70)
+    
+    over_budget = []
+    for entry in args.entry:
+        prelude, module = ENTRY_POINTS[entry]
+        # The first run warms the OS file cache and writes bytecode
+        measure(prelude, module)
+        timings = []
+        for _ in range(args.runs):
+            total, rows = measure(prelude, module)
+            timings.append(total)
+        median = percentile(timings, 50)
+        status = "OK" if median <= args.budget else "OVER BUDGET"
+        print(f"{entry:<8} p50 {median:8.1f} ms   max {max(timings):8.1f} ms   {status}")
+        for name, self_us, cumulative_us, _ in top_modules(rows, module, args.top):
+            print(f"    {name:<40} self {self_us / 1000:7.1f} ms   cumulative {cumulative_us / 1000:7.1f} ms")
+        if median > args.budget:
+            over_budget.append(entry)
+    
+    if over_budget:
+        print(f"\nImport time over budget: {', '.join(over_budget)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
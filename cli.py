@@ -1,99 +1,304 @@
-"""
-Command-line interface for Interview Practice Agent
-"""
-from config import Config
-from agents.interview_agent import InterviewAgent
-
-def print_welcome():
-    """Print welcome message"""
-    print("\n" + "=" * 70)
-    print(" " * 20 + Config.APP_TITLE)
-    print("=" * 70)
-    print("\nWelcome! I'm here to help you practice for your job interview.")
-    print("\nHow it works:")
-    print("  1. Tell me what role you're preparing for")
-    print("  2. I'll ask you 5-6 interview questions")
-    print("  3. Answer naturally, as you would in a real interview")
-    print("  4. I'll provide detailed feedback at the end")
-    print("\nTips:")
-    print("  • Type 'quit' or 'exit' anytime to end the session")
-    print("  • Be honest and authentic in your responses")
-    print("  • Take your time to think before answering")
-    print("=" * 70 + "\n")
-
-def main():
-    """Main CLI function"""
-    
-    print_welcome()
-    
-    # Validate configuration
-    try:
-        Config.validate()
-    except ValueError as e:
-        print(f"\nError: {e}")
-        print("Please add GEMINI_API_KEY to your .env file\n")
-        return
-    
-    # Initialize agent
-    agent = InterviewAgent()
-    
-    # Start conversation
-    print("Interviewer: ", end="")
-    intro = agent.send_message("Hello! I'm ready to start practicing.")
-    print(intro + "\n")
-    
-    # Main conversation loop
-    while True:
-        try:
-            # Get user input
-            user_input = input(" You: ").strip()
-            
-            # Check for exit commands
-            if user_input.lower() in ['quit', 'exit', 'bye', 'stop']:
-                print("\nInterviewer: Thank you for practicing with me!")
-                print("Good luck with your real interview! \n")
-                
-                # Ask to save transcript
-                save = input("Would you like to save the transcript? (yes/no): ").strip().lower()
-                if save in ['yes', 'y']:
-                    filename = agent.save_transcript()
-                    print(f"Transcript saved to {filename}\n")
-                break
-            
-            # Skip empty inputs
-            if not user_input:
-                print("(Please type your response)\n")
-                continue
-            
-            # Get agent response
-            print("\nInterviewer: ", end="")
-            response = agent.send_message(user_input)
-            print(response + "\n")
-            
-            # Show progress
-            if agent.stage == "interviewing":
-                print(f"[Progress: {agent.questions_asked}/{Config.MAX_QUESTIONS} questions]\n")
-            
-            # End after feedback
-            if agent.is_complete():
-                print("\n" + "=" * 70)
-                print("Interview practice session complete!")
-                print("=" * 70 + "\n")
-                
-                save = input("Would you like to save the transcript? (yes/no): ").strip().lower()
-                if save in ['yes', 'y']:
-                    filename = agent.save_transcript()
-                    print(f"Transcript saved to {filename}\n")
-                break
-                
-        except KeyboardInterrupt:
-            print("\n\nSession interrupted.")
-            print("Thank you for practicing! Goodbye!\n")
-            break
-            
-        except Exception as e:
-            print(f"\nAn error occurred: {str(e)}")
-            print("Please try again or type 'quit' to exit.\n")
-
-if __name__ == "__main__":
-    main()
+"""
+Command-line interface for Interview Practice Agent
+"""
+import argparse
+from config import Config
+
+def print_welcome():
+    """Print welcome message"""
+    print("\n" + "=" * 70)
+    print(" " * 20 + Config.APP_TITLE)
+    print("=" * 70)
+    print("\nWelcome! I'm here to help you practice for your job interview.")
+    print("\nHow it works:")
+    print("  1. Tell me what role you're preparing for")
+    print("  2. I'll ask you 5-6 interview questions")
+    print("  3. Answer naturally, as you would in a real interview")
+    print("  4. I'll provide detailed feedback at the end")
+    print("\nTips:")
+    print("  • Type 'quit' or 'exit' anytime to end the session")
+    print("  • Be honest and authentic in your responses")
+    print("  • Take your time to think before answering")
+    print("=" * 70 + "\n")
+
+def print_turn_metrics(agent):
+    """Print timings and token usage of the last turn"""
+    if not agent.metrics.turns:
+        return
+    turn = agent.metrics.turns[-1]
+    print(f"[debug] stage={turn.stage} q={turn.question_number} "
+          f"ttft={turn.time_to_first_token * 1000:.0f}ms wall={turn.wall_time * 1000:.0f}ms "
+          f"tokens={turn.prompt_tokens}/{turn.completion_tokens}"
+          f"{' cached' if turn.cached else ''}{' hedged' if turn.hedged else ''}"
+          f"{' error' if turn.error else ''}\n")
+
+def print_debug_summary(agent):
+    """Print session totals, stage timings and request counters"""
+    from agents.resilience import RequestGuard
+    
+    summary = agent.metrics.summary()
+    print("=" * 70)
+    print("Debug summary")
+    print("=" * 70)
+    print(f"  Turns: {summary['turns']} ({summary['errors']} errors, {summary['cached_turns']} cached)")
+    print(f"  Tokens: {summary['prompt_tokens']} prompt / {summary['completion_tokens']} completion")
+    print(f"  Background scoring tokens: {summary['background_prompt_tokens']} prompt / "
+          f"{summary['background_completion_tokens']} completion")
+    print(f"  Turns saved by structured state: {summary['turns_saved']}")
+    for stage, seconds in summary["stage_times"].items():
+        print(f"  Time in {stage}: {seconds:.1f}s")
+    print_stage_report(summary["stages"])
+    print(f"  Upstream requests: {RequestGuard.shared().stats()}")
+    if hasattr(agent.backend, "hedge_stats"):
+        print(f"  Hedging ({summary['hedged_turns']} turns hedged): {agent.backend.hedge_stats()}")
+    if agent.metrics.profiler:
+        print(agent.metrics.profile_report())
+
+def print_stage_report(report):
+    """Print latency and token use per stage and model"""
+    for stage, models in report.items():
+        for model, row in models.items():
+            print(f"  {stage} on {model}: {row['turns']} turns, "
+                  f"ttft p50/p95 {row['ttft_p50_s'] * 1000:.0f}/{row['ttft_p95_s'] * 1000:.0f}ms, "
+                  f"wall p50/p95 {row['wall_p50_s'] * 1000:.0f}/{row['wall_p95_s'] * 1000:.0f}ms, "
+                  f"tokens {row['prompt_tokens_mean']:.0f}/{row['completion_tokens_mean']:.0f}")
+
+def main(debug=False, profile=False):
+    """
+    Main CLI function
+    
+    Args:
+        debug: Print per-turn timings and a session summary
+        profile: Run every turn under cProfile (implies a profile report)
+    """
+    
+    print_welcome()
+    
+    # Validate configuration
+    try:
+        Config.validate()
+    except ValueError as e:
+        print(f"\nError: {e}")
+        print("Please add GEMINI_API_KEY to your .env file\n")
+        return
+    
+    # Initialize agent (imported here so the banner is not held up by it)
+    from agents.interview_agent import InterviewAgent
+    agent = InterviewAgent(profile=profile)
+    
+    # Start conversation
+    print("Interviewer: ", end="", flush=True)
+    for chunk in agent.send_message_stream(Config.GREETING_MESSAGE, cacheable=True):
+        print(chunk, end="", flush=True)
+    print("\n")
+    if debug:
+        print_turn_metrics(agent)
+    
+    # Main conversation loop
+    while True:
+        try:
+            # Get user input
+            user_input = input(" You: ").strip()
+            
+            # Check for exit commands
+            if user_input.lower() in ['quit', 'exit', 'bye', 'stop']:
+                print("\nInterviewer: Thank you for practicing with me!")
+                print("Good luck with your real interview! \n")
+                
+                # Ask to save transcript
+                save = input("Would you like to save the transcript? (yes/no): ").strip().lower()
+                if save in ['yes', 'y']:
+                    filename = agent.save_transcript()
+                    print(f"Transcript saved to {filename}\n")
+                break
+            
+            # Skip empty inputs
+            if not user_input:
+                print("(Please type your response)\n")
+                continue
+            
+            # Get agent response
+            print("\nInterviewer: ", end="", flush=True)
+            for chunk in agent.send_message_stream(user_input):
+                print(chunk, end="", flush=True)
+            print("\n")
+            if debug:
+                print_turn_metrics(agent)
+            
+            # Show progress
+            if agent.stage == "interviewing":
+                print(f"[Progress: {agent.questions_asked}/{Config.MAX_QUESTIONS} questions]\n")
+            
+            # End after feedback
+            if agent.is_complete():
+                print("\n" + "=" * 70)
+                print("Interview practice session complete!")
+                print("=" * 70 + "\n")
+                
+                save = input("Would you like to save the transcript? (yes/no): ").strip().lower()
+                if save in ['yes', 'y']:
+                    filename = agent.save_transcript()
+                    print(f"Transcript saved to {filename}\n")
+                break
+        
+        except KeyboardInterrupt:
+            print("\n\nSession interrupted.")
+            print("Thank you for practicing! Goodbye!\n")
+            break
+        
+        except Exception as e:
+            print(f"\nAn error occurred: {str(e)}")
+            print("Please try again or type 'quit' to exit.\n")
+    
+    if debug or profile:
+        print_debug_summary(agent)
+
+def run_batch_command(args):
+    """Run scripted candidate sessions from a JSONL file"""
+    from agents.batch_runner import run_batch
+    
+    if not args.stub:
+        try:
+            Config.validate()
+        except ValueError as e:
+            print(f"\nError: {e}")
+            return
+    
+    def report(done, total, result):
+        status = "error: " + result["error"] if result.get("error") else result.get("stage")
+        print(f"[{done}/{total}] session {result['id']}: {status}", flush=True)
+    
+    counts = run_batch(
+        args.input,
+        args.output,
+        workers=args.workers,
+        use_processes=args.processes,
+        stub=args.stub,
+        progress=report
+    )
+    print(f"\nCompleted {counts['completed']}, failed {counts['failed']}, "
+          f"skipped {counts['skipped']} (already done) in {counts['elapsed_s']}s")
+
+def run_transcribe_command(args):
+    """Transcribe recorded answers and run them as interview sessions"""
+    from utils.batch_transcriber import run_audio_batch
+    
+    if not args.stub:
+        try:
+            Config.validate()
+        except ValueError as e:
+            print(f"\nError: {e}")
+            return
+    
+    def report(done, total, result):
+        status = "error: " + result["error"] if result.get("error") else result.get("stage")
+        print(f"[{done}/{total}] session {result['id']}: {status}", flush=True)
+    
+    counts = run_audio_batch(
+        args.manifest,
+        args.output,
+        workers=args.workers,
+        backend=args.recognizer,
+        stub=args.stub,
+        progress=report
+    )
+    print()
+    for failure in counts["file_errors"]:
+        print(f"Could not transcribe {failure['path']}: {failure['error']}")
+    print(f"Transcribed {counts['files']} files ({counts['audio_minutes']} audio minutes, "
+          f"{len(counts['file_errors'])} errors) at {counts['audio_minutes_per_wall_minute']}x real time")
+    print(f"Completed {counts['completed']}, failed {counts['failed']} in {counts['elapsed_s']}s")
+
+def run_stages_command(args):
+    """Summarize a METRICS_PATH file per stage and model"""
+    import json
+    from agents.metrics import stage_report
+    
+    with open(args.metrics, "r", encoding="utf-8") as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    report = stage_report(records)
+    if not report:
+        print("No model turns recorded")
+        return
+    print_stage_report(report)
+
+def run_analytics_command(args):
+    """Ingest saved sessions into the score store, or print reports from it"""
+    import json
+    import os
+    import time
+    from agents.analytics import ScoreStore, iter_sessions
+    
+    if args.action == "ingest":
+        start = time.perf_counter()
+        sessions = [session for path in args.paths for session in iter_sessions(path)]
+        if os.path.exists(args.store):
+            store = ScoreStore.load(args.store).merge(sessions)
+        else:
+            store = ScoreStore.from_sessions(sessions)
+        store.save(args.store)
+        print(f"Added {len(sessions)} scored sessions; {len(store)} in {args.store} "
+              f"({time.perf_counter() - start:.1f}s)")
+        return
+    
+    if not os.path.exists(args.store):
+        print(f"No score store at {args.store}; run 'analytics ingest' first")
+        return
+    start = time.perf_counter()
+    store = ScoreStore.load(args.store)
+    filters = {"role": args.role, "since": args.since, "until": args.until}
+    report = {
+        "sessions": int(store.select(**filters).sum()),
+        "roles": store.role_report(**filters),
+        "question_types": store.question_type_report(**filters),
+        "trend": store.trend_report(args.period, **filters),
+        "improvement": store.improvement_report(**filters),
+    }
+    print(json.dumps(report, indent=2))
+    print(f"Report over {len(store)} sessions in {time.perf_counter() - start:.2f}s")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=Config.APP_TITLE)
+    parser.add_argument("--debug", action="store_true", help="show per-turn latency and token usage")
+    parser.add_argument("--profile", action="store_true", help="profile every turn with cProfile")
+    subparsers = parser.add_subparsers(dest="command")
+    
+    batch_parser = subparsers.add_parser("batch", help="run scripted sessions from a JSONL file")
+    batch_parser.add_argument("input", help="JSONL file of {\"id\", \"role\", \"answers\"} sessions")
+    batch_parser.add_argument("-o", "--output", default="batch_results.jsonl", help="JSONL results file (appended, resumable)")
+    batch_parser.add_argument("-w", "--workers", type=int, default=8, help="worker pool size")
+    batch_parser.add_argument("--processes", action="store_true", help="use a process pool instead of threads")
+    batch_parser.add_argument("--stub", action="store_true", help="use the offline stub backend")
+    
+    transcribe_parser = subparsers.add_parser("transcribe", help="transcribe recorded answers and run them as sessions")
+    transcribe_parser.add_argument("manifest", help="JSONL file of {\"id\", \"role\", \"answers\": [wav paths]} sessions")
+    transcribe_parser.add_argument("-o", "--output", default="transcribe_results.jsonl", help="JSONL results file (appended)")
+    transcribe_parser.add_argument("-w", "--workers", type=int, default=None, help="transcription processes (default: one per core)")
+    transcribe_parser.add_argument("--recognizer", default=None, help="offline speech engine (default: BATCH_VOICE_RECOGNIZER)")
+    transcribe_parser.add_argument("--stub", action="store_true", help="use the offline stub backend")
+    
+    stages_parser = subparsers.add_parser("stages", help="latency and tokens per stage and model from a metrics file")
+    stages_parser.add_argument("metrics", nargs="?", default=Config.METRICS_PATH, help="JSONL file written via METRICS_PATH")
+    
+    analytics_parser = subparsers.add_parser("analytics", help="score trends and cohort reports over saved sessions")
+    analytics_parser.add_argument("action", choices=["ingest", "report"])
+    analytics_parser.add_argument("paths", nargs="*", help="saved transcripts or batch result files to ingest")
+    analytics_parser.add_argument("--store", default=Config.ANALYTICS_PATH, help="columnar score store (.npz)")
+    analytics_parser.add_argument("--role", default=None, help="only sessions for this role")
+    analytics_parser.add_argument("--since", default=None, help="first date included (YYYY-MM-DD)")
+    analytics_parser.add_argument("--until", default=None, help="last date included (YYYY-MM-DD)")
+    analytics_parser.add_argument("--period", default="M", choices=["D", "W", "M", "Y"], help="trend period")
+    
+    args = parser.parse_args()
+    if args.command == "batch":
+        run_batch_command(args)
+    elif args.command == "analytics":
+        run_analytics_command(args)
+    elif args.command == "stages":
+        if not args.metrics:
+            parser.error("no metrics file given and METRICS_PATH is not set")
+        run_stages_command(args)
+    elif args.command == "transcribe":
+        run_transcribe_command(args)
+    else:
+        main(debug=args.debug, profile=args.profile)
@@ -1,13 +1,16 @@
-"""
-UI Components package
-"""
-from components.header import render_header
-from components.sidebar import render_sidebar
-from components.chat_display import render_chat_messages
-
-
-__all__ = [
-    'render_header', 
-    'render_sidebar', 
-    'render_chat_messages',
+"""
+UI Components package
+"""
+from components.header import render_header
+from components.sidebar import render_sidebar
+from components.chat_display import render_chat_messages, render_streaming_response
+from components.debug_panel import render_debug_panel
+
+
+__all__ = [
+    'render_header', 
+    'render_sidebar', 
+    'render_chat_messages',
+    'render_streaming_response',
+    'render_debug_panel',
 ]
\ No newline at end of file
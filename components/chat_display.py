@@ -1,14 +1,67 @@
-"""
-Chat display component for Streamlit UI
-"""
-import streamlit as st
-
-def render_chat_messages(messages):
-    """Render chat message history"""
-    for message in messages:
-        if message["role"] == "user":
-            with st.chat_message("user", avatar="👤"):
-                st.markdown(message["content"])
-        else:
-            with st.chat_message("assistant", avatar="🤖"):
-                st.markdown(message["content"])
\ No newline at end of file
+"""
+Chat display component for Streamlit UI
+"""
+import streamlit as st
+from config import Config
+
+AVATARS = {"user": "👤", "assistant": "🤖"}
+SPEAKERS = {"user": "You", "assistant": "Interviewer"}
+
+def _render_earlier_messages(messages):
+    """
+    Get older messages as one markdown block, extended incrementally
+    
+    The rendered text is kept in session state, so each rerun only
+    formats messages that moved out of the recent window since last time.
+    """
+    cached = st.session_state.get("rendered_history")
+    if cached is None or cached["count"] > len(messages):
+        cached = {"count": 0, "parts": []}
+    for message in messages[cached["count"]:]:
+        cached["parts"].append(
+            f"{AVATARS[message['role']]} **{SPEAKERS[message['role']]}:** {message['content']}"
+        )
+    cached["count"] = len(messages)
+    st.session_state.rendered_history = cached
+    return "\n\n".join(cached["parts"])
+
+def render_chat_messages(messages, recent=None):
+    """
+    Render chat message history
+    
+    Only the latest messages get their own chat bubbles; anything older
+    is shown as a single pre-rendered block in a collapsed expander, so
+    rerun cost stays flat as the interview grows.
+    
+    Args:
+        messages: Transcript entries to display
+        recent: Messages shown individually (defaults to
+            Config.CHAT_RECENT_MESSAGES; 0 renders every message)
+    """
+    recent = Config.CHAT_RECENT_MESSAGES if recent is None else recent
+    earlier = max(0, len(messages) - recent) if recent else 0
+    if earlier:
+        with st.expander(f"Earlier messages ({earlier})", expanded=False):
+            st.markdown(_render_earlier_messages(messages[:earlier]))
+    
+    for message in messages[earlier:]:
+        with st.chat_message(message["role"], avatar=AVATARS[message["role"]]):
+            st.markdown(message["content"])
+
+def render_streaming_response(chunks):
+    """
+    Render an assistant response incrementally as chunks arrive
+    
+    Args:
+        chunks: Iterable of response text chunks
+        
+    Returns:
+        str: The complete response text
+    """
+    placeholder = st.empty()
+    response = ""
+    for chunk in chunks:
+        response += chunk
+        placeholder.markdown(response + "▌")
+    placeholder.markdown(response)
+    return response
\ No newline at end of file
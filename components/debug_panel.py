@@ -0,0 +1,65 @@
+"""
+Debug panel component for Streamlit UI
+"""
+import streamlit as st
+from agents.metrics import to_prometheus
+from agents.resilience import RequestGuard
+from agents.session_registry import SessionRegistry
+
+def render_debug_panel(agent):
+    """Render per-turn latency, token usage and stage timings for an agent"""
+    metrics = agent.metrics
+    with st.sidebar.expander("Debug: Performance", expanded=False):
+        summary = metrics.summary()
+        st.write(f"**Turns:** {summary['turns']} ({summary['errors']} errors, {summary['cached_turns']} cached)")
+        st.write(f"**Tokens:** {summary['prompt_tokens']} prompt / {summary['completion_tokens']} completion")
+        st.write(f"**Turns saved:** {summary['turns_saved']}")
+        
+        if metrics.turns:
+            st.dataframe([
+                {
+                    "turn": turn.turn,
+                    "stage": turn.stage,
+                    "model": turn.model,
+                    "q": turn.question_number,
+                    "ttft_ms": round(turn.time_to_first_token * 1000),
+                    "wall_ms": round(turn.wall_time * 1000),
+                    "prompt_tok": turn.prompt_tokens,
+                    "completion_tok": turn.completion_tokens,
+                    "hedged": turn.hedged,
+                }
+                for turn in metrics.turns
+            ], hide_index=True)
+        
+        st.write("**Time per stage (s):**")
+        st.json({stage: round(seconds, 2) for stage, seconds in summary["stage_times"].items()})
+        if summary["stages"]:
+            st.write("**Latency and tokens per stage and model:**")
+            st.json(summary["stages"])
+        st.write("**Upstream requests:**")
+        st.json(RequestGuard.shared().stats())
+        if hasattr(agent.backend, "hedge_stats"):
+            st.write(f"**Hedging:** {summary['hedged_turns']} turns hedged")
+            st.json(agent.backend.hedge_stats())
+        
+        registry_stats = SessionRegistry.shared().stats()
+        st.write("**Session registry:**")
+        st.json({
+            "live_sessions": registry_stats["live_sessions"],
+            "hibernated_sessions": registry_stats["hibernated_sessions"],
+            "this_session_kb": round(registry_stats["session_sizes"].get(metrics.session_id, 0) / 1024, 1),
+            "rss_mb": round(registry_stats["rss_bytes"] / 1024 / 1024, 1),
+            "rss_per_session_kb": round(registry_stats["rss_per_session_bytes"] / 1024, 1),
+            "idle_evictions": registry_stats["idle_evictions"],
+            "memory_evictions": registry_stats["memory_evictions"],
+            "restores": registry_stats["restores"],
+            "expired_snapshots": registry_stats["expired_snapshots"],
+        })
+        
+        st.download_button(
+            "Prometheus metrics",
+            to_prometheus([metrics], RequestGuard.shared(), SessionRegistry.shared()),
+            file_name="metrics.prom"
+        )
+        if metrics.profiler:
+            st.code(metrics.profile_report(), language="text")
@@ -1,38 +1,167 @@
-"""
-Configuration management for Interview Practice Agent
-"""
-import os
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
-
-class Config:
-    """Application configuration"""
-    
-    # API Configuration
-    GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
-    GEMINI_MODEL = 'gemini-2.5-flash'
-    
-    # Interview Configuration
-    MAX_QUESTIONS = 6
-    STAGES = ['introduction', 'interviewing', 'feedback']
-    
-    # UI Configuration
-    APP_TITLE = "Interview Practice Partner"
-    APP_SUBTITLE = "AI-Powered Mock Interview Assistant"
-    
-    
-    # Validation
-    JOB_KEYWORDS = [
-        "engineer", "developer", "designer", "manager", "analyst",
-        "sales", "marketing", "consultant", "accountant", "teacher",
-        "nurse", "doctor", "lawyer", "architect", "scientist"
-    ]
-    
-    @classmethod
-    def validate(cls):
-        """Validate required configuration"""
-        if not cls.GEMINI_API_KEY:
-            raise ValueError("GEMINI_API_KEY not found in environment variables")
+"""
+Configuration management for Interview Practice Agent
+"""
+import os
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+class Config:
+    """Application configuration"""
+    
+    # API Configuration
+    GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
+    GEMINI_MODEL = 'gemini-2.5-flash'
+    
+    # Per-stage model routing: each turn uses its stage's model and
+    # generation settings, and the chat history moves along when the
+    # model changes. On 2.5 models max_output_tokens includes thinking
+    # tokens. None leaves a setting at the model default.
+    STAGE_MODELS = {
+        "introduction": {
+            "model": os.getenv('INTRODUCTION_MODEL', 'gemini-2.5-flash-lite'),
+            "max_output_tokens": 256,
+            "temperature": 0.7,
+        },
+        "interviewing": {
+            "model": os.getenv('INTERVIEWING_MODEL', GEMINI_MODEL),
+            "max_output_tokens": 2048,
+            "temperature": 0.7,
+        },
+        "feedback": {
+            "model": os.getenv('FEEDBACK_MODEL', GEMINI_MODEL),
+            "max_output_tokens": 8192,
+            "temperature": 0.3,
+        },
+    }
+    
+    # Interview Configuration
+    MAX_QUESTIONS = 6
+    STAGES = ['introduction', 'interviewing', 'feedback']
+    
+    # Context Configuration
+    HISTORY_TOKEN_BUDGET = 3000     # Estimated chat history tokens before compaction
+    HISTORY_KEEP_EXCHANGES = 2      # Most recent exchanges kept verbatim
+    SUMMARY_ANSWER_CHARS = 400      # Characters of each turn kept in the summary
+    SUMMARY_TOKEN_BUDGET = 800      # Estimated tokens allowed for the running summary
+    
+    # Response Cache Configuration
+    GREETING_MESSAGE = "Hello, I'm ready to practice!"
+    RESPONSE_CACHE_ENABLED = os.getenv('RESPONSE_CACHE_ENABLED', 'true').lower() == 'true'
+    RESPONSE_CACHE_PATH = os.getenv('RESPONSE_CACHE_PATH')   # None = memory only
+    RESPONSE_CACHE_SIZE = 256       # Maximum cached turns
+    RESPONSE_CACHE_TTL = 86400      # Seconds before a cached turn expires
+    RESPONSE_CACHE_VARIANTS = 3     # Distinct replies kept per turn
+    
+    # Concurrency Configuration
+    MAX_CONCURRENT_REQUESTS = int(os.getenv('MAX_CONCURRENT_REQUESTS', '100'))
+    
+    # Rate Limit and Retry Configuration (0 disables a limit)
+    RATE_LIMIT_RPM = int(os.getenv('RATE_LIMIT_RPM', '60'))
+    RATE_LIMIT_TPM = int(os.getenv('RATE_LIMIT_TPM', '1000000'))
+    RATE_LIMIT_MAX_WAIT = 60.0      # Seconds a request may queue for quota
+    RETRY_MAX_ATTEMPTS = 4
+    RETRY_BASE_DELAY = 1.0          # Seconds, doubled per attempt with full jitter
+    RETRY_MAX_DELAY = 20.0
+    CIRCUIT_FAILURE_THRESHOLD = 5   # Consecutive failures before failing fast
+    CIRCUIT_RESET_TIMEOUT = 30.0    # Seconds before probing the upstream again
+    REQUEST_TIMEOUT = float(os.getenv('REQUEST_TIMEOUT', '60'))  # Seconds without a token before a call fails
+    
+    # Hedged Request Configuration
+    HEDGE_REQUESTS = os.getenv('HEDGE_REQUESTS', 'false').lower() == 'true'  # Duplicate slow calls
+    HEDGE_PERCENTILE = 95           # Hedge once first-token latency passes this percentile
+    HEDGE_INITIAL_DELAY = 3.0       # Seconds to wait before hedging until enough samples exist
+    HEDGE_MIN_DELAY = 0.5           # Never hedge sooner than this
+    HEDGE_MIN_SAMPLES = 20          # Latency samples needed before the percentile is used
+    HEDGE_WINDOW = 200              # Recent calls the percentile and hedge rate cover
+    HEDGE_MAX_RATE = 0.1            # Stop hedging while more recent calls than this were hedged
+    
+    # Record/Replay Configuration (agents/cassette.py)
+    CASSETTE_MODE = os.getenv('CASSETTE_MODE', '')  # record, replay or empty for live calls only
+    CASSETTE_PATH = os.getenv('CASSETTE_PATH', 'cassettes/session.jsonl')
+    CASSETTE_LATENCY_SCALE = float(os.getenv('CASSETTE_LATENCY_SCALE', '0'))  # 1 replays recorded timings, 0 is instant
+    
+    # Instrumentation Configuration
+    DEBUG_PANEL = os.getenv('DEBUG_PANEL', 'false').lower() == 'true'
+    PROFILE_SESSIONS = os.getenv('PROFILE_SESSIONS', 'false').lower() == 'true'
+    METRICS_PATH = os.getenv('METRICS_PATH')    # Append per-turn JSONL here if set
+    STARTUP_IMPORT_BUDGET_MS = float(os.getenv('STARTUP_IMPORT_BUDGET_MS', '150'))  # Cold-start import budget per entry point
+    
+    # HTTP API Configuration (server.py)
+    API_HOST = os.getenv('API_HOST', '127.0.0.1')
+    API_PORT = int(os.getenv('API_PORT', '8000'))
+    API_MAX_PENDING_TURNS = int(os.getenv('API_MAX_PENDING_TURNS', '200'))  # Turns in flight before 503
+    API_MAX_BODY_BYTES = 65536      # Largest accepted request body
+    
+    # Session Store Configuration
+    SESSION_STORE = os.getenv('SESSION_STORE', 'sqlite:///.sessions/sessions.db')  # memory, sqlite:///sessions.db or redis://host:6379/0
+    SESSION_TTL = 86400             # Seconds an idle interview is kept in the store
+    SESSION_MEMORY_LIMIT_MB = int(os.getenv('SESSION_MEMORY_LIMIT_MB', '256'))  # Live session state per worker (0 = no cap)
+    SESSION_IDLE_TTL = int(os.getenv('SESSION_IDLE_TTL', '900'))  # Seconds before an unused session is hibernated to disk (0 = never)
+    SESSION_EVICT_MIN_IDLE = 120    # Sessions used more recently are never evicted
+    SESSION_SWEEP_INTERVAL = 30     # Seconds between eviction sweeps
+    SESSION_SNAPSHOT_DIR = os.getenv('SESSION_SNAPSHOT_DIR', '.sessions')  # Hibernated sessions
+    
+    # Analytics Configuration (agents/analytics.py)
+    ANALYTICS_PATH = os.getenv('ANALYTICS_PATH', 'analytics/scores.npz')  # Columnar score store
+    
+    # Transcript Configuration
+    TRANSCRIPT_DIR = os.getenv('TRANSCRIPT_DIR', 'transcripts')
+    TRANSCRIPT_SPOOL = os.getenv('TRANSCRIPT_SPOOL', 'true').lower() == 'true'  # Stream turns to disk
+    
+    # Voice Configuration
+    VOICE_PAUSE_THRESHOLD = 1.5         # Seconds of silence before finalizing speech
+    VOICE_CALIBRATION_SECONDS = 1.0     # Ambient noise sampling, once per device
+    VOICE_BUFFER_SECONDS = 300          # Longest answer kept in the capture ring buffer
+    VOICE_POLL_INTERVAL = 0.2           # Seconds between UI checks for a transcript
+    VOICE_STREAMING = True              # Recognize segments while the candidate speaks
+    VOICE_SEGMENT_PAUSE = 0.5           # Silence that splits an answer into segments
+    VOICE_RECOGNIZER = os.getenv('VOICE_RECOGNIZER', 'google')  # or an offline engine, e.g. "sphinx"
+    BATCH_VOICE_RECOGNIZER = os.getenv('BATCH_VOICE_RECOGNIZER', 'sphinx')  # Offline engine for recorded answers
+    BATCH_TRANSCRIBE_WORKERS = int(os.getenv('BATCH_TRANSCRIBE_WORKERS', '0'))  # 0 = one process per core
+    
+    # UI Configuration
+    APP_TITLE = "Interview Practice Partner"
+    APP_SUBTITLE = "AI-Powered Mock Interview Assistant"
+    CHAT_RECENT_MESSAGES = 20           # Older messages are collapsed into one pre-rendered block (0 = off)
+    
+    
+    # Stage controller
+    STRUCTURED_STATE = os.getenv('STRUCTURED_STATE', 'true').lower() == 'true'  # Model reports role/question/feedback state each turn
+    QUESTION_PLANNING = os.getenv('QUESTION_PLANNING', 'true').lower() == 'true'  # Plan every primary question in one call
+    BACKGROUND_SCORING = os.getenv('BACKGROUND_SCORING', 'true').lower() == 'true'  # Score answers while the interview continues
+    SCORING_WORKERS = int(os.getenv('SCORING_WORKERS', '8'))   # Process-wide scoring threads
+    SCORING_PER_SESSION = int(os.getenv('SCORING_PER_SESSION', '1'))  # Scoring calls one session runs at once; later answers queue
+    SCORING_TIMEOUT = float(os.getenv('SCORING_TIMEOUT', '30'))  # Seconds a batch session waits for outstanding scores
+    
+    # Validation
+    JOB_KEYWORDS = [
+        "engineer", "developer", "designer", "manager", "analyst",
+        "sales", "marketing", "consultant", "accountant", "teacher",
+        "nurse", "doctor", "lawyer", "architect", "scientist"
+    ]
+    
+    @classmethod
+    def validate(cls):
+        """Validate required configuration"""
+        if not cls.GEMINI_API_KEY and cls.CASSETTE_MODE != 'replay':
+            raise ValueError("GEMINI_API_KEY not found in environment variables")
+        return True
+    
+    @classmethod
+    def validate_session_store(cls):
+        """
+        Check that hibernating sessions can free memory
+        
+        The web UI saves every session to the store as well as keeping it
+        in the SessionRegistry. A memory store would hold a full copy of
+        each session for SESSION_TTL, so the registry's memory cap and
+        hibernation would free next to nothing.
+        """
+        if cls.SESSION_STORE == 'memory' and (cls.SESSION_MEMORY_LIMIT_MB or cls.SESSION_IDLE_TTL):
+            raise ValueError(
+                "SESSION_STORE=memory keeps every session in memory, so hibernation cannot free it. "
+                "Use a sqlite:// or redis:// store, or set SESSION_MEMORY_LIMIT_MB=0 and SESSION_IDLE_TTL=0."
+            )
         return True
\ No newline at end of file
@@ -0,0 +1,299 @@
+"""
+Headless HTTP/SSE interview API
+
+A plain ASGI application (no web framework) for web and mobile clients.
+Every session is an AsyncInterviewAgent on one event loop, held in a
+SessionRegistry so idle sessions are hibernated to disk.
+
+Endpoints:
+    POST   /sessions                   Start a session; returns the greeting
+    POST   /sessions/{id}/turns        Send {"message": ...}; JSON reply, or
+                                       Server-Sent Events with
+                                       Accept: text/event-stream
+    GET    /sessions/{id}              Progress: stage, role, questions asked
+    GET    /sessions/{id}/transcript   Transcript messages
+    DELETE /sessions/{id}              End a session
+    GET    /metrics                    Prometheus metrics
+
+Turns of one session are serialized by a per-session lock, kept only
+while the session has turns in flight. Registry calls, which may read,
+write or compress snapshots, run in worker threads. New turns are
+turned away with 503 and Retry-After while Config.API_MAX_PENDING_TURNS
+turns are already in flight or while the upstream circuit is open, so a
+saturated model cannot build an unbounded queue.
+
+Usage:
+    python server.py
+    uvicorn server:app --port 8000
+"""
+import asyncio
+import contextlib
+import json
+from config import Config
+from agents.async_interview_agent import AsyncInterviewAgent
+from agents.metrics import to_prometheus
+from agents.resilience import RequestGuard
+from agents.session_registry import SessionRegistry
+
+
+class HTTPError(Exception):
+    """An error response with a status code"""
+    
+    def __init__(self, status, message, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.headers = headers or {}
+
+
+async def send_response(send, status, body, content_type="application/json", headers=None):
+    """Send a complete response"""
+    raw_headers = [(b"content-type", content_type.encode()), (b"content-length", str(len(body)).encode())]
+    raw_headers += [(name.encode(), str(value).encode()) for name, value in (headers or {}).items()]
+    await send({"type": "http.response.start", "status": status, "headers": raw_headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+async def send_json(send, status, data, headers=None):
+    """Send a JSON response"""
+    await send_response(send, status, json.dumps(data).encode(), headers=headers)
+
+
+def format_event(event, data):
+    """Encode one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n".encode()
+
+
+class InterviewAPI:
+    """ASGI application serving interview sessions"""
+    
+    def __init__(self, backend=None, registry=None):
+        """
+        Args:
+            backend: LLMBackend for new agents (defaults to the shared
+                Gemini backend from ModelRegistry)
+            registry: SessionRegistry holding the agents (defaults to a
+                new one that restores hibernated sessions as async agents)
+        """
+        self.backend = backend
+        self.registry = registry or SessionRegistry(restore=self._restore_agent)
+        self.locks = {}  # Session id -> [turn lock, turns holding or awaiting it]
+        self.pending_turns = 0
+        self.rejected_turns = 0
+    
+    def _restore_agent(self, data):
+        """Rebuild a hibernated session as an async agent"""
+        return AsyncInterviewAgent.from_dict(data, backend=self.backend)
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+        try:
+            await self._route(scope, receive, send)
+        except HTTPError as e:
+            await send_json(send, e.status, {"error": e.message}, e.headers)
+    
+    async def _lifespan(self, receive, send):
+        """Check the configuration on startup"""
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    if self.backend is None:
+                        Config.validate()
+                except ValueError as e:
+                    await send({"type": "lifespan.startup.failed", "message": str(e)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+    
+    async def _route(self, scope, receive, send):
+        """Dispatch a request to its handler"""
+        method = scope["method"]
+        parts = [part for part in scope["path"].split("/") if part]
+        
+        if parts == ["sessions"] and method == "POST":
+            await self.create_session(send)
+        elif parts == ["metrics"] and method == "GET":
+            await self.metrics(send)
+        elif len(parts) >= 2 and parts[0] == "sessions":
+            session_id = parts[1]
+            if len(parts) == 2 and method == "GET":
+                await send_json(send, 200, self.progress(session_id, await self.get_agent(session_id)))
+            elif len(parts) == 2 and method == "DELETE":
+                await self.delete_session(session_id, send)
+            elif parts[2:] == ["turns"] and method == "POST":
+                await self.send_turn(session_id, scope, receive, send)
+            elif parts[2:] == ["transcript"] and method == "GET":
+                await self.transcript(session_id, send)
+            elif len(parts) == 2 or parts[2:] in (["turns"], ["transcript"]):
+                raise HTTPError(405, "Method not allowed")
+            else:
+                raise HTTPError(404, "Not found")
+        else:
+            raise HTTPError(404, "Not found")
+    
+    @staticmethod
+    async def read_json(receive):
+        """Read and parse a JSON request body"""
+        body = b""
+        more_body = True
+        while more_body:
+            message = await receive()
+            body += message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if len(body) > Config.API_MAX_BODY_BYTES:
+                raise HTTPError(413, "Request body too large")
+        try:
+            data = json.loads(body or b"{}")
+        except ValueError:
+            raise HTTPError(400, "Request body is not valid JSON")
+        if not isinstance(data, dict):
+            raise HTTPError(400, "Request body must be a JSON object")
+        return data
+    
+    async def get_agent(self, session_id):
+        """Get a session's agent (restoring it if hibernated) or raise 404"""
+        agent = await asyncio.to_thread(self.registry.get, session_id)
+        if agent is None:
+            raise HTTPError(404, f"Unknown session: {session_id}")
+        return agent
+    
+    @contextlib.asynccontextmanager
+    async def session_lock(self, session_id):
+        """Hold a session's turn lock, dropping it once no turn uses it"""
+        entry = self.locks.get(session_id)
+        if entry is None:
+            entry = self.locks[session_id] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self.locks[session_id]
+    
+    @staticmethod
+    def progress(session_id, agent):
+        """Progress fields shared by several responses"""
+        return {
+            "session_id": session_id,
+            "stage": agent.stage,
+            "role": agent.role,
+            "questions_asked": agent.questions_asked,
+            "max_questions": Config.MAX_QUESTIONS,
+            "progress": agent.get_progress(),
+            "complete": agent.is_complete(),
+        }
+    
+    def admit_turn(self):
+        """Reserve a turn slot, or refuse while the upstream is saturated"""
+        breaker = RequestGuard.shared().breaker
+        if breaker.state == breaker.OPEN:
+            self.rejected_turns += 1
+            raise HTTPError(503, "The interviewer model is unavailable", {"retry-after": int(Config.CIRCUIT_RESET_TIMEOUT)})
+        if self.pending_turns >= Config.API_MAX_PENDING_TURNS:
+            self.rejected_turns += 1
+            raise HTTPError(503, "Too many turns in flight", {"retry-after": 1})
+        self.pending_turns += 1
+    
+    async def create_session(self, send):
+        """POST /sessions"""
+        self.admit_turn()
+        try:
+            agent = AsyncInterviewAgent(backend=self.backend)
+            reply = await agent.send_message(Config.GREETING_MESSAGE, cacheable=True)
+        finally:
+            self.pending_turns -= 1
+        if agent.last_error:
+            agent.conversation_log.close()
+            raise HTTPError(502, agent.last_error)
+        session_id = await asyncio.to_thread(self.registry.register, agent)
+        await send_json(send, 201, {"reply": reply, **self.progress(session_id, agent)})
+    
+    async def send_turn(self, session_id, scope, receive, send):
+        """POST /sessions/{id}/turns"""
+        payload = await self.read_json(receive)
+        message = payload.get("message")
+        if not isinstance(message, str) or not message.strip():
+            raise HTTPError(400, "Field 'message' must be a non-empty string")
+        await self.get_agent(session_id)
+        headers = dict(scope["headers"])
+        streaming = b"text/event-stream" in headers.get(b"accept", b"")
+        
+        self.admit_turn()
+        try:
+            async with self.session_lock(session_id):
+                # Fetched again: the session may have changed while queued
+                agent = await self.get_agent(session_id)
+                if streaming:
+                    await self._stream_turn(session_id, agent, message, send)
+                else:
+                    reply = await agent.send_message(message)
+                    status = 502 if agent.last_error else 200
+                    await send_json(send, status, {"reply": reply, "error": agent.last_error, **self.progress(session_id, agent)})
+                await asyncio.to_thread(self.registry.checkin, session_id)
+        finally:
+            self.pending_turns -= 1
+    
+    async def _stream_turn(self, session_id, agent, message, send):
+        """
+        Stream a turn as Server-Sent Events: "token" events, then "done"
+        
+        A client that disconnects does not abort the turn; the reply is
+        still recorded and can be read from the transcript.
+        """
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"text/event-stream"),
+                (b"cache-control", b"no-cache"),
+                (b"x-accel-buffering", b"no"),
+            ],
+        })
+        async for text in agent.send_message_stream(message):
+            # Awaiting send applies the client's flow control to the stream
+            await send({"type": "http.response.body", "body": format_event("token", {"text": text}), "more_body": True})
+        done = {"error": agent.last_error, **self.progress(session_id, agent)}
+        await send({"type": "http.response.body", "body": format_event("done", done), "more_body": False})
+    
+    async def transcript(self, session_id, send):
+        """GET /sessions/{id}/transcript"""
+        agent = await self.get_agent(session_id)
+        messages = [
+            entry.to_dict() for entry in agent.conversation_log
+            if not (entry.role == "user" and entry.content == Config.GREETING_MESSAGE)
+        ]
+        await send_json(send, 200, {"session_id": session_id, "messages": messages})
+    
+    async def delete_session(self, session_id, send):
+        """DELETE /sessions/{id}"""
+        await self.get_agent(session_id)
+        await asyncio.to_thread(self.registry.discard, session_id)
+        await send_response(send, 204, b"")
+    
+    async def metrics(self, send):
+        """GET /metrics"""
+        sessions = [agent.metrics for agent in self.registry.live_agents()]
+        text = to_prometheus(sessions, RequestGuard.shared(), self.registry)
+        text += (
+            "# TYPE interview_api_pending_turns gauge\n"
+            f"interview_api_pending_turns {self.pending_turns}\n"
+            "# TYPE interview_api_rejected_turns_total counter\n"
+            f"interview_api_rejected_turns_total {self.rejected_turns}\n"
+        )
+        await send_response(send, 200, text.encode(), "text/plain; version=0.0.4")
+
+
+app = InterviewAPI()
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run("server:app", host=Config.API_HOST, port=Config.API_PORT)
@@ -0,0 +1,89 @@
+"""
+Circuit breaker probe handling in RequestGuard
+"""
+import asyncio
+import unittest
+from agents.resilience import CircuitBreaker, CircuitOpenError, RateLimiter, RateLimitTimeout, RequestGuard
+
+
+class BadRequest(Exception):
+    """A non-retryable upstream error"""
+    code = 400
+
+
+def make_guard(rpm=0):
+    """A guard whose breaker is open and ready to probe"""
+    guard = RequestGuard(RateLimiter(rpm, 0, 0.0), CircuitBreaker(1, 0.0), 2, 0.0, 0.0)
+    guard.breaker.record_failure()
+    return guard
+
+
+def fail(error):
+    raise error
+
+
+class ProbeTests(unittest.TestCase):
+
+    def assertProbeSettled(self, guard):
+        self.assertNotEqual(guard.breaker.state, guard.breaker.HALF_OPEN)
+        # The next request is let through instead of failing fast
+        self.assertEqual(guard.call(lambda: "ok", 1), "ok")
+        self.assertEqual(guard.breaker.state, guard.breaker.CLOSED)
+    
+    def test_non_retryable_error_reopens(self):
+        guard = make_guard()
+        with self.assertRaises(BadRequest):
+            guard.call(lambda: fail(BadRequest()), 1)
+        self.assertEqual(guard.breaker.state, guard.breaker.OPEN)
+        self.assertProbeSettled(guard)
+    
+    def test_rate_limit_timeout_releases_probe(self):
+        guard = make_guard(rpm=1)
+        guard.limiter.reserve(1)
+        with self.assertRaises(RateLimitTimeout):
+            guard.call(lambda: "never sent", 1)
+        self.assertEqual(guard.breaker.state, guard.breaker.OPEN)
+        guard.limiter = RateLimiter(0, 0, 0.0)
+        self.assertProbeSettled(guard)
+    
+    def test_abandoned_stream_closes(self):
+        guard = make_guard()
+        stream = guard.stream(lambda: iter(["a", "b"]), 1)
+        self.assertEqual(next(stream), "a")
+        stream.close()
+        self.assertEqual(guard.breaker.state, guard.breaker.CLOSED)
+    
+    def test_cancelled_async_call_releases_probe(self):
+        guard = make_guard()
+        
+        async def cancel_probe():
+            task = asyncio.ensure_future(guard.call_async(lambda: asyncio.sleep(10), 1))
+            await asyncio.sleep(0.01)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+        
+        asyncio.run(cancel_probe())
+        self.assertEqual(guard.breaker.state, guard.breaker.OPEN)
+        self.assertProbeSettled(guard)
+    
+    def test_failure_after_first_chunk_reopens(self):
+        guard = make_guard()
+        
+        def broken():
+            yield "a"
+            raise BadRequest()
+        
+        with self.assertRaises(BadRequest):
+            list(guard.stream(broken, 1))
+        self.assertEqual(guard.breaker.state, guard.breaker.OPEN)
+    
+    def test_half_open_rejects_concurrent_requests(self):
+        guard = make_guard()
+        self.assertTrue(guard.breaker.allow())
+        with self.assertRaises(CircuitOpenError):
+            guard.call(lambda: "ok", 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,263 @@
+"""
+Session store contract: versions, conflicts and expiry
+
+RedisSessionStore runs against FakeRedisServer, a local stand-in that
+speaks just the RESP commands the store sends.
+"""
+import os
+import socketserver
+import tempfile
+import threading
+import time
+import unittest
+from agents.session_store import MemorySessionStore, RedisSessionStore, SessionConflictError, SQLiteSessionStore
+
+
+class FakeRedisServer(socketserver.ThreadingTCPServer):
+    """
+    In-process Redis stand-in for the hash, expiry and WATCH/MULTI/EXEC commands
+    
+    Expiry follows a clock that tests move with advance() instead of sleeping.
+    """
+    
+    daemon_threads = True
+    allow_reuse_address = True
+    
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), FakeRedisHandler)
+        self.hashes = {}
+        self.deadlines = {}
+        self.revisions = {}
+        self.offset = 0.0
+        self.lock = threading.Lock()
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+    
+    @property
+    def port(self):
+        return self.server_address[1]
+    
+    def advance(self, seconds):
+        """Move the expiry clock forward"""
+        self.offset += seconds
+    
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+    
+    def now(self):
+        return time.monotonic() + self.offset
+    
+    def touch(self, key):
+        """Record a write so WATCHes on the key fail"""
+        self.revisions[key] = self.revisions.get(key, 0) + 1
+    
+    def live(self, key):
+        """The key's hash, dropping it first if it expired"""
+        deadline = self.deadlines.get(key)
+        if deadline is not None and deadline <= self.now():
+            del self.hashes[key], self.deadlines[key]
+            self.touch(key)
+        return self.hashes.get(key)
+    
+    def execute(self, name, args):
+        """Run one command (lock held) and return its reply"""
+        if name == "SELECT":
+            return "OK"
+        if name == "HGET":
+            return (self.live(args[0]) or {}).get(args[1])
+        if name == "HMGET":
+            fields = self.live(args[0]) or {}
+            return [fields.get(field) for field in args[1:]]
+        if name == "HSET":
+            fields = self.live(args[0])
+            if fields is None:
+                fields = self.hashes[args[0]] = {}
+            added = sum(1 for field in args[1::2] if field not in fields)
+            fields.update(zip(args[1::2], args[2::2]))
+            self.touch(args[0])
+            return added
+        if name == "EXPIRE":
+            if self.live(args[0]) is None:
+                return 0
+            self.deadlines[args[0]] = self.now() + int(args[1])
+            return 1
+        if name == "DEL":
+            removed = sum(1 for key in args if self.live(key) is not None)
+            for key in args:
+                self.hashes.pop(key, None)
+                self.deadlines.pop(key, None)
+                self.touch(key)
+            return removed
+        return RuntimeError(f"ERR unknown command '{name}'")
+
+
+class FakeRedisHandler(socketserver.StreamRequestHandler):
+    """One client connection, with its own WATCH and MULTI state"""
+    
+    def handle(self):
+        server = self.server
+        watched = {}
+        queued = None
+        while True:
+            args = self.read_command()
+            if args is None:
+                return
+            name, args = args[0].decode().upper(), [arg.decode() for arg in args[1:]]
+            with server.lock:
+                if name == "WATCH":
+                    for key in args:
+                        server.live(key)
+                        watched[key] = server.revisions.get(key, 0)
+                    reply = "OK"
+                elif name == "UNWATCH":
+                    watched.clear()
+                    reply = "OK"
+                elif name == "MULTI":
+                    queued = []
+                    reply = "OK"
+                elif name == "EXEC":
+                    for key in watched:
+                        server.live(key)
+                    if any(server.revisions.get(key, 0) != revision for key, revision in watched.items()):
+                        reply = None
+                    else:
+                        reply = [server.execute(*command) for command in queued]
+                    watched.clear()
+                    queued = None
+                elif queued is not None:
+                    queued.append((name, args))
+                    reply = "QUEUED"
+                else:
+                    reply = server.execute(name, args)
+            self.wfile.write(self.encode(reply, status=isinstance(reply, str)))
+    
+    def read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        args = []
+        for _ in range(int(line[1:-2])):
+            length = int(self.rfile.readline()[1:-2])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+    
+    def encode(self, reply, status=False):
+        if status:
+            return b"+%s\r\n" % reply.encode()
+        if isinstance(reply, Exception):
+            return b"-%s\r\n" % str(reply).encode()
+        if isinstance(reply, int):
+            return b":%d\r\n" % reply
+        if isinstance(reply, list):
+            return b"*%d\r\n" % len(reply) + b"".join(self.encode(item) for item in reply)
+        if reply is None:
+            return b"$-1\r\n"
+        data = reply.encode()
+        return b"$%d\r\n%s\r\n" % (len(data), data)
+
+
+class StoreContract:
+    """Tests every store must pass; subclasses provide make_store() and expire()"""
+    
+    def test_put_and_get(self):
+        store = self.make_store()
+        self.assertIsNone(store.get("s1"))
+        self.assertEqual(store.put("s1", {"turn": 1}), 1)
+        self.assertEqual(store.get("s1"), ({"turn": 1}, 1))
+        self.assertEqual(store.version("s1"), 1)
+        self.assertEqual(store.put("s1", {"turn": 2}, 1), 2)
+        self.assertEqual(store.get("s1"), ({"turn": 2}, 2))
+    
+    def test_stale_version_conflicts(self):
+        store = self.make_store()
+        store.put("s1", {"turn": 1})
+        store.put("s1", {"turn": 2}, 1)
+        with self.assertRaises(SessionConflictError):
+            store.put("s1", {"turn": "lost"}, 1)
+        with self.assertRaises(SessionConflictError):
+            store.put("s1", {"turn": "new"})
+        self.assertEqual(store.get("s1"), ({"turn": 2}, 2))
+    
+    def test_delete(self):
+        store = self.make_store()
+        store.put("s1", {"turn": 1})
+        store.delete("s1")
+        self.assertIsNone(store.get("s1"))
+        self.assertEqual(store.put("s1", {"turn": 1}), 1)
+    
+    def test_ttl_expires_session(self):
+        store = self.make_store()
+        store.put("s1", {"turn": 1})
+        self.expire()
+        self.assertIsNone(store.get("s1"))
+        self.assertIsNone(store.version("s1"))
+        # An expired session can be started again
+        self.assertEqual(store.put("s1", {"turn": 1}), 1)
+
+
+class MemoryStoreTests(StoreContract, unittest.TestCase):
+
+    def make_store(self):
+        return MemorySessionStore(ttl=0.05)
+    
+    def expire(self):
+        time.sleep(0.1)
+
+
+class SQLiteStoreTests(StoreContract, unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+    
+    def make_store(self):
+        store = SQLiteSessionStore(os.path.join(self.directory.name, "sessions.db"), ttl=0.05)
+        self.addCleanup(store._connection.close)
+        return store
+    
+    def expire(self):
+        time.sleep(0.1)
+
+
+class RedisStoreTests(StoreContract, unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeRedisServer()
+        self.addCleanup(self.server.stop)
+    
+    def make_store(self):
+        store = RedisSessionStore("127.0.0.1", self.server.port, db=1, ttl=60)
+        self.addCleanup(lambda: store._connection and store._connection.close())
+        return store
+    
+    def expire(self):
+        self.server.advance(61)
+    
+    def test_concurrent_write_fails_exec(self):
+        store, other = self.make_store(), self.make_store()
+        store.put("s1", {"turn": 1})
+        command = store._command
+        
+        def write_before_exec(*args):
+            # Another worker saves between the version check and EXEC
+            if args[0] == "EXEC":
+                other.put("s1", {"turn": "other"}, 1)
+            return command(*args)
+        
+        store._command = write_before_exec
+        with self.assertRaises(SessionConflictError):
+            store.put("s1", {"turn": "lost"}, 1)
+        self.assertEqual(other.get("s1"), ({"turn": "other"}, 2))
+    
+    def test_ttl_is_refreshed_on_put(self):
+        store = self.make_store()
+        store.put("s1", {"turn": 1})
+        self.server.advance(40)
+        store.put("s1", {"turn": 2}, 1)
+        self.server.advance(40)
+        self.assertEqual(store.version("s1"), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,26 @@
-"""
-Utility functions package
-"""
-from utils.state_manager import StateManager
-from utils.voice_handler import VoiceHandler
-
-__all__ = ['StateManager', 'VoiceHandler']
\ No newline at end of file
+"""
+Utility functions package
+
+StateManager (streamlit) and VoiceHandler (speech_recognition) are
+imported on first access (PEP 562), so the CLI never loads either.
+"""
+import importlib
+
+_EXPORTS = {
+    'StateManager': 'utils.state_manager',
+    'VoiceHandler': 'utils.voice_handler',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name]), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,223 @@
+"""
+Offline batch transcription of recorded answers on a process pool
+"""
+import audioop
+import json
+import mmap
+import os
+import struct
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+import speech_recognition as sr
+from config import Config
+from utils.voice_handler import VoiceHandler
+from utils.streaming_recognizer import get_recognize_function, read_segments
+
+class MappedWavStream:
+    """Reads PCM frames straight from a memory-mapped WAV file"""
+    
+    def __init__(self, source):
+        self.source = source
+        self.offset = source.data_start
+    
+    def read(self, frames):
+        """Read up to `frames` frames as mono PCM bytes"""
+        source = self.source
+        end = min(self.offset + frames * source.block_align, source.data_end)
+        data = source.mapping[self.offset:end]
+        self.offset = end
+        if not data:
+            return b""
+        if source.channels == 2:
+            data = audioop.tomono(data, source.SAMPLE_WIDTH, 0.5, 0.5)
+        if source.SAMPLE_WIDTH == 1:
+            # 8-bit WAV is unsigned; audioop expects signed samples
+            data = audioop.bias(data, 1, -128)
+        return data
+
+
+class MappedWavSource:
+    """
+    Audio source for read_segments backed by a memory-mapped PCM WAV file
+    
+    Only the pages being read are paged in, so long recordings are never
+    fully loaded into memory.
+    """
+    
+    CHUNK = 4096
+    
+    def __init__(self, path):
+        self.path = path
+        self.mapping = None
+        self.stream = None
+    
+    def __enter__(self):
+        with open(self.path, "rb") as f:
+            self.mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._parse_header()
+        self.stream = MappedWavStream(self)
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.stream = None
+        self.mapping.close()
+    
+    def _parse_header(self):
+        """Locate the fmt and data chunks"""
+        mapping = self.mapping
+        if mapping[0:4] != b"RIFF" or mapping[8:12] != b"WAVE":
+            raise ValueError(f"{self.path} is not a WAV file")
+        position = 12
+        fmt = None
+        while position + 8 <= len(mapping):
+            chunk_id = mapping[position:position + 4]
+            size = struct.unpack("<I", mapping[position + 4:position + 8])[0]
+            body = position + 8
+            if chunk_id == b"fmt ":
+                fmt = struct.unpack("<HHIIHH", mapping[body:body + 16])
+            elif chunk_id == b"data":
+                self.data_start = body
+                self.data_end = min(body + size, len(mapping))
+                break
+            position = body + size + (size & 1)
+        else:
+            raise ValueError(f"{self.path} has no audio data")
+        
+        if fmt is None:
+            raise ValueError(f"{self.path} has no format chunk")
+        audio_format, self.channels, self.SAMPLE_RATE, _, self.block_align, bits = fmt
+        if audio_format not in (1, 0xFFFE) or self.channels > 2:
+            raise ValueError(f"{self.path}: only mono/stereo PCM WAV is supported")
+        self.SAMPLE_WIDTH = bits // 8
+    
+    @property
+    def duration(self):
+        """Length of the recording in seconds"""
+        return (self.data_end - self.data_start) / self.block_align / self.SAMPLE_RATE
+
+
+def transcribe_wav(path, backend=None):
+    """
+    Transcribe one WAV file (runs inside a worker process)
+    
+    Returns:
+        dict: path, text, audio_seconds, elapsed_s and error
+    """
+    start = time.perf_counter()
+    result = {"path": path, "text": None, "audio_seconds": 0.0, "error": None}
+    try:
+        recognizer = VoiceHandler.create_recognizer()
+        recognize = get_recognize_function(recognizer, backend)
+        parts = []
+        with MappedWavSource(path) as source:
+            result["audio_seconds"] = source.duration
+            for segment in read_segments(
+                source,
+                recognizer.energy_threshold,
+                Config.VOICE_SEGMENT_PAUSE,
+                None,
+                recognizer.non_speaking_duration
+            ):
+                try:
+                    parts.append(recognize(segment))
+                except sr.UnknownValueError:
+                    # Segment held no recognizable speech
+                    continue
+        result["text"] = " ".join(part for part in parts if part)
+    except Exception as e:
+        result["error"] = str(e)
+    result["elapsed_s"] = time.perf_counter() - start
+    return result
+
+
+def transcribe_files(paths, workers=None, backend=None):
+    """
+    Transcribe many files in parallel, yielding results as they finish
+    
+    Args:
+        paths: WAV file paths
+        workers: Worker processes (defaults to Config.BATCH_TRANSCRIBE_WORKERS,
+            then every core)
+        backend: Offline recognizer, e.g. "sphinx" (defaults to
+            Config.BATCH_VOICE_RECOGNIZER)
+    """
+    backend = backend or Config.BATCH_VOICE_RECOGNIZER
+    workers = workers or Config.BATCH_TRANSCRIBE_WORKERS or os.cpu_count()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(transcribe_wav, path, backend) for path in paths]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def run_audio_batch(manifest_path, output_path, workers=None, backend=None,
+                    session_workers=8, stub=False, progress=None):
+    """
+    Transcribe recorded answers and run each set as an interview session
+    
+    The manifest is JSONL: {"id": ..., "role": ..., "answers": ["a1.wav", ...]}
+    with paths relative to the manifest. A session starts as soon as all
+    of its files are transcribed, while other files are still in the
+    process pool.
+    
+    Returns:
+        dict: Session counts, throughput in audio minutes per wall minute,
+            and "file_errors": a {"path", "error"} dict per file that could
+            not be transcribed
+    """
+    from agents.batch_runner import load_sessions, run_session
+    
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    sessions = load_sessions(manifest_path)
+    remaining = {}
+    files = {}
+    for session in sessions:
+        paths = [os.path.join(base_dir, answer) for answer in session.get("answers", [])]
+        session["audio_files"] = paths
+        remaining[session["id"]] = len(paths)
+        for path in paths:
+            files.setdefault(path, []).append(session)
+    
+    transcripts = {}
+    audio_seconds = 0.0
+    counts = {"completed": 0, "failed": 0, "files": len(files), "file_errors": []}
+    start = time.perf_counter()
+    
+    def submit(session_pool, session):
+        # Silent or unreadable recordings are left out of the session
+        session["answers"] = [transcripts[path] for path in session["audio_files"] if transcripts.get(path)]
+        return session_pool.submit(run_session, session, stub)
+    
+    with ThreadPoolExecutor(max_workers=session_workers) as session_pool, \
+            open(output_path, "a", encoding="utf-8") as out:
+        pending = {submit(session_pool, s): s for s in sessions if not remaining[s["id"]]}
+        
+        for result in transcribe_files(list(files), workers, backend):
+            audio_seconds += result["audio_seconds"]
+            if result["error"]:
+                counts["file_errors"].append({"path": result["path"], "error": result["error"]})
+            transcripts[result["path"]] = result["text"]
+            for session in files[result["path"]]:
+                remaining[session["id"]] -= 1
+                if not remaining[session["id"]]:
+                    pending[submit(session_pool, session)] = session
+        transcription_elapsed = time.perf_counter() - start
+        
+        for future in as_completed(pending):
+            session = pending[future]
+            try:
+                record = future.result()
+            except Exception as e:
+                record = {"id": str(session["id"]), "role": session.get("role"), "error": str(e)}
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+            counts["failed" if record.get("error") else "completed"] += 1
+            if progress:
+                progress(counts["completed"] + counts["failed"], len(sessions), record)
+    
+    counts["audio_minutes"] = round(audio_seconds / 60, 2)
+    counts["transcription_s"] = round(transcription_elapsed, 2)
+    counts["elapsed_s"] = round(time.perf_counter() - start, 2)
+    counts["audio_minutes_per_wall_minute"] = round(
+        audio_seconds / transcription_elapsed if transcription_elapsed else 0.0, 2
+    )
+    return counts
@@ -1,58 +1,214 @@
-"""
-Session state management for Streamlit
-"""
-import streamlit as st
-from agents.interview_agent import InterviewAgent
-
-class StateManager:
-    """Manages Streamlit session state"""
-    
-    @staticmethod
-    def initialize():
-        """Initialize session state variables"""
-        if 'messages' not in st.session_state:
-            st.session_state.messages = []
-        
-        if 'agent' not in st.session_state:
-            st.session_state.agent = None
-        
-        if 'interview_started' not in st.session_state:
-            st.session_state.interview_started = False
-    
-    @staticmethod
-    def start_interview():
-        """Start a new interview session"""
-        st.session_state.interview_started = True
-        st.session_state.agent = InterviewAgent()
-        
-        # Send initial greeting
-        greeting = st.session_state.agent.send_message("Hello, I'm ready to practice!")
-        st.session_state.messages.append({
-            "role": "assistant",
-            "content": greeting
-        })
-    
-    @staticmethod
-    def reset_interview():
-        """Reset interview session"""
-        st.session_state.messages = []
-        st.session_state.agent = None
-        st.session_state.interview_started = False
-    
-    @staticmethod
-    def add_message(role, content):
-        """Add message to conversation"""
-        st.session_state.messages.append({
-            "role": role,
-            "content": content
-        })
-    
-    @staticmethod
-    def get_agent():
-        """Get current interview agent"""
-        return st.session_state.agent
-    
-    @staticmethod
-    def is_interview_started():
-        """Check if interview has started"""
+"""
+Session state management for Streamlit
+"""
+import threading
+from contextlib import contextmanager
+import streamlit as st
+from config import Config
+
+# Turn locks shared by every browser tab served by this worker, keyed by
+# session id: [lock, number of turns holding or waiting for it]
+_turn_locks = {}
+_turn_locks_guard = threading.Lock()
+
+class StateManager:
+    """Manages Streamlit session state"""
+    
+    @staticmethod
+    def initialize():
+        """Initialize session state variables"""
+        if 'interview_started' not in st.session_state:
+            st.session_state.interview_started = False
+        
+        if 'session_id' not in st.session_state:
+            # A session started on another worker (or before a restart)
+            # is picked up from the URL
+            session_id = st.experimental_get_query_params().get('session', [None])[0]
+            if session_id and StateManager.get_store().version(session_id) is not None:
+                st.session_state.session_id = session_id
+                st.session_state.interview_started = True
+            else:
+                st.session_state.session_id = None
+            st.session_state.session_version = None
+    
+    @staticmethod
+    def get_store():
+        """Get the session store shared by every app worker"""
+        from agents.session_store import SessionStore
+        return SessionStore.shared()
+    
+    @staticmethod
+    def get_registry():
+        """Get the process-wide registry that holds live agents"""
+        from agents.session_registry import SessionRegistry
+        return SessionRegistry.shared()
+    
+    @staticmethod
+    def start_interview():
+        """Start a new interview session"""
+        # Imported on first use so the welcome page renders without the agent stack
+        from agents.interview_agent import InterviewAgent
+        
+        agent = InterviewAgent()
+        
+        # Send initial greeting
+        agent.send_message(Config.GREETING_MESSAGE, cacheable=True)
+        
+        session_id = agent.metrics.session_id
+        st.session_state.session_version = StateManager.get_store().put(session_id, agent.to_dict())
+        st.session_state.session_id = session_id
+        StateManager.get_registry().register(agent)
+        st.session_state.interview_started = True
+        st.experimental_set_query_params(session=session_id)
+    
+    @staticmethod
+    @contextmanager
+    def session_lock():
+        """
+        Hold the current session's turn lock
+        
+        Tabs of one session on the same worker share the registry's agent,
+        so a turn (send, then save) runs under this lock and fetches the
+        agent again once it holds it. The lock is dropped once no turn
+        uses it.
+        """
+        session_id = st.session_state.session_id
+        with _turn_locks_guard:
+            entry = _turn_locks.get(session_id)
+            if entry is None:
+                entry = _turn_locks[session_id] = [threading.Lock(), 0]
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with _turn_locks_guard:
+                entry[1] -= 1
+                if not entry[1]:
+                    del _turn_locks[session_id]
+    
+    @staticmethod
+    def save_agent(agent):
+        """
+        Save the agent's state after a turn
+        
+        Returns:
+            bool: False if another worker saved a newer turn first; the
+                local turn is dropped and the stored session is loaded on
+                the next get_agent()
+        """
+        from agents.session_store import SessionConflictError
+        
+        try:
+            st.session_state.session_version = StateManager.get_store().put(
+                st.session_state.session_id, agent.to_dict(), st.session_state.session_version
+            )
+            StateManager.get_registry().checkin(st.session_state.session_id)
+            return True
+        except SessionConflictError:
+            st.session_state.session_version = None
+            return False
+    
+    @staticmethod
+    def reset_interview():
+        """Reset interview session"""
+        if st.session_state.session_id is not None:
+            StateManager.get_registry().discard(st.session_state.session_id)
+            StateManager.get_store().delete(st.session_state.session_id)
+        st.session_state.session_id = None
+        st.session_state.session_version = None
+        st.session_state.interview_started = False
+        st.session_state.pop('rendered_history', None)
+        st.experimental_set_query_params()
+    
+    @staticmethod
+    def get_messages():
+        """Get messages to display, read straight from the agent's transcript"""
+        agent = StateManager.get_agent()
+        if agent is None:
+            return []
+        return [
+            entry for entry in agent.conversation_log
+            if not (entry.role == "user" and entry.content == Config.GREETING_MESSAGE)
+        ]
+    
+    @staticmethod
+    @st.cache_resource
+    def get_recognizer():
+        """
+        Get the process-wide speech recognizer, or None if voice input is unavailable
+        
+        Created once per server process instead of once per browser session.
+        Ambient-noise calibration is cached per device by VoiceCapture, so
+        it is not repeated either.
+        """
+        try:
+            from utils.voice_handler import VoiceHandler
+            return VoiceHandler.create_recognizer()
+        except Exception as e:
+            print(f"Voice input not available: {e}")
+            return None
+    
+    @staticmethod
+    def get_voice_handler():
+        """
+        Get this browser session's voice handler, or None if voice input is unavailable
+        
+        Each session has its own handler and background capture, sharing
+        only the recognizer, so one candidate's recording never shows up
+        in another's session.
+        """
+        if 'voice_handler' not in st.session_state:
+            recognizer = StateManager.get_recognizer()
+            handler = None
+            if recognizer is not None:
+                try:
+                    from utils.voice_handler import VoiceHandler
+                    handler = VoiceHandler(recognizer)
+                except Exception as e:
+                    print(f"Voice input not available: {e}")
+            st.session_state.voice_handler = handler
+        return st.session_state.voice_handler
+    
+    @staticmethod
+    def get_agent():
+        """
+        Get current interview agent
+        
+        Live agents are held by the process-wide SessionRegistry (which may
+        have hibernated this one to disk) rather than in session state, so
+        abandoned tabs do not pin their agents in memory. The agent is only
+        rebuilt from the session store when the stored version moved on,
+        i.e. when the session was last served by another worker.
+        """
+        session_id = st.session_state.session_id
+        if session_id is None:
+            return None
+        
+        registry = StateManager.get_registry()
+        store = StateManager.get_store()
+        agent = registry.get(session_id)
+        version = store.version(session_id)
+        if version is None and agent is not None:
+            # Expired from the store while still open here; store it again
+            st.session_state.session_version = store.put(session_id, agent.to_dict())
+            return agent
+        if version is None or (agent is not None and version == st.session_state.session_version):
+            return agent
+        
+        from agents.interview_agent import InterviewAgent
+        
+        record = store.get(session_id)
+        if record is None:
+            return agent
+        data, version = record
+        agent = InterviewAgent.from_dict(data)
+        registry.register(agent)
+        st.session_state.session_version = version
+        st.session_state.pop('rendered_history', None)
+        return agent
+    
+    @staticmethod
+    def is_interview_started():
+        """Check if interview has started"""
         return st.session_state.interview_started
\ No newline at end of file
@@ -0,0 +1,193 @@
+"""
+Incremental speech recognition: split audio at pauses, recognize segments concurrently
+"""
+import audioop
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import speech_recognition as sr
+from config import Config
+
+def get_recognize_function(recognizer, backend=None):
+    """
+    Get a recognizer method by backend name
+    
+    Args:
+        recognizer: sr.Recognizer instance
+        backend: "google" (online) or an offline engine supported by
+            SpeechRecognition such as "sphinx", "vosk" or "whisper"
+            (defaults to Config.VOICE_RECOGNIZER)
+            
+    Returns:
+        callable: Function taking AudioData and returning text
+    """
+    backend = backend or Config.VOICE_RECOGNIZER
+    recognize = getattr(recognizer, f"recognize_{backend}", None)
+    if recognize is None:
+        raise ValueError(f"Unknown speech recognition backend: {backend}")
+    return recognize
+
+
+def read_segments(source, energy_threshold, segment_pause, end_pause, preroll_seconds,
+                  timeout=None, phrase_time_limit=None, stop_event=None):
+    """
+    Read an utterance from an audio source, yielding it in pause-separated segments
+    
+    Works with both sr.Microphone and sr.AudioFile sources. A segment ends
+    after segment_pause seconds of silence; the utterance ends after
+    end_pause seconds of silence (None = never), at end of input, or when
+    stop_event is set.
+    With segment_pause == end_pause the whole utterance is one segment.
+    
+    Args:
+        source: Open SpeechRecognition audio source
+        energy_threshold: RMS energy above which a chunk counts as speech
+        segment_pause: Seconds of silence that close a segment
+        end_pause: Seconds of silence that end the utterance
+        preroll_seconds: Audio kept before speech starts and after it stops
+        timeout: Seconds to wait for speech to start (None = forever)
+        phrase_time_limit: Maximum utterance length (None = unlimited)
+        stop_event: threading.Event that ends recording early
+        
+    Yields:
+        sr.AudioData: Consecutive speech segments
+    """
+    seconds_per_chunk = source.CHUNK / source.SAMPLE_RATE
+    segment_chunks = max(1, int(segment_pause / seconds_per_chunk))
+    end_chunks = max(segment_chunks, int(end_pause / seconds_per_chunk)) if end_pause else None
+    preroll_chunks = max(1, int(preroll_seconds / seconds_per_chunk))
+    
+    # Bounded buffers keep memory flat however long the answer is
+    frames = deque(maxlen=int(Config.VOICE_BUFFER_SECONDS / seconds_per_chunk))
+    preroll = deque(maxlen=preroll_chunks)
+    waited = 0.0
+    spoken = 0.0
+    silent = 0
+    started = False
+    
+    def to_audio():
+        # Drop the trailing pause, keeping a short tail
+        chunks = list(frames)
+        trim = max(0, silent - preroll_chunks)
+        if trim:
+            chunks = chunks[:-trim]
+        return sr.AudioData(b"".join(chunks), source.SAMPLE_RATE, source.SAMPLE_WIDTH)
+    
+    while not (stop_event and stop_event.is_set()):
+        buffer = source.stream.read(source.CHUNK)
+        if not buffer:
+            break
+        loud = audioop.rms(buffer, source.SAMPLE_WIDTH) > energy_threshold
+        
+        if not started:
+            preroll.append(buffer)
+            waited += seconds_per_chunk
+            if loud:
+                started = True
+                frames.extend(preroll)
+                preroll.clear()
+            elif timeout and waited > timeout:
+                return
+            continue
+        
+        spoken += seconds_per_chunk
+        if loud:
+            if not frames:
+                # Speech resumed after a segment boundary
+                frames.extend(preroll)
+                preroll.clear()
+            frames.append(buffer)
+            silent = 0
+        else:
+            silent += 1
+            if frames:
+                frames.append(buffer)
+                if silent >= segment_chunks:
+                    yield to_audio()
+                    frames.clear()
+            else:
+                preroll.append(buffer)
+            if end_chunks and silent >= end_chunks:
+                break
+        
+        if phrase_time_limit and spoken >= phrase_time_limit:
+            break
+    
+    if frames:
+        yield to_audio()
+
+
+class StreamingTranscriber:
+    """
+    Recognizes segments concurrently as they arrive and stitches them in order
+    
+    Segments that contain no recognizable speech are skipped.
+    """
+    
+    def __init__(self, recognize, executor=None):
+        """
+        Args:
+            recognize: Callable(AudioData) -> str
+            executor: Executor to run recognition on (defaults to a new
+                thread pool)
+        """
+        self.recognize = recognize
+        self.executor = executor or ThreadPoolExecutor(max_workers=4)
+        self._futures = []
+    
+    def __len__(self):
+        return len(self._futures)
+    
+    def add_segment(self, audio):
+        """Queue a segment for recognition"""
+        self._futures.append(self.executor.submit(self._recognize_segment, audio))
+    
+    def _recognize_segment(self, audio):
+        """Recognize one segment, returning "" if it holds no speech"""
+        try:
+            return self.recognize(audio)
+        except sr.UnknownValueError:
+            return ""
+    
+    def partial_text(self):
+        """Text of the leading segments that have finished so far"""
+        parts = []
+        for future in self._futures:
+            if not future.done() or future.exception():
+                break
+            parts.append(future.result())
+        return " ".join(part for part in parts if part)
+    
+    def result(self, timeout=None):
+        """
+        Wait for every segment and join the transcripts in order
+        
+        Raises:
+            sr.RequestError: If recognition of a segment failed
+        """
+        parts = [future.result(timeout=timeout) for future in self._futures]
+        return " ".join(part for part in parts if part)
+
+
+def transcribe_file(path, recognizer=None, backend=None, segment_pause=None, executor=None):
+    """
+    Transcribe a WAV/AIFF/FLAC file segment by segment
+    
+    Useful for offline runs and for exercising the streaming pipeline from
+    audio fixtures without a microphone or network (with an offline
+    backend such as "sphinx").
+    
+    Returns:
+        str: The stitched transcript
+    """
+    recognizer = recognizer or sr.Recognizer()
+    transcriber = StreamingTranscriber(get_recognize_function(recognizer, backend), executor)
+    with sr.AudioFile(path) as source:
+        for segment in read_segments(
+            source,
+            recognizer.energy_threshold,
+            segment_pause or Config.VOICE_SEGMENT_PAUSE,
+            None,
+            recognizer.non_speaking_duration
+        ):
+            transcriber.add_segment(segment)
+    return transcriber.result()
@@ -0,0 +1,176 @@
+"""
+Non-blocking voice capture with cached noise calibration
+"""
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import speech_recognition as sr
+from config import Config
+from utils.streaming_recognizer import StreamingTranscriber, read_segments
+
+class VoiceResult:
+    """Outcome of one capture: recognized text or an error message"""
+    
+    __slots__ = ("text", "error")
+    
+    def __init__(self, text=None, error=None):
+        self.text = text
+        self.error = error
+
+
+class VoiceCapture:
+    """
+    Records on a background thread and recognizes off the UI thread
+    
+    Ambient-noise calibration runs once per input device and the
+    resulting energy threshold is cached for the whole process. Audio
+    is read chunk by chunk into a bounded ring buffer; as soon as the
+    speaker pauses for the recognizer's pause_threshold, trailing
+    silence is trimmed and the clip is handed to a recognition worker.
+    
+    In streaming mode the answer is also split at shorter pauses
+    (Config.VOICE_SEGMENT_PAUSE) and each segment is recognized while the
+    candidate keeps talking, so the final text is ready about one
+    segment's latency after they stop. Results are collected with poll().
+    """
+    
+    IDLE = "idle"
+    LISTENING = "listening"
+    TRANSCRIBING = "transcribing"
+    
+    # Calibrated energy thresholds per device index, shared by all sessions
+    _thresholds = {}
+    _thresholds_lock = threading.Lock()
+    
+    # Recognition workers shared by all sessions
+    _executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="voice-recognition")
+    
+    def __init__(self, recognizer, recognize=None, device_index=None, streaming=None):
+        """
+        Args:
+            recognizer: Configured sr.Recognizer
+            recognize: Callable(AudioData) -> str (defaults to Google)
+            device_index: Microphone device index (None = default)
+            streaming: Recognize segments while recording (defaults to
+                Config.VOICE_STREAMING)
+        """
+        self.recognizer = recognizer
+        self.recognize = recognize or recognizer.recognize_google
+        self.device_index = device_index
+        self.streaming = Config.VOICE_STREAMING if streaming is None else streaming
+        self.status = self.IDLE
+        self._transcriber = None
+        self._results = queue.Queue()
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def calibrate(self, source, force=False):
+        """Set the energy threshold, measuring ambient noise only once per device"""
+        with self._thresholds_lock:
+            threshold = self._thresholds.get(self.device_index)
+            if threshold is None or force:
+                self.recognizer.adjust_for_ambient_noise(source, duration=Config.VOICE_CALIBRATION_SECONDS)
+                threshold = self.recognizer.energy_threshold
+                self._thresholds[self.device_index] = threshold
+        self.recognizer.energy_threshold = threshold
+    
+    def start(self, timeout=10, phrase_time_limit=None):
+        """
+        Start listening in the background
+        
+        Args:
+            timeout: Seconds to wait for speech to start
+            phrase_time_limit: Maximum phrase length (None = unlimited)
+            
+        Returns:
+            bool: False if a capture is already in progress
+        """
+        if self.status != self.IDLE:
+            return False
+        self.status = self.LISTENING
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._capture,
+            args=(timeout, phrase_time_limit),
+            name="voice-capture",
+            daemon=True
+        )
+        self._thread.start()
+        return True
+    
+    def stop(self):
+        """Stop recording now and recognize what was captured so far"""
+        self._stop.set()
+    
+    def poll(self):
+        """
+        Get a finished result without blocking
+        
+        Returns:
+            VoiceResult or None: None while still listening or transcribing
+        """
+        try:
+            return self._results.get_nowait()
+        except queue.Empty:
+            return None
+    
+    def partial_text(self):
+        """Transcript of the segments recognized so far (streaming mode)"""
+        transcriber = self._transcriber
+        return transcriber.partial_text() if transcriber else ""
+    
+    @property
+    def busy(self):
+        """Check whether a capture is in progress"""
+        return self.status != self.IDLE
+    
+    def _finish(self, result):
+        """Deliver a result and return to idle"""
+        self._results.put(result)
+        self.status = self.IDLE
+    
+    def _capture(self, timeout, phrase_time_limit):
+        """Background thread: record one utterance and queue recognition"""
+        transcriber = StreamingTranscriber(self.recognize, self._executor)
+        self._transcriber = transcriber
+        try:
+            for segment in self._segments(timeout, phrase_time_limit):
+                transcriber.add_segment(segment)
+        except Exception as e:
+            self._finish(VoiceResult(error=f"Microphone error: {e}"))
+            return
+        if not len(transcriber):
+            self._finish(VoiceResult(error="No speech detected."))
+            return
+        
+        self.status = self.TRANSCRIBING
+        try:
+            text = transcriber.result()
+        except sr.RequestError as e:
+            # The recognition service could not be reached or refused the request
+            self._finish(VoiceResult(error=f"Speech recognition service unavailable: {e}"))
+            return
+        except Exception as e:
+            self._finish(VoiceResult(error=f"Speech recognition error: {e}"))
+            return
+        if text:
+            self._finish(VoiceResult(text=text))
+        else:
+            self._finish(VoiceResult(error="Could not understand audio."))
+    
+    def _segments(self, timeout, phrase_time_limit):
+        """Yield speech segments from the microphone until the speaker pauses"""
+        end_pause = self.recognizer.pause_threshold
+        segment_pause = min(Config.VOICE_SEGMENT_PAUSE, end_pause) if self.streaming else end_pause
+        with sr.Microphone(device_index=self.device_index) as source:
+            self.calibrate(source)
+            yield from read_segments(
+                source,
+                self.recognizer.energy_threshold,
+                segment_pause,
+                end_pause,
+                self.recognizer.non_speaking_duration,
+                timeout=timeout,
+                phrase_time_limit=phrase_time_limit,
+                stop_event=self._stop
+            )
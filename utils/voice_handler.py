@@ -1,54 +1,106 @@
-"""
-Voice input handler for interview agent
-"""
-import speech_recognition as sr
-
-class VoiceHandler:
-    """Handles speech recognition (voice input only)"""
-    
-    def __init__(self):
-        """Initialize voice handler"""
-        self.recognizer = sr.Recognizer()
-        
-        # Adjust recognizer settings for better long-form speech
-        self.recognizer.energy_threshold = 300
-        self.recognizer.dynamic_energy_threshold = True
-        self.recognizer.pause_threshold = 1.5  # Wait 1.5s of silence before stopping
-    
-    def listen(self, timeout=10, phrase_time_limit=None):
-        """
-        Listen to microphone and convert speech to text
-        
-        Args:
-            timeout: Seconds to wait for speech to start
-            phrase_time_limit: Maximum phrase length (None = unlimited)
-            
-        Returns:
-            str: Recognized text or None if failed
-        """
-        try:
-            with sr.Microphone() as source:
-                # Adjust for ambient noise
-                self.recognizer.adjust_for_ambient_noise(source, duration=1)
-                
-                # Listen for audio
-                audio = self.recognizer.listen(
-                    source, 
-                    timeout=timeout,
-                    phrase_time_limit=phrase_time_limit
-                )
-                
-                # Convert to text using Google Speech Recognition
-                text = self.recognizer.recognize_google(audio)
-                return text
-                
-        except sr.WaitTimeoutError:
-            return None
-        except sr.UnknownValueError:
-            return None
-        except sr.RequestError as e:
-            print(f"Speech recognition error: {e}")
-            return None
-        except Exception as e:
-            print(f"Microphone error: {e}")
-            return None
+"""
+Voice input handler for interview agent
+"""
+import speech_recognition as sr
+from config import Config
+from utils.voice_capture import VoiceCapture
+from utils.streaming_recognizer import get_recognize_function
+
+class VoiceHandler:
+    """Handles speech recognition (voice input only)"""
+    
+    def __init__(self, recognizer=None):
+        """
+        Initialize voice handler
+        
+        Args:
+            recognizer: sr.Recognizer to share with other handlers (a new
+                one is created if omitted)
+        """
+        self.recognizer = recognizer or self.create_recognizer()
+        
+        # Background capture for the web UI, one per handler
+        self.capture = VoiceCapture(self.recognizer, get_recognize_function(self.recognizer))
+    
+    @staticmethod
+    def create_recognizer():
+        """Create a recognizer tuned for long-form interview answers"""
+        recognizer = sr.Recognizer()
+        
+        # Adjust recognizer settings for better long-form speech
+        recognizer.energy_threshold = 300
+        recognizer.dynamic_energy_threshold = True
+        recognizer.pause_threshold = Config.VOICE_PAUSE_THRESHOLD  # Wait 1.5s of silence before stopping
+        return recognizer
+    
+    def listen(self, timeout=10, phrase_time_limit=None):
+        """
+        Listen to microphone and convert speech to text
+        
+        Args:
+            timeout: Seconds to wait for speech to start
+            phrase_time_limit: Maximum phrase length (None = unlimited)
+            
+        Returns:
+            str: Recognized text or None if failed
+        """
+        try:
+            with sr.Microphone() as source:
+                # Adjust for ambient noise (measured once per device)
+                self.capture.calibrate(source)
+                
+                # Listen for audio
+                audio = self.recognizer.listen(
+                    source, 
+                    timeout=timeout,
+                    phrase_time_limit=phrase_time_limit
+                )
+                
+                # Convert to text using Google Speech Recognition
+                text = self.recognizer.recognize_google(audio)
+                return text
+                
+        except sr.WaitTimeoutError:
+            return None
+        except sr.UnknownValueError:
+            return None
+        except sr.RequestError as e:
+            print(f"Speech recognition error: {e}")
+            return None
+        except Exception as e:
+            print(f"Microphone error: {e}")
+            return None
+    
+    def start_listening(self, timeout=10, phrase_time_limit=None):
+        """
+        Start capturing speech without blocking the caller
+        
+        Recording and recognition run on background threads; collect the
+        transcript with poll_result().
+        
+        Returns:
+            bool: False if a capture is already in progress
+        """
+        return self.capture.start(timeout=timeout, phrase_time_limit=phrase_time_limit)
+    
+    def stop_listening(self):
+        """Stop recording early and transcribe what was captured"""
+        self.capture.stop()
+    
+    def poll_result(self):
+        """
+        Get the result of a background capture, if it is ready
+        
+        Returns:
+            VoiceResult or None: None while still listening or transcribing
+        """
+        return self.capture.poll()
+    
+    def partial_transcript(self):
+        """Text recognized so far while the candidate is still speaking"""
+        return self.capture.partial_text()
+    
+    @property
+    def status(self):
+        """Get capture status (idle, listening or transcribing)"""
+        return self.capture.status
\ No newline at end of file